@@ -1,5 +1,11 @@
 import os
-import json
+
+# The production server runs on eventlet, which must patch the standard library before anything else imports it
+SERVER_MODE = os.environ.get("SERVER_MODE", "threading")  # threading (Werkzeug dev server) or eventlet
+if SERVER_MODE == "eventlet":
+    import eventlet
+    eventlet.monkey_patch()
+
 import uuid
 import logging
 import requests
@@ -7,201 +13,551 @@ import time
 import numpy as np
 import torch
 import soundfile as sf
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 import datetime
 import queue
 import threading
 import base64
+import hashlib
 import io
+import contextlib
+from session_store import SessionStore
+from pipeline import Pipeline, Stage
+from streaming import StreamingTranscriber
+from audio_io import decode_audio_bytes, decode_pcm16, OpusDecoder, AudioClip, VOICE_SAMPLE_RATE, resample_audio
+from denoise import denoise_pcm48k, StreamDenoiser, RNNOISE_SAMPLE_RATE
+from vad import speech_segments
+from voice_cache import VoiceConditioningCache
+from tts_stream import split_sentences, pcm16_bytes, wav_header
+from tts_cache import TTSOutputCache
+from retention import sweep_folder
+from functools import lru_cache
+from model_registry import ModelRegistry, READY, FAILED
+from model_server import ModelServer
+from chunked_upload import ChunkedUpload, UploadOffsetError
+from scheduler import AdmissionQueue, PRIORITY_INTERACTIVE, PRIORITY_SHORT, PRIORITY_BULK
+from metrics import REGISTRY, SamplingProfiler, timing
+import asr_engine
+import tts_engine
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Serving limits; HTTP keepalive and the connection cap apply to the eventlet server
+SERVER_HOST = os.environ.get("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.environ.get("SERVER_PORT", 5000))
+SERVER_MAX_CONNECTIONS = int(os.environ.get("SERVER_MAX_CONNECTIONS", 4096))
+HTTP_KEEPALIVE = os.environ.get("HTTP_KEEPALIVE", "true").lower() == "true"
+SOCKET_PING_INTERVAL = float(os.environ.get("SOCKET_PING_INTERVAL", 25))  # Socket.IO keepalive
+SOCKET_PING_TIMEOUT = float(os.environ.get("SOCKET_PING_TIMEOUT", 20))
+MAX_MESSAGE_BYTES = int(os.environ.get("MAX_MESSAGE_BYTES", 16 * 1024 * 1024))  # Largest socket message
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", 100 * 1024 * 1024))  # Largest HTTP request body
+OFFLOAD_THREADS = int(os.environ.get("OFFLOAD_THREADS", 16))  # OS threads running model and DSP work under eventlet
+
 app = Flask(__name__)
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES
+# With a message queue (e.g. redis://...), any server process can emit to clients connected to another
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=SERVER_MODE,
+                    message_queue=os.environ.get("SOCKETIO_MESSAGE_QUEUE"),
+                    ping_interval=SOCKET_PING_INTERVAL, ping_timeout=SOCKET_PING_TIMEOUT,
+                    max_http_buffer_size=MAX_MESSAGE_BYTES)
+
+if SERVER_MODE == "eventlet":
+    from eventlet import tpool
+    tpool.set_num_threads(OFFLOAD_THREADS)
+    # Offloaded work logs from OS threads, and an OS thread waiting on a green lock is never woken by the hub.
+    # Logging's locks are only held while writing a record, so real ones cost the hub next to nothing.
+    os_rlock = eventlet.patcher.original("threading").RLock
+    logging._lock = os_rlock()
+    logging.Handler.createLock = lambda handler: setattr(handler, "lock", os_rlock())
+    for handler in logging.root.handlers:
+        handler.createLock()
+
+def offload(fn, *args, **kwargs):
+    """Run blocking model or DSP work on an OS thread under eventlet, so socket I/O keeps flowing"""
+    if SERVER_MODE == "eventlet":
+        return tpool.execute(fn, *args, **kwargs)
+    return fn(*args, **kwargs)
 
 # Configuration
-UPLOAD_FOLDER = "uploads"
-RESPONSES_FOLDER = "responses"
-TRANSCRIPTIONS_FOLDER = "transcriptions"
-TTS_OUTPUT_FOLDER = "tts_output"
-MODEL_CACHE = "model_cache"
-PREDICTION_QUEUE = queue.Queue()
+# Runtime state goes under DATA_DIR, next to this file by default. Paths are absolute because
+# send_file resolves relative ones against the app's root rather than the working directory.
+DATA_DIR = os.path.abspath(os.environ.get("DATA_DIR", os.path.dirname(os.path.abspath(__file__))))
+UPLOAD_FOLDER = os.path.join(DATA_DIR, "uploads")
+RESPONSES_FOLDER = os.path.join(DATA_DIR, "responses")  # Legacy JSON results, imported at startup; see migrate_results.py
+TRANSCRIPTIONS_FOLDER = os.path.join(DATA_DIR, "transcriptions")
+TTS_OUTPUT_FOLDER = os.path.join(DATA_DIR, "tts_output")
+MODEL_CACHE = os.path.join(DATA_DIR, "model_cache")
+SESSION_INDEX_PATH = os.path.join(DATA_DIR, "sessions.db")
+SESSION_CACHE_SIZE = int(os.environ.get("SESSION_CACHE_SIZE", 1024))
+RESULT_RETENTION_DAYS = float(os.environ.get("RESULT_RETENTION_DAYS", 30))  # 0 keeps results forever
+RESULT_STORE_MAX_BYTES = int(os.environ.get("RESULT_STORE_MAX_BYTES", 512 * 1024 * 1024))  # Compressed results kept; 0 is unbounded
+UPLOAD_RETENTION_DAYS = float(os.environ.get("UPLOAD_RETENTION_DAYS", 7))  # Age at which persisted uploads are deleted
+ORPHAN_FILE_SECONDS = float(os.environ.get("ORPHAN_FILE_SECONDS", 3600))  # Age at which leftover spool and temp files are deleted
+STORAGE_SWEEP_SECONDS = float(os.environ.get("STORAGE_SWEEP_SECONDS", 600))  # Interval of retention and compaction; 0 disables
+# Names of the audio files the server writes to UPLOAD_FOLDER; only these are ever swept from it
+UPLOAD_FILE_PATTERNS = ("*_upload.*", "*_chunk_*", "*_websocket_chunk*")
+PREDICTION_QUEUE_SIZE = int(os.environ.get("PREDICTION_QUEUE_SIZE", 64))
+ADMISSION_MAX_WAIT_SECONDS = float(os.environ.get("ADMISSION_MAX_WAIT_SECONDS", 120))  # Refuse uploads expected to wait longer
+ADMISSION_MAX_PER_CLIENT = int(os.environ.get("ADMISSION_MAX_PER_CLIENT", 4))  # Queued uploads per socket or address
+SHORT_UPLOAD_BYTES = int(os.environ.get("SHORT_UPLOAD_BYTES", 512 * 1024))  # Larger uploads are queued as bulk
+SOCKET_BROADCAST = os.environ.get("SOCKET_BROADCAST", "false").lower() == "true"  # Send session events to every client, as before rooms
+DISCONNECT_GRACE_SECONDS = float(os.environ.get("DISCONNECT_GRACE_SECONDS", 30))  # Time to reconnect before queued work is dropped
+# Bounded and prioritized: live streams first, then short uploads, then bulk uploads
+PREDICTION_QUEUE = AdmissionQueue(
+    PREDICTION_QUEUE_SIZE,
+    max_wait_seconds=ADMISSION_MAX_WAIT_SECONDS,
+    max_per_client=ADMISSION_MAX_PER_CLIENT,
+    on_drop=lambda item: drop_stale_item(item)
+)
+ASR_MAX_BATCH_SIZE = int(os.environ.get("ASR_MAX_BATCH_SIZE", 8))
+ASR_MAX_BATCH_WAIT_MS = float(os.environ.get("ASR_MAX_BATCH_WAIT_MS", 50))
+PIPELINE_QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", 32))
+DECODE_WORKERS = int(os.environ.get("DECODE_WORKERS", 2))
+DENOISE_WORKERS = int(os.environ.get("DENOISE_WORKERS", 1))
+ASR_WORKERS = int(os.environ.get("ASR_WORKERS", 1))
+TTS_WORKERS = int(os.environ.get("TTS_WORKERS", 1))
+STREAM_CHUNK_SECONDS = float(os.environ.get("STREAM_CHUNK_SECONDS", 2.0))
+STREAM_LEFT_CONTEXT_SECONDS = float(os.environ.get("STREAM_LEFT_CONTEXT_SECONDS", 1.5))
+STREAM_RIGHT_CONTEXT_SECONDS = float(os.environ.get("STREAM_RIGHT_CONTEXT_SECONDS", 0.5))
+STREAM_SESSION_TIMEOUT = float(os.environ.get("STREAM_SESSION_TIMEOUT", 300))
+PERSIST_UPLOADS = os.environ.get("PERSIST_UPLOADS", "false").lower() == "true"
+MAX_CHUNKED_UPLOADS = int(os.environ.get("MAX_CHUNKED_UPLOADS", 32))  # Resumable uploads open at once
+CHUNKED_UPLOAD_TIMEOUT = float(os.environ.get("CHUNKED_UPLOAD_TIMEOUT", STREAM_SESSION_TIMEOUT))  # Idle time before an unfinished upload is dropped
+CHUNK_SIZE_HINT = int(os.environ.get("CHUNK_SIZE_HINT", 256 * 1024))  # Chunk size suggested to clients
+VOICE_SAMPLE_MAX_SECONDS = float(os.environ.get("VOICE_SAMPLE_MAX_SECONDS", 30))
+VOICE_CACHE_SIZE = int(os.environ.get("VOICE_CACHE_SIZE", 256))
+VOICE_CACHE_DIR = os.environ.get("VOICE_CACHE_DIR")  # Unset keeps voice latents in memory only
+TTS_LANGUAGE = os.environ.get("TTS_LANGUAGE", "en")
+TTS_STREAMING = os.environ.get("TTS_STREAMING", "true").lower() == "true"
+TTS_SENTENCE_MAX_CHARS = int(os.environ.get("TTS_SENTENCE_MAX_CHARS", 250))
+TTS_MODEL_NAME = "tts_models/multilingual/multi-dataset/xtts_v2"
+TTS_CACHE_MAX_BYTES = int(os.environ.get("TTS_CACHE_MAX_BYTES", 1024 * 1024 * 1024))
+MODEL_WAIT_TIMEOUT = float(os.environ.get("MODEL_WAIT_TIMEOUT", 600))  # How long queued work waits for a model
+# Model-server mode: ASR and TTS run in worker processes, each with its own model copy
+MODEL_SERVER_MODE = os.environ.get("MODEL_SERVER_MODE", "false").lower() == "true"
+ASR_PROCESSES = int(os.environ.get("ASR_PROCESSES", 2))
+TTS_PROCESSES = int(os.environ.get("TTS_PROCESSES", 1))
+WORKER_TORCH_THREADS = int(os.environ.get("WORKER_TORCH_THREADS", 1))
+MODEL_SERVER_TIMEOUT = float(os.environ.get("MODEL_SERVER_TIMEOUT", 300))  # Seconds before a worker's task is abandoned and the worker replaced
+MODEL_WORKER_RESTARTS = int(os.environ.get("MODEL_WORKER_RESTARTS", 3))  # Replacements in a row, without a task completing, before a model is marked failed
+# ASR passes run at once for the pipeline and chunked uploads together; with worker processes, one per process
+ASR_CONCURRENCY = max(ASR_WORKERS, ASR_PROCESSES if MODEL_SERVER_MODE else 0)
+VAD_ENABLED = os.environ.get("VAD_ENABLED", "true").lower() == "true"
+VAD_MAX_SEGMENT_SECONDS = float(os.environ.get("VAD_MAX_SEGMENT_SECONDS", 30))
+VAD_MIN_SILENCE_MS = float(os.environ.get("VAD_MIN_SILENCE_MS", 300))
+ASR_SEGMENT_BATCH_SIZE = int(os.environ.get("ASR_SEGMENT_BATCH_SIZE", 8))
+ASR_BACKEND = os.environ.get("ASR_BACKEND", "torch")  # torch, int8 (dynamic quantization) or onnx
+TORCH_THREADS = int(os.environ.get("TORCH_THREADS", 0))  # Intra-op threads in this process; 0 keeps torch's default
+PROFILER_SAMPLE_HZ = float(os.environ.get("PROFILER_SAMPLE_HZ", 0))  # Stack samples per second of pipeline threads; 0 disables
+
+if TORCH_THREADS:
+    torch.set_num_threads(TORCH_THREADS)
 
 # Update CORS configuration
 CORS(app)
 
 # Ensure necessary folders exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(RESPONSES_FOLDER, exist_ok=True)
-os.makedirs(TRANSCRIPTIONS_FOLDER, exist_ok=True)
 os.makedirs(TTS_OUTPUT_FOLDER, exist_ok=True)
 os.makedirs(MODEL_CACHE, exist_ok=True)
 
+# Finished sessions and transcriptions; the only place results are written
+SESSION_STORE = SessionStore(SESSION_INDEX_PATH, cache_size=SESSION_CACHE_SIZE)
+# Results from before the store still answer lookups until migrate_results.py moves them in
+SESSION_STORE.rebuild(RESPONSES_FOLDER, TRANSCRIPTIONS_FOLDER)
+
+# XTTS speaker conditioning, so a returning voice skips the speaker encoder
+VOICE_CACHE = VoiceConditioningCache(VOICE_CACHE_SIZE, persist_dir=VOICE_CACHE_DIR)
+
+# Synthesized speech, addressed by text, voice and model so repeats are served from disk
+TTS_CACHE = TTSOutputCache(TTS_OUTPUT_FOLDER, TTS_CACHE_MAX_BYTES)
+
+# Seconds per processing step, labelled by step; /metrics exposes them with the pipeline's own metrics
+STEP_SECONDS = REGISTRY.histogram("whisper_step_seconds", "Time spent in one processing step", ("step",))
+
+def observe_timings(timings):
+    """Record a timings dict filled in by the decode, denoise and ASR helpers"""
+    for step, seconds in timings.items():
+        STEP_SECONDS.observe(seconds, step)
+
 # Global model cache
 asr_model = None
 asr_processor = None
 tts_model = None
 noise_reduction_model = None
 
-def load_models():
-    """Load ASR and TTS models"""
-    global asr_model, asr_processor, tts_model, noise_reduction_model
-    
+def load_noise_model():
+    """Load RNNoise"""
+    global noise_reduction_model
+    logger.info("Loading RNNoise model...")
     try:
-        logger.info("Loading RNNoise model...")
-        try:
-            # Import here to avoid loading unless necessary
-            import rnnoiseasm
-            noise_reduction_model = rnnoiseasm.RNNoiseProcessor()
-            logger.info("RNNoise model loaded successfully")
-        except ImportError:
-            logger.warning("RNNoise package not installed. Noise reduction will be disabled.")
-            noise_reduction_model = None
-        
-        logger.info("Loading Parakeet ASR model...")
-        # Import and load ASR model
-        try:
-            from transformers import AutoModelForCTC, AutoProcessor
-            asr_processor = AutoProcessor.from_pretrained("nvidia/parakeet-ctc-0.6b-asr", cache_dir=MODEL_CACHE)
-            asr_model = AutoModelForCTC.from_pretrained("nvidia/parakeet-ctc-0.6b-asr", cache_dir=MODEL_CACHE)
-            logger.info("ASR model loaded successfully")
-        except Exception as e:
-            logger.error(f"Failed to load ASR model: {e}")
-            asr_model = None
-            asr_processor = None
+        # Import here to avoid loading unless necessary
+        import rnnoiseasm
+    except ImportError:
+        raise RuntimeError("RNNoise package not installed. Noise reduction will be disabled.")
+    noise_reduction_model = rnnoiseasm.RNNoiseProcessor()
+
+def load_asr_model():
+    """Load the Parakeet ASR model and its processor"""
+    global asr_model, asr_processor
+    logger.info(f"Loading Parakeet ASR model ({ASR_BACKEND} backend)...")
+    asr_processor, asr_model = asr_engine.load(MODEL_CACHE, backend=ASR_BACKEND)
+
+def load_tts_model():
+    """Load the XTTS model - this can take a while"""
+    global tts_model
+    logger.info("Loading XTTS model...")
+    tts_model = tts_engine.load_tts(TTS_MODEL_NAME, gpu=torch.cuda.is_available())
+
+def start_asr_server():
+    """Start the ASR worker processes; this process keeps only the processor, for decoding stream ids"""
+    global asr_processor
+    logger.info(f"Starting {ASR_PROCESSES} ASR worker process(es)...")
+    asr_processor = asr_engine.load_processor(MODEL_CACHE)
+    ASR_SERVER.start()
+
+def warmup_noise_model():
+    """Denoise a tenth of a second of silence through the same path as requests"""
+    denoise_pcm48k(AudioClip(np.zeros(1600, dtype=np.float32), 16000).pcm_48k(), new_noise_processor())
+
+def warmup_asr_model():
+    """Transcribe a second of silence, so the first request skips lazy initialization"""
+    asr_engine.warmup((asr_processor, asr_model))
+
+def warmup_tts_model():
+    """Condition on a second of faint noise and synthesize one word"""
+    tts_engine.warmup_tts(tts_model, TTS_LANGUAGE)
+
+ASR_SERVER = None
+TTS_SERVER = None
+if MODEL_SERVER_MODE:
+    ASR_SERVER = ModelServer("asr", "asr_engine", processes=ASR_PROCESSES, torch_threads=WORKER_TORCH_THREADS,
+                             load_kwargs={"cache_dir": os.path.abspath(MODEL_CACHE), "backend": ASR_BACKEND},
+                             max_restarts=MODEL_WORKER_RESTARTS, on_failed=lambda error: MODELS.fail("asr", error))
+    TTS_SERVER = ModelServer("tts", "tts_engine", processes=TTS_PROCESSES, torch_threads=WORKER_TORCH_THREADS,
+                             max_restarts=MODEL_WORKER_RESTARTS, on_failed=lambda error: MODELS.fail("tts", error),
+                             load_kwargs={
+                                 "model_name": TTS_MODEL_NAME,
+                                 "language": TTS_LANGUAGE,
+                                 "gpu": torch.cuda.is_available(),
+                                 "voice_cache_size": VOICE_CACHE_SIZE,
+                                 "voice_cache_dir": os.path.abspath(VOICE_CACHE_DIR) if VOICE_CACHE_DIR else None
+                             })
+
+# Every model loads and warms up on its own thread; MODELS.start() runs once the module is set up
+MODELS = ModelRegistry()
+MODELS.register("noise_reduction", load_noise_model, lambda: offload(warmup_noise_model))
+if MODEL_SERVER_MODE:
+    # Workers warm themselves up before reporting ready
+    MODELS.register("asr", start_asr_server)
+    MODELS.register("tts", TTS_SERVER.start)
+else:
+    MODELS.register("asr", lambda: offload(load_asr_model), lambda: offload(warmup_asr_model))
+    MODELS.register("tts", lambda: offload(load_tts_model), lambda: offload(warmup_tts_model))
+
+def new_noise_processor():
+    """Fresh RNNoise state, so sessions never share the recurrent state"""
+    return type(noise_reduction_model)()
+
+def process_audio(clip, timings=None):
+    """Denoise a clip with RNNoise and return the 16 kHz mono ASR input, memoized on the clip"""
+    def compute():
+        if noise_reduction_model is None:
+            logger.warning("RNNoise model not loaded, skipping noise reduction")
+            return clip.mono_16k(timings)
         
-        logger.info("Loading XTTS model...")
-        # Import and load TTS model - this can take a while
         try:
-            from TTS.api import TTS
-            tts_model = TTS("tts_models/multilingual/multi-dataset/xtts_v2", gpu=torch.cuda.is_available())
-            logger.info("TTS model loaded successfully")
+            # RNNoise takes 48 kHz int16, made straight from the source rate, so there is one resample each way
+            denoised = denoise_pcm48k(clip.pcm_48k(timings), new_noise_processor(), timings=timings)
+            with timing(timings, "resample"):
+                return resample_audio(denoised, RNNOISE_SAMPLE_RATE, 16000)
         except Exception as e:
-            logger.error(f"Failed to load TTS model: {e}")
-            tts_model = None
-        
-        return True
-    except Exception as e:
-        logger.error(f"Error loading models: {e}")
-        return False
+            logger.error(f"Error in noise reduction: {e}")
+            return clip.mono_16k(timings)  # Fall back to the raw audio if processing fails
+        finally:
+            clip.release("pcm_48k")
+    return clip.derived("asr_input", compute)
 
-# Start loading models in a background thread
-model_loading_thread = threading.Thread(target=load_models, daemon=True)
-model_loading_thread.start()
+def persist_upload(filename, audio_bytes):
+    """Keep a copy of received audio on disk when PERSIST_UPLOADS is enabled"""
+    if not PERSIST_UPLOADS:
+        return None
+    
+    filepath = os.path.join(UPLOAD_FOLDER, filename)
+    with open(filepath, 'wb') as f:
+        f.write(audio_bytes)
+    logger.info(f"File saved: {filepath}")
+    return filepath
 
-def resample_audio(audio_data, orig_sample_rate, target_sample_rate=48000):
-    """Resample audio to target sample rate"""
-    try:
-        import librosa
-        resampled_audio = librosa.resample(
-            audio_data, 
-            orig_sr=orig_sample_rate, 
-            target_sr=target_sample_rate
-        )
-        return resampled_audio, target_sample_rate
-    except Exception as e:
-        logger.error(f"Error resampling audio: {e}")
-        return audio_data, orig_sample_rate
+def save_transcription(transcription, audio_duration, processing_time, segments=None):
+    """Write a transcription to the session store"""
+    # Generate timestamp
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    transcription_id = f"{timestamp}_{uuid.uuid4().hex[:8]}"
+    
+    # Save transcription
+    transcription_data = {
+        "language": "en",  # Could be detected or provided by model
+        "language_probability": 1.0,
+        "duration": audio_duration,
+        "segments": segments if segments is not None else [
+            {
+                "start": 0.0,
+                "end": audio_duration,
+                "text": transcription
+            }
+        ],
+        "full_text": transcription,
+        "processing_time": processing_time,
+        "session_id": transcription_id  # Store session ID for lookup
+    }
+    
+    SESSION_STORE.put(transcription_id, transcription_data)
+    
+    return {
+        "transcription": transcription,
+        "transcription_id": transcription_id,
+        "duration": audio_duration,
+        "processing_time": processing_time
+    }
 
-def process_audio(audio_data, sample_rate=16000):
-    """Process audio with RNNoise for noise reduction"""
-    if noise_reduction_model is None:
-        logger.warning("RNNoise model not loaded, skipping noise reduction")
-        return audio_data
-        
+def transcribe_segments(chunks, sample_rate=16000, timings=None):
+    """Texts for many audio segments, batched by similar length to keep padding down
+
+    In model-server mode the batches go out together, so every ASR worker process takes a share.
+    """
+    order = sorted(range(len(chunks)), key=lambda i: len(chunks[i]))
+    batches = [order[i:i + ASR_SEGMENT_BATCH_SIZE] for i in range(0, len(order), ASR_SEGMENT_BATCH_SIZE)]
+    
+    if ASR_SERVER is not None:
+        futures = [
+            ASR_SERVER.submit("transcribe", {"audio_arrays": [chunks[i] for i in batch], "sample_rate": sample_rate})
+            for batch in batches
+        ]
+        with timing(timings, "asr_remote"):
+            outputs = [ASR_SERVER.result(future, MODEL_SERVER_TIMEOUT) for future in futures]
+    else:
+        outputs = (offload(asr_engine.transcribe, asr_processor, asr_model, [chunks[i] for i in batch], sample_rate, timings)
+                   for batch in batches)
+    
+    texts = [""] * len(chunks)
+    for batch, batch_texts in zip(batches, outputs):
+        for i, text in zip(batch, batch_texts):
+            texts[i] = text
+    return texts
+
+def transcribe_arrays(audio_arrays, sample_rate=16000):
+    """Transcribe several decoded clips, each split at pauses into capped speech segments, in batched ASR passes"""
+    start_time = time.time()
+    
+    if ASR_SERVER is None and (asr_model is None or asr_processor is None):
+        return [{"error": "ASR model not loaded"} for _ in audio_arrays]
+    
+    # Speech segments of every clip together, so short and long clips share batches and silence is skipped
+    def find_segments():
+        segments = []
+        for clip_index, audio_array in enumerate(audio_arrays):
+            if VAD_ENABLED:
+                bounds = speech_segments(audio_array, sample_rate, min_silence_ms=VAD_MIN_SILENCE_MS,
+                                         max_segment_seconds=VAD_MAX_SEGMENT_SECONDS)
+            else:
+                bounds = [(0, len(audio_array))] if len(audio_array) else []
+            segments.extend((clip_index, start, end) for start, end in bounds)
+        return segments
+    
+    timings = {}
+    with timing(timings, "vad"):
+        segments = offload(find_segments)
+    
     try:
-        # RNNoise expects 16-bit PCM at 48kHz
-        if sample_rate != 48000:
-            audio_data, sample_rate = resample_audio(audio_data, sample_rate, 48000)
-        
-        # Convert float audio to int16 PCM
-        audio_pcm = (audio_data * 32767).astype(np.int16)
-        
-        # Process the audio for noise reduction
-        denoised_pcm = noise_reduction_model.process_frame(audio_pcm)
-        
-        # Convert back to float
-        denoised_audio = denoised_pcm.astype(np.float32) / 32767.0
-        
-        return denoised_audio
+        texts = transcribe_segments([audio_arrays[c][start:end] for c, start, end in segments], sample_rate, timings)
     except Exception as e:
-        logger.error(f"Error in noise reduction: {e}")
-        return audio_data  # Return original audio if processing fails
+        logger.error(f"Transcription error: {e}")
+        return [{"error": f"Failed to transcribe audio: {str(e)}"} for _ in audio_arrays]
+    finally:
+        observe_timings(timings)
+    
+    # Every item in the batch waited for the same forward passes
+    processing_time = time.time() - start_time
+    
+    clip_segments = [[] for _ in audio_arrays]
+    for (clip_index, start, end), text in zip(segments, texts):
+        if text.strip():
+            clip_segments[clip_index].append({
+                "start": round(start / sample_rate, 2),
+                "end": round(end / sample_rate, 2),
+                "text": text.strip()
+            })
+    
+    results = []
+    for audio_array, clip_segment_list in zip(audio_arrays, clip_segments):
+        try:
+            transcription = " ".join(segment["text"] for segment in clip_segment_list)
+            result = save_transcription(transcription, len(audio_array) / sample_rate, processing_time,
+                                        segments=clip_segment_list)
+            result["batch_size"] = len(audio_arrays)
+            result["segment_count"] = len(clip_segment_list)
+        except Exception as e:
+            logger.error(f"Transcription error: {e}")
+            result = {"error": f"Failed to transcribe audio: {str(e)}"}
+        results.append(result)
+    
+    return results
+
+def transcribe_batch(audio_paths):
+    """Decode, denoise and transcribe several audio files in one ASR pass"""
+    results = [None] * len(audio_paths)
+    indices = []
+    audio_arrays = []
+    
+    for i, audio_path in enumerate(audio_paths):
+        try:
+            clip = AudioClip.from_file(audio_path)
+            indices.append(i)
+            audio_arrays.append(process_audio(clip))
+        except Exception as e:
+            logger.error(f"Transcription error: {e}")
+            results[i] = {"error": f"Failed to transcribe audio: {str(e)}"}
+    
+    if audio_arrays:
+        for i, result in zip(indices, transcribe_arrays(audio_arrays)):
+            results[i] = result
+    
+    return results
 
 def transcribe_audio(audio_path):
     """Transcribe audio using Parakeet ASR model"""
+    return transcribe_batch([audio_path])[0]
+
+def xtts_model():
+    """The underlying XTTS model if the loaded TTS model accepts precomputed speaker latents"""
+    return tts_engine.xtts_of(tts_model)
+
+def get_speaker_latents(clip, user_id=None, timings=None):
+    """XTTS conditioning latents for the voice in a clip, computed once per user or reference clip
+
+    Returns (latents, cache_hit); latents is None if the TTS model cannot take them.
+    """
+    xtts = xtts_model()
+    if xtts is None:
+        return None, False
+    
+    voice_audio = offload(clip.voice_reference, VOICE_SAMPLE_MAX_SECONDS, timings)
+    fingerprint = VOICE_CACHE.fingerprint(voice_audio)
+    latents = VOICE_CACHE.get(user_id=user_id, fingerprint=fingerprint)
+    if latents is not None:
+        return latents, True
+    
+    latents = offload(tts_engine.conditioning_latents, xtts, voice_audio, VOICE_SAMPLE_RATE,
+                      voice_path=clip.voice_reference_path(VOICE_SAMPLE_MAX_SECONDS, timings))
+    VOICE_CACHE.put(latents, user_id=user_id, fingerprint=fingerprint)
+    return latents, False
+
+@lru_cache(maxsize=None)
+def tts_model_id():
+    """Model name and TTS package version, so a model upgrade never serves stale cached audio"""
+    try:
+        from importlib.metadata import version
+        tts_version = version("TTS")
+    except Exception:
+        tts_version = "unknown"
+    return f"{TTS_MODEL_NAME}@{tts_version}"
+
+def tts_cache_key(text, voice_sample=None, speaker_latents=None):
+    """TTS cache key from the normalized text, the voice's identity and the model version"""
+    if speaker_latents is not None:
+        voice_id = VoiceConditioningCache.latents_id(speaker_latents)
+    elif voice_sample and os.path.exists(voice_sample):
+        with open(voice_sample, 'rb') as f:
+            voice_id = "wav:" + hashlib.sha1(f.read()).hexdigest()
+    else:
+        voice_id = "default"
+    return TTSOutputCache.key(text, voice_id, f"{tts_model_id()}:{TTS_LANGUAGE}")
+
+def generate_tts(text, voice_sample=None, speaker_latents=None):
+    """Generate TTS using the provided text and optional voice sample or cached speaker latents for cloning"""
     start_time = time.time()
     
-    if asr_model is None or asr_processor is None:
-        return {"error": "ASR model not loaded"}
+    if tts_model is None:
+        return {"error": "TTS model not loaded"}
+    
+    if not text or text.strip() == "":
+        return {"error": "Empty text provided for TTS"}
     
     try:
-        import librosa
-        
-        # Load audio file
-        audio_array, sample_rate = librosa.load(audio_path, sr=16000)
-        
-        # Apply noise reduction
-        audio_array = process_audio(audio_array, sample_rate)
-        
-        # Process with ASR - using the global processor
-        input_features = asr_processor(audio_array, sampling_rate=sample_rate, return_tensors="pt").input_features
-        
-        # Get prediction
-        with torch.no_grad():
-            predicted_ids = asr_model.generate(input_features)
-        
-        # Decode prediction
-        transcription = asr_processor.batch_decode(predicted_ids, skip_special_tokens=True)[0]
+        # Identical text in the same voice is served from the cache
+        cache_key = tts_cache_key(text, voice_sample, speaker_latents)
+        cached_filename = TTS_CACHE.get(cache_key)
+        if cached_filename is not None:
+            return {
+                "tts_audio": cached_filename,
+                "tts_time": time.time() - start_time,
+                "tts_cache": "hit"
+            }
         
-        # Get additional info
-        audio_duration = len(audio_array) / sample_rate
+        output_path = TTS_CACHE.temp_path(cache_key)
         
-        # Generate timestamp
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        transcription_id = f"{timestamp}_{uuid.uuid4().hex[:8]}"
+        def synthesize():
+            if speaker_latents is not None:
+                # Precomputed conditioning skips the speaker encoder entirely
+                xtts = xtts_model()
+                gpt_cond_latent, speaker_embedding = speaker_latents
+                output = xtts.inference(text, TTS_LANGUAGE, gpt_cond_latent, speaker_embedding)
+                sf.write(output_path, np.asarray(output["wav"]), xtts.config.audio.output_sample_rate, format='WAV')
+            elif voice_sample and os.path.exists(voice_sample):
+                # Use voice sample for cloning if provided
+                tts_model.tts_to_file(text, speaker_wav=voice_sample, file_path=output_path)
+            else:
+                # Use default voice if no sample is provided
+                tts_model.tts_to_file(text, file_path=output_path)
         
-        # Calculate processing time
+        try:
+            offload(synthesize)
+            output_filename = TTS_CACHE.add(cache_key, output_path)
+        finally:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            
         processing_time = time.time() - start_time
         
-        # Save transcription
-        transcription_data = {
-            "language": "en",  # Could be detected or provided by model
-            "language_probability": 1.0,
-            "duration": audio_duration,
-            "segments": [
-                {
-                    "start": 0.0,
-                    "end": audio_duration,
-                    "text": transcription
-                }
-            ],
-            "full_text": transcription,
-            "processing_time": processing_time,
-            "session_id": transcription_id  # Store session ID for lookup
-        }
-        
-        transcription_path = os.path.join(TRANSCRIPTIONS_FOLDER, f"transcription_{transcription_id}.json")
-        with open(transcription_path, 'w') as f:
-            json.dump(transcription_data, f, indent=2)
-            
         return {
-            "transcription": transcription,
-            "transcription_id": transcription_id,
-            "duration": audio_duration,
-            "processing_time": processing_time
+            "tts_audio": output_filename,
+            "tts_time": processing_time,
+            "tts_cache": "miss"
         }
         
     except Exception as e:
-        logger.error(f"Transcription error: {e}")
-        return {"error": f"Failed to transcribe audio: {str(e)}"}
+        logger.error(f"TTS generation error: {e}")
+        return {"error": f"Failed to generate speech: {str(e)}"}
+
+def tts_output_sample_rate():
+    """Sample rate of the audio the loaded TTS model produces"""
+    return tts_engine.output_sample_rate(tts_model)
 
-def generate_tts(text, voice_sample=None):
-    """Generate TTS using the provided text and optional voice sample for cloning"""
+def stream_tts(text, output_path, voice_sample=None, speaker_latents=None):
+    """Synthesize text sentence by sentence, yielding (sentence, PCM16 bytes, sample rate) as each is ready
+
+    Once every sentence is out, the assembled audio is written to output_path for replay.
+    """
+    sample_rate = tts_output_sample_rate()
+    chunks = []
+    for sentence in split_sentences(text, TTS_SENTENCE_MAX_CHARS):
+        wav = offload(tts_engine.synthesize_sentence, tts_model, sentence, TTS_LANGUAGE, speaker_latents, voice_sample)
+        pcm = pcm16_bytes(wav)
+        chunks.append(pcm)
+        yield sentence, pcm, sample_rate
+    
+    with open(output_path, 'wb') as f:
+        f.write(wav_header(sample_rate, sum(len(chunk) for chunk in chunks)))
+        for chunk in chunks:
+            f.write(chunk)
+
+def generate_tts_stream(text, voice_sample=None, speaker_latents=None, on_chunk=None):
+    """Like generate_tts, but hands each sentence's audio to on_chunk(index, sentence, pcm, sample_rate) as soon as it exists"""
     start_time = time.time()
     
     if tts_model is None:
@@ -211,105 +567,646 @@ def generate_tts(text, voice_sample=None):
         return {"error": "Empty text provided for TTS"}
     
     try:
-        # Generate a unique ID for the output file
-        output_filename = f"tts_{uuid.uuid4()}.wav"
-        output_path = os.path.join(TTS_OUTPUT_FOLDER, output_filename)
+        # A cached file is complete already, so there is nothing to stream
+        cache_key = tts_cache_key(text, voice_sample, speaker_latents)
+        cached_filename = TTS_CACHE.get(cache_key)
+        if cached_filename is not None:
+            lookup_time = time.time() - start_time
+            return {
+                "tts_audio": cached_filename,
+                "tts_time": lookup_time,
+                "time_to_first_audio": lookup_time,
+                "tts_chunks": 0,
+                "tts_cache": "hit"
+            }
         
-        # Use voice sample for cloning if provided
-        if voice_sample and os.path.exists(voice_sample):
-            tts_model.tts_to_file(text, speaker_wav=voice_sample, file_path=output_path)
-        else:
-            # Use default voice if no sample is provided
-            tts_model.tts_to_file(text, file_path=output_path)
-            
-        processing_time = time.time() - start_time
+        output_path = TTS_CACHE.temp_path(cache_key)
+        time_to_first_audio = None
+        chunk_count = 0
+        try:
+            for sentence, pcm, sample_rate in stream_tts(text, output_path, voice_sample, speaker_latents):
+                if time_to_first_audio is None:
+                    time_to_first_audio = time.time() - start_time
+                if on_chunk is not None:
+                    on_chunk(chunk_count, sentence, pcm, sample_rate)
+                chunk_count += 1
+            output_filename = TTS_CACHE.add(cache_key, output_path)
+        finally:
+            if os.path.exists(output_path):
+                os.remove(output_path)
         
         return {
             "tts_audio": output_filename,
-            "tts_time": processing_time
+            "tts_time": time.time() - start_time,
+            "time_to_first_audio": time_to_first_audio,
+            "tts_chunks": chunk_count,
+            "tts_cache": "miss"
         }
         
     except Exception as e:
         logger.error(f"TTS generation error: {e}")
         return {"error": f"Failed to generate speech: {str(e)}"}
 
-def process_queue():
-    """Process items in the prediction queue"""
-    while True:
+def remote_tts_cache_key(text, voice_audio=None, user_id=None, voice_id=None):
+    """TTS cache key in model-server mode, where the voice is known by its audio or user rather than its latents"""
+    if voice_id is None:
+        if voice_audio is not None:
+            voice_id = f"audio:{VoiceConditioningCache.fingerprint(voice_audio)}"
+        elif user_id:
+            voice_id = f"user:{user_id}"
+    return TTSOutputCache.key(text, voice_id, f"{tts_model_id()}:{TTS_LANGUAGE}")
+
+def generate_tts_remote(text, voice_audio=None, sample_rate=16000, user_id=None, on_chunk=None):
+    """generate_tts_stream for model-server mode: voice conditioning and synthesis run in a TTS worker process"""
+    start_time = time.time()
+    
+    if not MODELS.is_ready("tts"):
+        return {"error": "TTS model not loaded"}
+    
+    if not text or text.strip() == "":
+        return {"error": "Empty text provided for TTS"}
+    
+    try:
+        cache_key = remote_tts_cache_key(text, voice_audio, user_id)
+        cached_filename = TTS_CACHE.get(cache_key)
+        if cached_filename is not None:
+            lookup_time = time.time() - start_time
+            return {
+                "tts_audio": cached_filename,
+                "tts_time": lookup_time,
+                "time_to_first_audio": lookup_time,
+                "tts_chunks": 0,
+                "tts_cache": "hit"
+            }
+        
+        first_audio = []
+        
+        def forward_chunk(message):
+            if not first_audio:
+                first_audio.append(time.time() - start_time)
+            on_chunk(*message)
+        
+        output_path = TTS_CACHE.temp_path(cache_key)
         try:
-            # Get an item from the queue (blocks until an item is available)
-            item = PREDICTION_QUEUE.get()
+            result = TTS_SERVER.call("synthesize", {
+                "text": text,
+                "voice_audio": voice_audio,
+                "sample_rate": sample_rate,
+                "user_id": user_id,
+                "output_path": os.path.abspath(output_path),
+                "max_chars": TTS_SENTENCE_MAX_CHARS,
+                "stream": on_chunk is not None
+            }, on_message=forward_chunk if on_chunk is not None else None, timeout=MODEL_SERVER_TIMEOUT)
+            # File the audio under the voice the worker actually used
+            voice_id = result.pop("voice_id")
+            cache_key = remote_tts_cache_key(text, voice_id=None if voice_id == "default" else voice_id)
+            output_filename = TTS_CACHE.add(cache_key, output_path)
+        finally:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+        
+        tts_time = time.time() - start_time
+        result.pop("sample_rate", None)
+        result.update({
+            "tts_audio": output_filename,
+            "tts_time": tts_time,
+            "time_to_first_audio": first_audio[0] if first_audio else tts_time,
+            "tts_cache": "miss"
+        })
+        return result
+        
+    except Exception as e:
+        logger.error(f"TTS generation error: {e}")
+        return {"error": f"Failed to generate speech: {str(e)}"}
+
+def store_response(item, response_data):
+    """Save a session response to the session store"""
+    with STEP_SECONDS.time("response_write"):
+        SESSION_STORE.put(item.get("session_id"), response_data)
+
+def emit_to_session(event, data):
+    """Emit a session event to the room of sockets subscribed to data["session_id"]"""
+    socketio.emit(event, data, to=None if SOCKET_BROADCAST else data["session_id"])
+
+def remove_audio_file(item):
+    """Remove the uploaded audio for an item once no stage needs it"""
+    audio_path = item.get("audio_path")
+    if audio_path and os.path.exists(audio_path):
+        os.remove(audio_path)
+        logger.info(f"Removed audio file: {audio_path}")
+
+def drop_stale_item(item):
+    """Clean up after a queued item that was cancelled because its client went away
+
+    The stored result says so, rather than staying pending for a client that comes back to poll.
+    """
+    logger.info(f"Dropped queued work for disconnected session {item.get('session_id')}")
+    try:
+        if "response" in item:
+            # Queued for TTS: the transcription stands, only the speech was cancelled
+            store_response(item, dict(item["response"], tts_status="cancelled"))
+        else:
+            store_response(item, {"error": "Cancelled because the client disconnected"})
+    finally:
+        remove_audio_file(item)
+
+def fail_session(item, error_result):
+    """Store and emit an error result for an item that cannot go further down the pipeline"""
+    session_id = item.get("session_id")
+    logger.error(f"Processing failed for session {session_id}: {error_result.get('error')}")
+    
+    try:
+        store_response(item, error_result)
+        emit_to_session('transcription_complete', {
+            "session_id": session_id,
+            "result": error_result
+        })
+    finally:
+        remove_audio_file(item)
+
+def decode_stage(batch):
+    """Pipeline stage: decode queued audio, from memory or from a file, into an AudioClip"""
+    outputs = []
+    for item in batch:
+        audio_bytes = item.pop("audio_bytes", None)
+        audio_path = item.get("audio_path")
+        if audio_bytes is None and (not audio_path or not os.path.exists(audio_path)):
+            logger.error(f"Invalid audio path: {audio_path}")
+            continue
+        
+        timings = {}
+        try:
+            # Decoded once at the source rate; later stages derive what they need from the clip
+            if audio_bytes is not None:
+                item["clip"] = offload(AudioClip.from_bytes, audio_bytes, timings)
+            else:
+                item["clip"] = offload(AudioClip.from_file, audio_path, timings)
+        except Exception as e:
+            fail_session(item, {"error": f"Failed to transcribe audio: {str(e)}"})
+            continue
+        finally:
+            observe_timings(timings)
+        
+        item["sample_rate"] = 16000
+        outputs.append(item)
+    return outputs
+
+def denoise_stage(batch):
+    """Pipeline stage: apply noise reduction"""
+    # Hold the batch until RNNoise has loaded or definitely failed
+    MODELS.wait("noise_reduction", MODEL_WAIT_TIMEOUT)
+    for item in batch:
+        timings = {}
+        item["audio"] = offload(process_audio, item["clip"], timings)
+        observe_timings(timings)
+    return batch
+
+def asr_stage(batch):
+    """Pipeline stage: transcribe a batch and emit each transcription as soon as it is ready"""
+    if not MODELS.wait("asr", MODEL_WAIT_TIMEOUT):
+        for item in batch:
+            fail_session(item, {"error": f"ASR model not available: {MODELS['asr'].error or 'still loading'}"})
+        return []
+    
+    logger.info(f"Transcribing batch of {len(batch)} audio file(s)")
+    with ASR_SLOTS:
+        transcription_results = transcribe_arrays(
+            [item.pop("audio") for item in batch],
+            batch[0]["sample_rate"]
+        )
+    # Only the head of each clip is needed from here on, for the TTS speaker reference
+    for item in batch:
+        item["clip"].trim(VOICE_SAMPLE_MAX_SECONDS)
+    
+    outputs = []
+    for item, transcription_result in zip(batch, transcription_results):
+        session_id = item.get("session_id")
+        
+        if "error" in transcription_result:
+            fail_session(item, transcription_result)
+            continue
+        
+        logger.info(f"Transcription successful: {transcription_result.get('transcription')}")
+        MODELS.milestone("first_transcription")
+        response_data = dict(transcription_result, tts_status="pending")
+        item["response"] = response_data
+        store_response(item, response_data)
+        
+        # Emit the text right away; TTS follows with its own event
+        logger.info(f"Emitting transcription_complete event for session: {session_id}")
+        emit_to_session('transcription_complete', {
+            "session_id": session_id,
+            "result": response_data
+        })
+        outputs.append(item)
+    return outputs
+
+def tts_stage(batch):
+    """Pipeline stage: synthesize the transcription and emit tts_complete"""
+    MODELS.wait("tts", MODEL_WAIT_TIMEOUT)
+    for item in batch:
+        session_id = item.get("session_id")
+        response_data = item["response"]
+        clip = item.pop("clip", None)
+        voice_sample = None
+        timings = {}
+        
+        try:
+            def emit_chunk(index, sentence, pcm, sample_rate):
+                emit_to_session('tts_chunk', {
+                    "session_id": session_id,
+                    "index": index,
+                    "text": sentence,
+                    "format": "pcm16",
+                    "sample_rate": sample_rate,
+                    "audio": pcm
+                })
             
-            audio_path = item.get("audio_path")
-            session_id = item.get("session_id")
+            speaker_latents = None
+            voice_cache_hit = False
+            conditioning_start = time.time()
+            # In model-server mode the TTS worker does its own voice conditioning
+            if clip is not None and TTS_SERVER is None:
+                try:
+                    speaker_latents, voice_cache_hit = get_speaker_latents(clip, user_id=item.get("user_id"), timings=timings)
+                except Exception as e:
+                    logger.warning(f"Voice conditioning failed, falling back to the raw sample: {e}")
+                if speaker_latents is None:
+                    # The same reference file the speaker encoder would have read
+                    voice_sample = offload(clip.voice_reference_path, VOICE_SAMPLE_MAX_SECONDS, timings)
+            conditioning_time = time.time() - conditioning_start
+            if clip is not None and TTS_SERVER is None:
+                STEP_SECONDS.observe(conditioning_time, "voice_conditioning")
             
-            if not audio_path or not os.path.exists(audio_path):
-                logger.error(f"Invalid audio path: {audio_path}")
-                PREDICTION_QUEUE.task_done()
-                continue
-                
-            response_data = {}
+            logger.info(f"Generating TTS for: {response_data.get('transcription')}")
+            if TTS_SERVER is not None:
+                tts_result = generate_tts_remote(
+                    response_data.get('transcription'),
+                    voice_audio=offload(clip.voice_reference, VOICE_SAMPLE_MAX_SECONDS, timings) if clip is not None else None,
+                    sample_rate=VOICE_SAMPLE_RATE,
+                    user_id=item.get("user_id"),
+                    on_chunk=emit_chunk if TTS_STREAMING else None
+                )
+            elif TTS_STREAMING:
+                tts_result = generate_tts_stream(
+                    response_data.get('transcription'),
+                    voice_sample=voice_sample,
+                    speaker_latents=speaker_latents,
+                    on_chunk=emit_chunk
+                )
+            else:
+                tts_result = generate_tts(
+                    response_data.get('transcription'),
+                    voice_sample=voice_sample,
+                    speaker_latents=speaker_latents
+                )
             
-            # First transcribe the audio
-            logger.info(f"Transcribing audio: {audio_path}")
-            transcription_result = transcribe_audio(audio_path)
+            if "tts_time" in tts_result:
+                STEP_SECONDS.observe(tts_result["tts_time"], "tts")
+            if "time_to_first_audio" in tts_result:
+                STEP_SECONDS.observe(tts_result["time_to_first_audio"], "tts_first_audio")
             
-            if "error" not in transcription_result:
-                logger.info(f"Transcription successful: {transcription_result.get('transcription')}")
-                response_data.update(transcription_result)
-                
-                # Then generate TTS from the transcription
-                logger.info(f"Generating TTS for: {transcription_result.get('transcription')}")
-                tts_result = generate_tts(transcription_result.get('transcription'), voice_sample=audio_path)
-                
-                if "error" not in tts_result:
-                    logger.info(f"TTS generation successful: {tts_result.get('tts_audio')}")
-                    response_data.update(tts_result)
-                    # Include URL for TTS audio
-                    response_data["tts_audio_url"] = f"/api/tts/{tts_result['tts_audio']}"
-                else:
-                    logger.error(f"TTS generation failed: {tts_result.get('error')}")
-                    response_data["tts_error"] = tts_result.get("error")
+            if "error" not in tts_result:
+                logger.info(f"TTS generation successful: {tts_result.get('tts_audio')}")
+                response_data.update(tts_result)
+                if speaker_latents is not None:
+                    response_data["voice_cache"] = "hit" if voice_cache_hit else "miss"
+                    response_data["voice_conditioning_time"] = conditioning_time
+                # Include URL for TTS audio
+                response_data["tts_audio_url"] = f"/api/tts/{tts_result['tts_audio']}"
+                response_data["tts_status"] = "complete"
             else:
-                logger.error(f"Transcription failed: {transcription_result.get('error')}")
-                response_data = transcription_result
-                
-            # Save response to file
-            filename = os.path.basename(audio_path)
-            response_file = os.path.join(RESPONSES_FOLDER, f"{filename}.json")
+                logger.error(f"TTS generation failed: {tts_result.get('error')}")
+                response_data["tts_error"] = tts_result.get("error")
+                response_data["tts_status"] = "error"
             
-            response_data_with_metadata = {
-                "timestamp": datetime.datetime.utcnow().isoformat(),
-                "filename": filename,
-                "status": "error" if "error" in response_data else "success",
-                "session_id": session_id,
-                "colab_response": response_data
-            }
+            store_response(item, response_data)
             
-            with open(response_file, 'w') as f:
-                json.dump(response_data_with_metadata, f, indent=2)
-                
-            # Emit result to connected clients via websocket
-            logger.info(f"Emitting transcription_complete event for session: {session_id}")
-            socketio.emit('transcription_complete', {
+            logger.info(f"Emitting tts_complete event for session: {session_id}")
+            emit_to_session('tts_complete', {
                 "session_id": session_id,
                 "result": response_data
             })
-            
-            # Remove the audio file if it exists
-            if os.path.exists(audio_path):
-                os.remove(audio_path)
-                logger.info(f"Removed audio file: {audio_path}")
-                
         except Exception as e:
-            logger.exception(f"Error processing queue item: {e}")
+            logger.exception(f"Error in TTS stage for session {session_id}: {e}")
         finally:
-            # Mark task as done even if there was an exception
-            PREDICTION_QUEUE.task_done()
-            
-# Start the processing thread
-processing_thread = threading.Thread(target=process_queue, daemon=True)
-processing_thread.start()
+            # The upload doubles as the voice sample, so it is only removed after TTS
+            if clip is not None:
+                clip.close()
+            observe_timings(timings)
+            remove_audio_file(item)
+    return []
+
+# Held for each ASR pass of the pipeline and of chunked uploads, so uploads do not add passes on top
+ASR_SLOTS = threading.BoundedSemaphore(ASR_CONCURRENCY)
+
+# Staged processing pipeline: decode -> denoise -> ASR -> TTS, each with its own workers
+PIPELINE = Pipeline([
+    Stage("decode", decode_stage, workers=DECODE_WORKERS, input_queue=PREDICTION_QUEUE),
+    # Later stages keep the priority order and can drop work for disconnected clients too
+    Stage("denoise", denoise_stage, workers=DENOISE_WORKERS,
+          input_queue=AdmissionQueue(PIPELINE_QUEUE_SIZE, on_drop=drop_stale_item)),
+    Stage("asr", asr_stage, workers=ASR_CONCURRENCY,
+          input_queue=AdmissionQueue(PIPELINE_QUEUE_SIZE, on_drop=drop_stale_item),
+          batch_size=ASR_MAX_BATCH_SIZE, batch_wait_ms=ASR_MAX_BATCH_WAIT_MS),
+    Stage("tts", tts_stage, workers=max(TTS_WORKERS, TTS_PROCESSES if MODEL_SERVER_MODE else 0),
+          input_queue=AdmissionQueue(PIPELINE_QUEUE_SIZE, on_drop=drop_stale_item)),
+], on_error=lambda item, e: fail_session(item, {"error": f"Failed to process audio: {str(e)}"}))
+PIPELINE.start()
+MODELS.start()
+
+# Gauges are read from the live pipeline at scrape time, so nothing on the hot path updates them
+REGISTRY.gauge("pipeline_queue_depth", "Items waiting in front of a stage", ("stage",),
+               callback=lambda: {(name,): size for name, size in PIPELINE.queue_sizes().items()})
+REGISTRY.gauge("pipeline_in_flight", "Items a stage is currently working on", ("stage",),
+               callback=lambda: {(name,): count for name, count in PIPELINE.in_flight().items()})
+REGISTRY.gauge("stream_sessions_active", "Streaming sessions still receiving audio",
+               callback=lambda: {(): len(STREAM_SESSIONS)})
+REGISTRY.gauge("chunked_uploads_active", "Resumable uploads not yet finalized",
+               callback=lambda: {(): len(CHUNKED_UPLOADS)})
+
+# Resumable uploads by upload id, decoded into a streaming session while their chunks arrive
+CHUNKED_UPLOADS = {}
+CHUNKED_UPLOADS_LOCK = threading.Lock()
+
+def maintain_storage():
+    """Apply result retention, compact the store and sweep files no session will read again"""
+    try:
+        SESSION_STORE.prune(RESULT_RETENTION_DAYS * 86400, RESULT_STORE_MAX_BYTES)
+        SESSION_STORE.compact()
+        with CHUNKED_UPLOADS_LOCK:
+            active_spools = {os.path.basename(upload.path) for upload in CHUNKED_UPLOADS.values()}
+        # Spool files of uploads that were never finalized, or left by a crash
+        sweep_folder(UPLOAD_FOLDER, ORPHAN_FILE_SECONDS, keep=active_spools, suffixes=(".part",))
+        # Persisted uploads and stream chunks, kept for a short while only without PERSIST_UPLOADS.
+        # Other files (e.g. sample audio put here by hand) are not the server's to delete.
+        sweep_folder(UPLOAD_FOLDER, UPLOAD_RETENTION_DAYS * 86400 if PERSIST_UPLOADS else ORPHAN_FILE_SECONDS,
+                     keep=active_spools, patterns=UPLOAD_FILE_PATTERNS)
+        TTS_CACHE.sweep(ORPHAN_FILE_SECONDS)
+    except Exception:
+        logger.exception("Storage maintenance failed")
+
+def storage_maintenance_loop():
+    while True:
+        maintain_storage()
+        time.sleep(STORAGE_SWEEP_SECONDS)
+
+if STORAGE_SWEEP_SECONDS > 0:
+    threading.Thread(target=storage_maintenance_loop, name="storage-maintenance", daemon=True).start()
+
+# Optional sampling profiler over the pipeline workers, read back from /debug/profile
+PROFILER = None
+if PROFILER_SAMPLE_HZ > 0:
+    PROFILER = SamplingProfiler(1.0 / PROFILER_SAMPLE_HZ, thread_prefixes=tuple(f"{stage.name}-" for stage in PIPELINE.stages))
+    PROFILER.start()
+
+# Incremental transcription state for sessions that are still streaming
+STREAM_SESSIONS = {}
+STREAM_SESSIONS_LOCK = threading.Lock()
+
+# Sessions started from or subscribed by each socket. Session events go to a room named after
+# the session, and a client that goes away has its queued work dropped
+SOCKET_SESSIONS = {}
+SESSION_SOCKETS = {}
+SOCKET_SESSIONS_LOCK = threading.Lock()
+
+def bind_socket_session(sid, session_id):
+    """Put a socket in a session's room; a later socket, e.g. after a reconnect, takes the session over"""
+    with SOCKET_SESSIONS_LOCK:
+        previous = SESSION_SOCKETS.get(session_id)
+        if previous == sid:
+            return
+        if previous is not None:
+            SOCKET_SESSIONS.get(previous, set()).discard(session_id)
+            socketio.server.leave_room(previous, session_id, namespace='/')
+        SESSION_SOCKETS[session_id] = sid
+        SOCKET_SESSIONS.setdefault(sid, set()).add(session_id)
+    try:
+        socketio.server.enter_room(sid, session_id, namespace='/')
+    except (KeyError, ValueError):
+        # Connected to another server process; the client joins there with a subscribe event
+        logger.info(f"Socket {sid} is not connected to this process; session {session_id} not joined")
+
+def unbind_socket_session(sid, session_id):
+    """Undo bind_socket_session, e.g. for a session that was never admitted"""
+    with SOCKET_SESSIONS_LOCK:
+        if SESSION_SOCKETS.get(session_id) != sid:
+            return
+        del SESSION_SOCKETS[session_id]
+        sessions = SOCKET_SESSIONS.get(sid, set())
+        sessions.discard(session_id)
+        if not sessions:
+            SOCKET_SESSIONS.pop(sid, None)
+    try:
+        socketio.server.leave_room(sid, session_id, namespace='/')
+    except (KeyError, ValueError):
+        pass
+
+def drop_socket_sessions(sid):
+    """Cancel queued work and streaming state of a socket's sessions that no other socket took over"""
+    with SOCKET_SESSIONS_LOCK:
+        session_ids = SOCKET_SESSIONS.pop(sid, set())
+        for session_id in session_ids:
+            SESSION_SOCKETS.pop(session_id, None)
+    dropped = 0
+    for session_id in session_ids:
+        dropped += PIPELINE.cancel(session_id)
+        with CHUNKED_UPLOADS_LOCK:
+            uploads = [upload for upload in CHUNKED_UPLOADS.values() if upload.session_id == session_id and not upload.finalizing]
+            for upload in uploads:
+                del CHUNKED_UPLOADS[upload.upload_id]
+        for upload in uploads:
+            upload.abort()
+            dropped += 1
+        with STREAM_SESSIONS_LOCK:
+            if STREAM_SESSIONS.pop(session_id, None) is not None:
+                dropped += 1
+    if dropped:
+        logger.info(f"Dropped {dropped} queued items or streams of disconnected client {sid}")
+
+def asr_frame_ids(audio_array, sample_rate=16000):
+    """Greedy per-frame CTC token ids for one clip"""
+    with STEP_SECONDS.time("stream_asr"):
+        if ASR_SERVER is not None:
+            return ASR_SERVER.call("frame_ids", {"audio": audio_array, "sample_rate": sample_rate}, timeout=MODEL_SERVER_TIMEOUT)
+        if asr_model is None or asr_processor is None:
+            raise RuntimeError("ASR model not loaded")
+        return offload(asr_engine.frame_ids, asr_processor, asr_model, audio_array, sample_rate)
+
+def asr_decode_ids(frame_ids):
+    """Collapse per-frame CTC ids into text"""
+    return asr_processor.batch_decode([frame_ids], skip_special_tokens=True)[0]
+
+def get_stream_session(session_id):
+    """Return the streaming transcriber for a session, creating it on first use"""
+    # Waited for outside the lock, so a loading model does not hold up other sessions' lookups
+    MODELS.wait("noise_reduction", MODEL_WAIT_TIMEOUT)
+    with STREAM_SESSIONS_LOCK:
+        # Drop sessions whose client went away without sending a final chunk
+        now = time.monotonic()
+        for stale_id in [sid for sid, stream in STREAM_SESSIONS.items()
+                         if now - stream.last_activity > STREAM_SESSION_TIMEOUT]:
+            logger.info(f"Dropping idle streaming session: {stale_id}")
+            del STREAM_SESSIONS[stale_id]
+        
+        stream = STREAM_SESSIONS.get(session_id)
+        if stream is None:
+            stream = StreamingTranscriber(
+                asr_frame_ids,
+                asr_decode_ids,
+                chunk_seconds=STREAM_CHUNK_SECONDS,
+                left_context_seconds=STREAM_LEFT_CONTEXT_SECONDS,
+                right_context_seconds=STREAM_RIGHT_CONTEXT_SECONDS,
+                reference_seconds=VOICE_SAMPLE_MAX_SECONDS,
+                # Runs inline when the whole feed is offloaded already; see run_stream
+                denoiser=StreamDenoiser(new_noise_processor(), run=offload) if noise_reduction_model is not None else None
+            )
+            STREAM_SESSIONS[session_id] = stream
+        return stream
+
+def run_stream(fn, *args):
+    """Run a streaming session's feed or finalize off the event loop
+
+    Worker-process ASR answers through futures that resolve on the event loop and cannot
+    be waited on from an offloaded thread, so in model-server mode the session runs here
+    and only its denoiser is offloaded.
+    """
+    if ASR_SERVER is not None:
+        return fn(*args)
+    return offload(fn, *args)
+
+def feed_stream(session_id, audio_bytes, cumulative=False):
+    """Decode a chunk in memory and append it to a streaming session; returns a partial transcript or None
+
+    With cumulative=True the payload holds the whole recording so far and only the
+    samples past what the session has already received are appended.
+    """
+    audio_array, _ = offload(decode_audio_bytes, audio_bytes)
+    # Chunks that arrive during startup wait here for the ASR model instead of failing
+    if not MODELS.wait("asr", MODEL_WAIT_TIMEOUT):
+        raise RuntimeError(f"ASR model not available: {MODELS['asr'].error or 'still loading'}")
+    stream = get_stream_session(session_id)
+    if cumulative:
+        # A newer cumulative payload holds all of this one, so an overtaken payload is skipped
+        partial, superseded = run_stream(stream.feed_cumulative, audio_array)
+        if superseded:
+            logger.info(f"Skipped superseded chunk for session {session_id}")
+    else:
+        partial = run_stream(stream.feed, audio_array)
+    if partial is not None:
+        partial["session_id"] = session_id
+    return partial
+
+def feed_upload_audio(session_id, audio_array):
+    """Append decoded samples of a chunked upload to its streaming session and emit any partial
+
+    Uploads take an ASR slot like a pipeline batch, and denoising and ASR run off the event loop.
+    """
+    if not MODELS.wait("asr", MODEL_WAIT_TIMEOUT):
+        raise RuntimeError(f"ASR model not available: {MODELS['asr'].error or 'still loading'}")
+    stream = get_stream_session(session_id)
+    with ASR_SLOTS:
+        partial = run_stream(stream.feed, audio_array)
+    if partial is not None:
+        partial["session_id"] = session_id
+        emit_to_session('partial_transcript', partial)
+
+def drop_idle_uploads():
+    """Abort chunked uploads whose client stopped sending without finalizing"""
+    now = time.monotonic()
+    with CHUNKED_UPLOADS_LOCK:
+        stale = [upload for upload in CHUNKED_UPLOADS.values()
+                 if not upload.finalizing and now - upload.last_activity > CHUNKED_UPLOAD_TIMEOUT]
+        for upload in stale:
+            del CHUNKED_UPLOADS[upload.upload_id]
+    for upload in stale:
+        logger.info(f"Dropping idle chunked upload: {upload.upload_id}")
+        upload.abort()
+        with STREAM_SESSIONS_LOCK:
+            STREAM_SESSIONS.pop(upload.session_id, None)
+
+def finalize_chunked_upload(upload):
+    """Wait for an upload's decoder to drain, then finish its session like a final streaming chunk"""
+    done = upload.finish(MODEL_WAIT_TIMEOUT)
+    with CHUNKED_UPLOADS_LOCK:
+        CHUNKED_UPLOADS.pop(upload.upload_id, None)
+    if PERSIST_UPLOADS:
+        os.replace(upload.path, os.path.join(UPLOAD_FOLDER, f"{upload.session_id}_upload{upload.extension}"))
+    else:
+        upload.remove()
+    
+    if upload.error is not None or not done:
+        with STREAM_SESSIONS_LOCK:
+            STREAM_SESSIONS.pop(upload.session_id, None)
+        fail_session({"filename": f"{upload.session_id}_upload", "session_id": upload.session_id, "user_id": upload.user_id},
+                     {"error": f"Failed to decode audio: {upload.error or 'timed out'}"})
+        return
+    finish_stream(upload.session_id, user_id=upload.user_id, priority=PRIORITY_BULK)
+
+def decode_audio_frame(stream, payload, audio_format, sample_rate):
+    """Turn one binary socket frame into 16 kHz float32 samples"""
+    if audio_format == 'pcm16':
+        return decode_pcm16(payload, sample_rate)
+    if audio_format == 'opus':
+        if stream.decoder is None:
+            stream.decoder = OpusDecoder()
+        return stream.decoder.decode(payload)
+    raise ValueError(f"Unsupported audio format: {audio_format}")
+
+def feed_frame(stream, payload, audio_format, sample_rate):
+    """Decode one socket frame and append it to its session; returns a partial transcript or None"""
+    # Inline when run_stream has offloaded the whole call already
+    return stream.feed(offload(decode_audio_frame, stream, payload, audio_format, sample_rate))
+
+def finish_stream(session_id, user_id=None, priority=PRIORITY_INTERACTIVE):
+    """Produce the final transcription from a session's streaming state, then queue TTS
+
+    Below interactive priority, as for chunked uploads, the last ASR pass waits for an ASR slot.
+    """
+    with STREAM_SESSIONS_LOCK:
+        stream = STREAM_SESSIONS.pop(session_id, None)
+    item = {"filename": f"{session_id}_stream", "session_id": session_id, "user_id": user_id,
+            "priority": priority}
+    
+    if stream is None:
+        fail_session(item, {"error": "No audio received for this session"})
+        return None
+    
+    try:
+        with ASR_SLOTS if priority != PRIORITY_INTERACTIVE else contextlib.nullcontext():
+            transcription = run_stream(stream.finalize)
+        transcription_result = save_transcription(transcription, stream.duration, stream.compute_time)
+    except Exception as e:
+        fail_session(item, {"error": f"Failed to transcribe audio: {str(e)}"})
+        return None
+    
+    logger.info(f"Streaming transcription finished for session {session_id}: {transcription}")
+    MODELS.milestone("first_transcription")
+    response_data = dict(transcription_result, tts_status="pending")
+    item["response"] = response_data
+    item["clip"] = AudioClip(stream.reference_audio, stream.sample_rate)
+    item["sample_rate"] = stream.sample_rate
+    store_response(item, response_data)
+    
+    logger.info(f"Emitting transcription_complete event for session: {session_id}")
+    emit_to_session('transcription_complete', {
+        "session_id": session_id,
+        "result": response_data
+    })
+    
+    PIPELINE.stage("tts").put(item)
+    return response_data
+
+def admission_rejected(reason, estimated_wait):
+    """Response refusing an upload, with an estimate of when to retry"""
+    logger.warning(f"Upload rejected ({reason}), estimated wait {estimated_wait:.1f}s")
+    response = jsonify({
+        "error": "Too many uploads from this client" if reason == "client_limit" else "Server is busy, try again later",
+        "reason": reason,
+        "estimated_wait": round(estimated_wait, 1)
+    })
+    response.headers["Retry-After"] = str(max(1, int(np.ceil(estimated_wait))))
+    return response, 429 if reason == "client_limit" else 503
 
 @app.route('/api/upload', methods=['POST'])
 def upload_audio():
@@ -322,67 +1219,170 @@ def upload_audio():
         audio_file = request.files['file']
         if not audio_file.filename:
             return jsonify({'error': 'No selected file'}), 400
+        
+        # Work is held in the queue while the ASR model loads, but not if it never will
+        if MODELS['asr'].state == FAILED:
+            return jsonify({'error': f"ASR model failed to load: {MODELS['asr'].error}"}), 503
 
-        # Save uploaded file
         file_ext = os.path.splitext(audio_file.filename)[1].lower()
         if not file_ext:
             file_ext = ".m4a"  # Default extension if none provided
-            
-        filename = f"{uuid.uuid4()}{file_ext}"
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
         
-        audio_file.save(filepath)
-        logger.info(f"File saved: {filepath}")
+        # Keep the upload in memory; it is decoded straight from these bytes
+        audio_bytes = audio_file.read()
+        if not audio_bytes:
+            return jsonify({'error': 'Audio file is empty'}), 400
 
         # Generate a session ID for tracking this request
         session_id = str(uuid.uuid4())
+        filename = f"{session_id}_upload{file_ext}"  # Same name a finalized resumable upload gets
+        socket_id = request.form.get('socket_id')
+        if socket_id:
+            # Join before queueing, so not even a fast result can miss the socket
+            bind_socket_session(socket_id, session_id)
         
-        # Add to processing queue
-        PREDICTION_QUEUE.put({
-            "audio_path": filepath,
-            "session_id": session_id
+        # Admit to the processing queue, or refuse with an estimate of when to retry
+        admitted, reason, estimated_wait = PREDICTION_QUEUE.offer({
+            "audio_bytes": audio_bytes,
+            "filename": filename,
+            "session_id": session_id,
+            "user_id": request.form.get('user_id'),
+            "client_id": socket_id or request.remote_addr,
+            "priority": PRIORITY_SHORT if len(audio_bytes) <= SHORT_UPLOAD_BYTES else PRIORITY_BULK
         })
+        if not admitted:
+            if socket_id:
+                unbind_socket_session(socket_id, session_id)
+            return admission_rejected(reason, estimated_wait)
+        
+        persist_upload(filename, audio_bytes)
         
         return jsonify({
             "status": "processing",
             "message": "Audio uploaded and being processed",
-            "session_id": session_id
+            "session_id": session_id,
+            "estimated_wait": round(estimated_wait, 1)
         })
 
     except Exception as e:
         logger.exception("Upload error")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/uploads', methods=['POST'])
+def create_chunked_upload():
+    """Start a resumable upload; chunks follow as PUTs at byte offsets, then a finalize call"""
+    if MODELS['asr'].state == FAILED:
+        return jsonify({'error': f"ASR model failed to load: {MODELS['asr'].error}"}), 503
+    
+    drop_idle_uploads()
+    params = request.get_json(silent=True) or request.form
+    client_id = params.get('socket_id') or request.remote_addr
+    # Uploads are admitted like bulk uploads to /api/upload, since they share its ASR capacity
+    estimated_wait = PREDICTION_QUEUE.estimated_wait(PRIORITY_BULK)
+    if estimated_wait > ADMISSION_MAX_WAIT_SECONDS:
+        return admission_rejected("overloaded", estimated_wait)
+    with CHUNKED_UPLOADS_LOCK:
+        if len(CHUNKED_UPLOADS) >= MAX_CHUNKED_UPLOADS:
+            return admission_rejected("queue_full", estimated_wait)
+        if ADMISSION_MAX_PER_CLIENT and \
+                sum(upload.client_id == client_id for upload in CHUNKED_UPLOADS.values()) >= ADMISSION_MAX_PER_CLIENT:
+            return admission_rejected("client_limit", estimated_wait)
+        upload_id = str(uuid.uuid4())
+        session_id = str(uuid.uuid4())
+        upload = ChunkedUpload(
+            upload_id,
+            session_id,
+            os.path.join(UPLOAD_FOLDER, f"{upload_id}.part"),
+            lambda audio_array: feed_upload_audio(session_id, audio_array),
+            user_id=params.get('user_id'),
+            extension=os.path.splitext(params.get('filename') or "")[1].lower() or ".m4a",
+            client_id=client_id,
+            run=offload
+        )
+        CHUNKED_UPLOADS[upload_id] = upload
+    if params.get('socket_id'):
+        bind_socket_session(params['socket_id'], session_id)
+    
+    logger.info(f"Started chunked upload {upload_id} for session {session_id}")
+    return jsonify({
+        "upload_id": upload_id,
+        "session_id": session_id,
+        "offset": 0,
+        "chunk_size": CHUNK_SIZE_HINT
+    }), 201
+
+@app.route('/api/uploads/<upload_id>', methods=['GET'])
+def get_chunked_upload(upload_id):
+    """Bytes received so far, so an interrupted client knows where to resume"""
+    upload = CHUNKED_UPLOADS.get(upload_id)
+    if upload is None:
+        return jsonify({'error': 'Upload not found'}), 404
+    return jsonify({
+        "upload_id": upload_id,
+        "session_id": upload.session_id,
+        "offset": upload.offset,
+        "complete": upload.complete
+    })
+
+@app.route('/api/uploads/<upload_id>', methods=['PUT'])
+def put_upload_chunk(upload_id):
+    """Write a chunk at ?offset= (or an Upload-Offset header); retried chunks are accepted idempotently"""
+    upload = CHUNKED_UPLOADS.get(upload_id)
+    if upload is None:
+        return jsonify({'error': 'Upload not found'}), 404
+    try:
+        offset = int(request.args.get('offset', request.headers.get('Upload-Offset', upload.offset)))
+    except ValueError:
+        return jsonify({'error': 'Offset must be an integer'}), 400
+    if offset < 0:
+        return jsonify({'error': 'Offset must not be negative'}), 400
+    if offset + (request.content_length or 0) > MAX_UPLOAD_BYTES:
+        return jsonify({'error': 'Upload is too large'}), 413
+    
+    try:
+        new_offset = upload.write(offset, request.stream)
+    except UploadOffsetError as e:
+        return jsonify({'error': 'Chunk does not continue the upload', 'offset': e.offset}), 409
+    except RuntimeError as e:
+        return jsonify({'error': str(e), 'offset': upload.offset}), 409
+    if upload.error is not None:
+        return jsonify({'error': f"Failed to decode audio: {upload.error}", 'offset': new_offset}), 422
+    return jsonify({"upload_id": upload_id, "offset": new_offset})
+
+@app.route('/api/uploads/<upload_id>/finalize', methods=['POST'])
+def finalize_upload(upload_id):
+    """Mark an upload complete; the transcript follows on the session's socket room or by polling"""
+    upload = CHUNKED_UPLOADS.get(upload_id)
+    if upload is None:
+        return jsonify({'error': 'Upload not found'}), 404
+    params = request.get_json(silent=True) or request.form
+    if params.get('size') is not None and str(params['size']) != str(upload.offset):
+        return jsonify({'error': 'Upload is incomplete', 'offset': upload.offset}), 409
+    if upload.offset == 0:
+        return jsonify({'error': 'Audio file is empty'}), 400
+    with CHUNKED_UPLOADS_LOCK:
+        # A retried finalize reports the same session instead of finishing it twice
+        already_finalizing = upload.finalizing
+        upload.finalizing = True
+    if already_finalizing:
+        return jsonify({"status": "processing", "session_id": upload.session_id}), 202
+    
+    worker = threading.Thread(target=finalize_chunked_upload, args=(upload,), name=f"finalize-{upload_id[:8]}", daemon=True)
+    worker.start()
+    return jsonify({
+        "status": "processing",
+        "message": "Audio uploaded and being processed",
+        "session_id": upload.session_id
+    }), 202
+
 @app.route('/api/transcription/<session_id>', methods=['GET'])
 def get_transcription(session_id):
     """Get transcription results for a session"""
     try:
-        # First check transcriptions folder
-        for filename in os.listdir(TRANSCRIPTIONS_FOLDER):
-            if not filename.endswith('.json'):
-                continue
-                
-            file_path = os.path.join(TRANSCRIPTIONS_FOLDER, filename)
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-                
-            if data.get('session_id') == session_id:
-                # Return the transcription data
-                return jsonify(data)
-        
-        # Then check responses folder
-        for filename in os.listdir(RESPONSES_FOLDER):
-            if not filename.endswith('.json'):
-                continue
-                
-            file_path = os.path.join(RESPONSES_FOLDER, filename)
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-                
-            if data.get('session_id') == session_id:
-                # Return the transcription data
-                return jsonify(data['colab_response'])
-                
+        data = SESSION_STORE.get(session_id)
+        if data is not None:
+            return jsonify(data)
+
         # If not found, it might still be processing
         return jsonify({"status": "processing", "message": "Still processing"}), 202
         
@@ -396,6 +1396,7 @@ def get_tts_audio(filename):
     try:
         file_path = os.path.join(TTS_OUTPUT_FOLDER, filename)
         if os.path.exists(file_path):
+            TTS_CACHE.touch(filename)
             return send_file(file_path, mimetype='audio/wav')
         else:
             return jsonify({"error": "Audio file not found"}), 404
@@ -403,6 +1404,124 @@ def get_tts_audio(filename):
         logger.exception("Error serving TTS file")
         return jsonify({"error": str(e)}), 500
 
+def emit_tts_stream_complete(session_id, filename):
+    """Tell a streaming TTS client where the stored audio can be fetched again, once it is stored"""
+    if session_id:
+        emit_to_session('tts_stream_complete', {"session_id": session_id, "tts_audio_url": f"/api/tts/{filename}"})
+
+def stream_remote_tts(text, voice_audio, sample_rate, user_id, session_id=None):
+    """/api/tts/stream in model-server mode: relay a TTS worker's sentence chunks as they arrive"""
+    chunks = queue.Queue()
+    
+    def synthesize():
+        result = generate_tts_remote(
+            text, voice_audio, sample_rate, user_id,
+            on_chunk=lambda index, sentence, pcm, chunk_rate: chunks.put((pcm, chunk_rate))
+        )
+        chunks.put(result)
+        # The worker picks the voice, so the stored filename is only known now, after the headers went out
+        if "tts_audio" in result:
+            emit_tts_stream_complete(session_id, result["tts_audio"])
+    
+    threading.Thread(target=synthesize, daemon=True).start()
+    
+    # A dict means synthesis finished without streaming anything: a cache hit or an error
+    first = chunks.get()
+    if isinstance(first, dict):
+        if "error" in first:
+            return jsonify(first), 500
+        response = send_file(os.path.join(TTS_OUTPUT_FOLDER, first["tts_audio"]), mimetype='audio/wav')
+        response.headers["X-TTS-Audio-Url"] = f"/api/tts/{first['tts_audio']}"
+        return response
+    
+    def generate():
+        pcm, chunk_rate = first
+        yield wav_header(chunk_rate)
+        yield pcm
+        while True:
+            chunk = chunks.get()
+            if isinstance(chunk, dict):
+                break
+            yield chunk[0]
+    
+    return Response(generate(), mimetype='audio/wav', headers={"Cache-Control": "no-cache"})
+
+@app.route('/api/tts/stream', methods=['POST'])
+def stream_tts_audio():
+    """Synthesize text and stream the WAV back sentence by sentence as it is generated"""
+    try:
+        data = request.get_json(silent=True) or request.form
+        text = data.get('text', '')
+        user_id = data.get('user_id')
+        session_id = data.get('session_id')  # Optional: sockets subscribed to it get tts_stream_complete
+        
+        if not MODELS.is_ready("tts"):
+            return jsonify({"error": "TTS model not loaded"}), 503
+        if not text.strip():
+            return jsonify({"error": "Empty text provided for TTS"}), 400
+        
+        voice_clip = None
+        timings = {}
+        if 'voice' in request.files:
+            voice_clip = offload(AudioClip.from_bytes, request.files['voice'].read(), timings)
+        
+        if TTS_SERVER is not None:
+            voice_audio = None
+            if voice_clip is not None:
+                voice_audio = offload(voice_clip.voice_reference, VOICE_SAMPLE_MAX_SECONDS, timings)
+            observe_timings(timings)
+            return stream_remote_tts(text, voice_audio, VOICE_SAMPLE_RATE, user_id, session_id)
+        
+        # Clone from an uploaded voice sample, or from latents already cached for the user
+        speaker_latents = None
+        if voice_clip is not None:
+            try:
+                speaker_latents, _ = get_speaker_latents(voice_clip, user_id=user_id, timings=timings)
+            finally:
+                voice_clip.close()
+                observe_timings(timings)
+        elif user_id and xtts_model() is not None:
+            speaker_latents = VOICE_CACHE.get(user_id=user_id)
+        
+        cache_key = tts_cache_key(text, speaker_latents=speaker_latents)
+        output_filename = TTS_CACHE.filename(cache_key)
+        cached_filename = TTS_CACHE.get(cache_key)
+        if cached_filename is not None:
+            emit_tts_stream_complete(session_id, cached_filename)
+            response = send_file(os.path.join(TTS_OUTPUT_FOLDER, cached_filename), mimetype='audio/wav')
+            response.headers["X-TTS-Audio-Url"] = f"/api/tts/{cached_filename}"
+            return response
+        
+        output_path = TTS_CACHE.temp_path(cache_key)
+        sample_rate = tts_output_sample_rate()
+        
+        def generate():
+            start_time = time.time()
+            try:
+                yield wav_header(sample_rate)
+                for index, (sentence, pcm, _) in enumerate(stream_tts(text, output_path, speaker_latents=speaker_latents)):
+                    if index == 0:
+                        logger.info(f"TTS stream {output_filename}: first audio after {time.time() - start_time:.3f}s")
+                    yield pcm
+                TTS_CACHE.add(cache_key, output_path)
+                logger.info(f"TTS stream {output_filename}: complete after {time.time() - start_time:.3f}s")
+                emit_tts_stream_complete(session_id, output_filename)
+            finally:
+                # Client went away before the end: drop the partial file
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+        
+        return Response(generate(), mimetype='audio/wav', headers={
+            "X-TTS-Audio-Url": f"/api/tts/{output_filename}",
+            "Cache-Control": "no-cache"
+        })
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.exception("TTS streaming error")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/stream', methods=['POST'])
 def stream_audio_chunk():
     """Process streaming audio chunks"""
@@ -410,51 +1529,45 @@ def stream_audio_chunk():
         if 'audio' not in request.files:
             return jsonify({'error': 'Audio chunk is missing'}), 400
 
+        if MODELS['asr'].state == FAILED:
+            return jsonify({'error': f"ASR model failed to load: {MODELS['asr'].error}"}), 503
+
         audio_chunk = request.files['audio']
         session_id = request.form.get('session_id', str(uuid.uuid4()))
         chunk_index = request.form.get('chunk_index', '0')
+        if request.form.get('socket_id'):
+            bind_socket_session(request.form['socket_id'], session_id)
         
-        # Save chunk temporarily
-        chunk_path = os.path.join(UPLOAD_FOLDER, f"{session_id}_chunk_{chunk_index}.wav")
-        audio_chunk.save(chunk_path)
+        audio_bytes = audio_chunk.read()
+        if not audio_bytes:
+            return jsonify({'error': 'Audio chunk is empty'}), 400
+        persist_upload(f"{session_id}_chunk_{chunk_index}.wav", audio_bytes)
         
-        # Check if file exists and is valid
-        if not os.path.exists(chunk_path) or os.path.getsize(chunk_path) == 0:
-            return jsonify({'error': 'Failed to save audio chunk'}), 500
+        # If this is marked as a final chunk, finish the transcription from the streamed state
+        is_final = request.form.get('is_final', 'false').lower() == 'true'
         
+        partial = None
         try:
-            # Process chunk
-            chunk_data, sample_rate = sf.read(chunk_path)
-            
-            # Apply noise reduction
-            denoised_data = process_audio(chunk_data, sample_rate)
-            
-            # Save processed chunk for debugging (optional)
-            # sf.write(os.path.join(UPLOAD_FOLDER, f"{session_id}_processed_{chunk_index}.wav"), denoised_data, sample_rate)
+            partial = feed_stream(session_id, audio_bytes)
+            if partial is not None:
+                emit_to_session('partial_transcript', partial)
         except Exception as e:
             logger.error(f"Error processing audio chunk: {e}")
             # Continue even if processing fails
         
-        # If this is marked as a final chunk, process the complete audio
-        is_final = request.form.get('is_final', 'false').lower() == 'true'
-        
         if is_final:
-            # Add to processing queue for full processing
-            PREDICTION_QUEUE.put({
-                "audio_path": chunk_path,
-                "session_id": session_id
-            })
+            result = finish_stream(session_id, user_id=request.form.get('user_id'))
             return jsonify({
-                "status": "processing",
-                "session_id": session_id
+                "status": "processing" if result is not None else "error",
+                "session_id": session_id,
+                "transcription": result.get("transcription") if result is not None else None
             })
         else:
-            # For regular chunks, do lightweight processing
-            # This would be used for streaming transcription
             return jsonify({
                 "status": "received",
                 "session_id": session_id,
-                "chunk_index": chunk_index
+                "chunk_index": chunk_index,
+                "partial": partial
             })
         
     except Exception as e:
@@ -497,6 +1610,26 @@ def handle_connect():
 @socketio.on('disconnect')
 def handle_disconnect():
     logger.info(f"Client disconnected: {request.sid}")
+    # Give the client a chance to reconnect and take its sessions over before dropping them
+    timer = threading.Timer(DISCONNECT_GRACE_SECONDS, drop_socket_sessions, args=(request.sid,))
+    timer.daemon = True
+    timer.start()
+
+@socketio.on('subscribe')
+def handle_subscribe(data):
+    """Join a session's room, e.g. after an upload or a reconnect; replays the result if it is already stored"""
+    session_id = (data or {}).get('session_id')
+    if not session_id:
+        emit('error', {'message': 'session_id is required'})
+        return
+    bind_socket_session(request.sid, session_id)
+    emit('subscribed', {'session_id': session_id})
+    
+    result = SESSION_STORE.get(session_id)
+    if result is not None:
+        emit('transcription_complete', {"session_id": session_id, "result": result})
+        if result.get("tts_status") in ("complete", "error", "cancelled"):
+            emit('tts_complete', {"session_id": session_id, "result": result})
 
 @socketio.on('stream_audio')
 def handle_streaming_audio(data):
@@ -510,23 +1643,26 @@ def handle_streaming_audio(data):
         if not audio_base64:
             logger.error("No audio data received in websocket message")
             return
+        bind_socket_session(request.sid, session_id)
             
         try:
             # Decode base64 audio
             audio_bytes = base64.b64decode(audio_base64)
             
-            # Save to temporary file
-            temp_file = os.path.join(UPLOAD_FOLDER, f"{session_id}_websocket_chunk.wav")
-            with open(temp_file, 'wb') as f:
-                f.write(audio_bytes)
+            persist_upload(f"{session_id}_websocket_chunk.wav", audio_bytes)
+            
+            # The mobile client resends the whole recording on every message by default
+            try:
+                partial = feed_stream(session_id, audio_bytes, cumulative=data.get('cumulative', True))
+                if partial is not None:
+                    emit('partial_transcript', partial)
+            except Exception as e:
+                logger.error(f"Error transcribing streamed audio: {e}")
                 
             if is_final:
-                # Process the complete audio session
+                # Finish the session from the accumulated streaming state
                 logger.info(f"Processing final audio chunk for session {session_id}")
-                PREDICTION_QUEUE.put({
-                    "audio_path": temp_file,
-                    "session_id": session_id
-                })
+                finish_stream(session_id, user_id=data.get('user_id'))
                 
                 # Send acknowledgment
                 emit('chunk_received', {
@@ -547,13 +1683,90 @@ def handle_streaming_audio(data):
         logger.exception(f"Streaming socket error: {e}")
         emit('error', {'message': 'Internal server error'})
 
+@socketio.on('audio_frame')
+def handle_audio_frame(data):
+    """Handle binary audio frames: {session_id, seq, format, sample_rate, audio, is_final}
+
+    audio is raw bytes (pcm16 little-endian mono, or one Opus packet) sent as a
+    Socket.IO binary attachment, so nothing is base64 encoded or resent.
+    """
+    try:
+        session_id = data.get('session_id')
+        payload = data.get('audio') or b''
+        audio_format = data.get('format', 'pcm16')
+        sample_rate = int(data.get('sample_rate', 16000))
+        is_final = data.get('is_final', False)
+        
+        if not session_id:
+            emit('error', {'message': 'session_id is required'})
+            return
+        if not isinstance(payload, (bytes, bytearray)):
+            emit('error', {'message': 'audio must be sent as a binary payload'})
+            return
+        bind_socket_session(request.sid, session_id)
+        
+        # Frames that arrive during startup wait here for the ASR model instead of failing
+        if not MODELS.wait("asr", MODEL_WAIT_TIMEOUT):
+            emit('error', {'message': f"ASR model not available: {MODELS['asr'].error or 'still loading'}"})
+            return
+        stream = get_stream_session(session_id)
+        # Frames of one session are handled one at a time so they are appended in order
+        with stream.lock:
+            status = stream.frames.accept(data.get('seq'), len(payload))
+            if status == "gap":
+                logger.warning(f"Missing audio frames for session {session_id}: {sorted(stream.frames.missing)}")
+            
+            if status in ("ok", "gap") and payload:
+                try:
+                    partial = run_stream(feed_frame, stream, payload, audio_format, sample_rate)
+                    if partial is not None:
+                        partial["session_id"] = session_id
+                        emit('partial_transcript', partial)
+                except Exception as e:
+                    logger.error(f"Error processing audio frame: {e}")
+                    emit('error', {'message': 'Failed to process audio data'})
+        
+        emit('frame_ack', {
+            'session_id': session_id,
+            'seq': data.get('seq'),
+            'status': status,
+            'bytes_received': stream.frames.bytes_received,
+            'frames': stream.frames.frames,
+            'missing': sorted(stream.frames.missing)
+        })
+        
+        if is_final:
+            logger.info(f"Processing final audio frame for session {session_id}")
+            finish_stream(session_id, user_id=data.get('user_id'))
+            emit('chunk_received', {
+                'session_id': session_id,
+                'status': 'processing_final'
+            })
+            
+    except Exception as e:
+        logger.exception(f"Streaming socket error: {e}")
+        emit('error', {'message': 'Internal server error'})
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Latency histograms and queue gauges in the Prometheus text format"""
+    return Response(REGISTRY.exposition(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/debug/profile', methods=['GET'])
+def debug_profile():
+    """Sampled stacks of the pipeline workers in collapsed (flamegraph) form; ?reset=1 starts over"""
+    if PROFILER is None:
+        return jsonify({"error": "Profiler is disabled; set PROFILER_SAMPLE_HZ to enable it"}), 404
+    return Response(PROFILER.collapsed(reset=request.args.get('reset') == '1'), mimetype="text/plain")
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Simple server status check"""
+    model_states = {name: slot["state"] for name, slot in MODELS.status().items()}
     model_status = {
-        "asr_model": "loaded" if asr_model is not None else "loading",
-        "tts_model": "loaded" if tts_model is not None else "loading",
-        "noise_reduction": "loaded" if noise_reduction_model is not None else "loading",
+        "asr_model": "loaded" if model_states["asr"] == READY else model_states["asr"],
+        "tts_model": "loaded" if model_states["tts"] == READY else model_states["tts"],
+        "noise_reduction": "loaded" if model_states["noise_reduction"] == READY else model_states["noise_reduction"],
     }
     
     queue_size = PREDICTION_QUEUE.qsize()
@@ -563,12 +1776,34 @@ def health_check():
         'timestamp': datetime.datetime.utcnow().isoformat(),
         'upload_folder': os.path.exists(UPLOAD_FOLDER),
         'models': model_status,
-        'queue_size': queue_size
+        'asr_backend': ASR_BACKEND,
+        'model_details': MODELS.status(),
+        'startup_seconds': MODELS.milestones,
+        'queue_size': queue_size,
+        'pipeline_queues': PIPELINE.queue_sizes(),
+        'admission': PREDICTION_QUEUE.stats(),
+        'voice_cache': VOICE_CACHE.stats(),
+        'tts_cache': TTS_CACHE.stats(),
+        'result_store': SESSION_STORE.stats(),
+        'model_servers': {
+            "asr": ASR_SERVER.status(),
+            "tts": TTS_SERVER.status()
+        } if MODEL_SERVER_MODE else None
     })
 
+def serve(host=SERVER_HOST, port=SERVER_PORT, debug=False):
+    """Run the server in SERVER_MODE: the threaded Werkzeug dev server, or eventlet for production"""
+    if SERVER_MODE == "eventlet":
+        # One green thread per connection; model and DSP work is offloaded to OFFLOAD_THREADS OS threads
+        logger.info(f"Starting eventlet server on {host}:{port} (max {SERVER_MAX_CONNECTIONS} connections)")
+        socketio.run(app, host=host, port=port, log_output=debug,
+                     keepalive=HTTP_KEEPALIVE, max_size=SERVER_MAX_CONNECTIONS)
+    else:
+        logger.info(f"Starting Flask-SocketIO development server on {host}:{port}")
+        socketio.run(app, host=host, port=port, debug=debug, use_reloader=debug, allow_unsafe_werkzeug=True)
+
 if __name__ == '__main__':
-    logger.info("Starting Flask-SocketIO server...")
     try:
-        socketio.run(app, host='0.0.0.0', port=5000, debug=True, allow_unsafe_werkzeug=True)
+        serve(debug=SERVER_MODE != "eventlet")
     except Exception as e:
         logger.error(f"Failed to start server: {e}")
@@ -0,0 +1,153 @@
+import os
+import logging
+from types import SimpleNamespace
+
+import numpy as np
+import torch
+
+from metrics import timing
+
+logger = logging.getLogger(__name__)
+
+ASR_MODEL_NAME = "nvidia/parakeet-ctc-0.6b-asr"
+ASR_BACKENDS = ("torch", "int8", "onnx")
+ONNX_FILENAME = "parakeet-ctc-0.6b.onnx"
+
+
+class _LogitsOnly(torch.nn.Module):
+    """Export wrapper: plain tensors in, CTC logits out"""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_features, attention_mask):
+        return self.model(input_features=input_features, attention_mask=attention_mask).logits
+
+
+def export_onnx(processor, model, path):
+    """Export the CTC model to ONNX with dynamic batch and length axes"""
+    sample = processor([np.zeros(32000, dtype=np.float32)], sampling_rate=16000,
+                       return_attention_mask=True, return_tensors="pt")
+    with torch.no_grad():
+        torch.onnx.export(
+            _LogitsOnly(model), (sample.input_features, sample.attention_mask), path,
+            input_names=["input_features", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_features": {0: "batch", 1: "frames"},
+                "attention_mask": {0: "batch", 1: "frames"},
+                "logits": {0: "batch", 1: "output_frames"}
+            },
+            opset_version=17
+        )
+
+
+class OnnxCTCModel:
+    """ONNX Runtime session behind the slice of the transformers CTC model interface this module uses"""
+
+    def __init__(self, path, pad_token_id, threads=None):
+        import onnxruntime
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads or torch.get_num_threads()
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.pad_token_id = pad_token_id
+
+    def eval(self):
+        return self
+
+    def __call__(self, input_features, attention_mask=None):
+        if attention_mask is None:
+            attention_mask = torch.ones(input_features.shape[:2], dtype=torch.long)
+        logits, = self.session.run(["logits"], {
+            "input_features": input_features.numpy().astype(np.float32),
+            "attention_mask": attention_mask.numpy().astype(np.int64)
+        })
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
+    def generate(self, input_features, attention_mask=None):
+        """Greedy CTC ids, with frames past each clip's end set to padding like transformers' generate"""
+        logits = self(input_features, attention_mask).logits
+        predicted_ids = logits.argmax(dim=-1)
+        if attention_mask is not None:
+            # Map each clip's input length onto the subsampled output frames
+            output_lengths = torch.ceil(attention_mask.sum(-1) * logits.shape[1] / attention_mask.shape[1]).long()
+            padded = torch.arange(logits.shape[1])[None, :] >= output_lengths[:, None]
+            predicted_ids[padded] = self.pad_token_id
+        return predicted_ids
+
+
+def load_processor(cache_dir=None):
+    from transformers import AutoProcessor
+    return AutoProcessor.from_pretrained(ASR_MODEL_NAME, cache_dir=cache_dir)
+
+
+def load(cache_dir=None, backend="torch"):
+    """Load the processor and model for a backend; returns (processor, model)
+
+    torch is the full-precision model, int8 the same model with its Linear layers
+    dynamically quantized, and onnx an ONNX Runtime session over an export that is
+    created in cache_dir on first use.
+    """
+    from transformers import AutoModelForCTC
+    if backend not in ASR_BACKENDS:
+        raise ValueError(f"Unknown ASR backend {backend!r}; expected one of {', '.join(ASR_BACKENDS)}")
+    processor = load_processor(cache_dir)
+
+    if backend == "onnx":
+        onnx_path = os.path.join(cache_dir or ".", ONNX_FILENAME)
+        if not os.path.exists(onnx_path):
+            logger.info(f"Exporting ASR model to {onnx_path}")
+            model = AutoModelForCTC.from_pretrained(ASR_MODEL_NAME, cache_dir=cache_dir)
+            export_onnx(processor, model.eval(), onnx_path)
+            del model
+        return processor, OnnxCTCModel(onnx_path, processor.tokenizer.pad_token_id)
+
+    model = AutoModelForCTC.from_pretrained(ASR_MODEL_NAME, cache_dir=cache_dir)
+    model.eval()
+    if backend == "int8":
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return processor, model
+
+
+def warmup(state):
+    """Transcribe a second of silence, so the first request skips lazy initialization"""
+    processor, model = state
+    transcribe(processor, model, [np.zeros(16000, dtype=np.float32)])
+
+
+def transcribe(processor, model, audio_arrays, sample_rate=16000, timings=None):
+    """Transcribe several clips with a single forward pass; returns one text per clip
+
+    With a timings dict, seconds spent on features, the forward pass and CTC decoding are added to it.
+    """
+    # Pad the batch to the longest clip; the attention mask hides the padding from the model
+    with timing(timings, "features"):
+        inputs = processor(
+            audio_arrays,
+            sampling_rate=sample_rate,
+            padding=True,
+            return_attention_mask=True,
+            return_tensors="pt"
+        )
+    with timing(timings, "asr_forward"), torch.no_grad():
+        predicted_ids = model.generate(inputs.input_features, attention_mask=inputs.attention_mask)
+    with timing(timings, "ctc_decode"):
+        return processor.batch_decode(predicted_ids, skip_special_tokens=True)
+
+
+def frame_ids(processor, model, audio_array, sample_rate=16000):
+    """Greedy per-frame CTC token ids for one clip"""
+    input_features = processor(audio_array, sampling_rate=sample_rate, return_tensors="pt").input_features
+    with torch.no_grad():
+        logits = model(input_features=input_features).logits
+    return logits.argmax(dim=-1)[0].tolist()
+
+
+def handle(state, op, payload, emit):
+    processor, model = state
+    if op == "transcribe":
+        return transcribe(processor, model, payload["audio_arrays"], payload["sample_rate"])
+    if op == "frame_ids":
+        return frame_ids(processor, model, payload["audio"], payload["sample_rate"])
+    raise ValueError(f"Unknown ASR operation: {op}")
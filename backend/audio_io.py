@@ -0,0 +1,330 @@
+import io
+import os
+import logging
+import tempfile
+import threading
+import numpy as np
+import soundfile as sf
+
+from metrics import timing
+from denoise import RNNOISE_SAMPLE_RATE, resample
+
+logger = logging.getLogger(__name__)
+
+VOICE_SAMPLE_RATE = 22050  # XTTS loads speaker references at this rate
+
+
+def resample_audio(audio, orig_sample_rate, target_sample_rate):
+    """Resample a whole clip of float32 mono with the cached polyphase filters streaming denoise uses"""
+    if orig_sample_rate == target_sample_rate or not len(audio):
+        return np.asarray(audio, dtype=np.float32)
+    return resample(audio, orig_sample_rate, target_sample_rate)
+
+
+def _decode_with_av(data, sample_rate):
+    """Decode compressed formats libsndfile cannot read (m4a/AAC) from memory with PyAV"""
+    import av
+
+    chunks = []
+    try:
+        with av.open(io.BytesIO(data)) as container:
+            # A rate of None keeps the stream's own rate
+            resampler = av.AudioResampler(format='flt', layout='mono', rate=sample_rate)
+            for frame in container.decode(audio=0):
+                for resampled in resampler.resample(frame):
+                    chunks.append(resampled.to_ndarray().reshape(-1))
+                    sample_rate = resampled.sample_rate
+            # Flush whatever the resampler is still holding
+            for resampled in resampler.resample(None):
+                chunks.append(resampled.to_ndarray().reshape(-1))
+    except av.error.FFmpegError as e:
+        raise ValueError(f"Could not decode audio: {e}")
+
+    if not chunks:
+        raise ValueError("Audio payload contains no samples")
+    return np.concatenate(chunks).astype(np.float32, copy=False), sample_rate
+
+
+def _decode_with_tempfile(data, sample_rate):
+    """Last resort without PyAV: hand librosa a temporary file so audioread can reach ffmpeg"""
+    import librosa
+
+    logger.warning("PyAV not installed; decoding compressed audio through a temporary file")
+    with tempfile.NamedTemporaryFile() as f:
+        f.write(data)
+        f.flush()
+        return librosa.load(f.name, sr=sample_rate)
+
+
+def decode_audio_bytes(data, sample_rate=16000, timings=None):
+    """Decode an encoded audio payload held in memory to float32 mono at sample_rate, or its own rate if None
+
+    With a timings dict, seconds spent decoding and resampling are added to it.
+    Formats PyAV decodes are resampled inside the decoder and count as decode.
+    """
+    if not data:
+        raise ValueError("Empty audio payload")
+
+    with timing(timings, "decode"):
+        try:
+            audio, orig_sample_rate = sf.read(io.BytesIO(data), dtype='float32', always_2d=True)
+        except (RuntimeError, sf.LibsndfileError):
+            try:
+                return _decode_with_av(data, sample_rate)
+            except ImportError:
+                return _decode_with_tempfile(data, sample_rate)
+
+        audio = audio.mean(axis=1) if audio.shape[1] > 1 else audio[:, 0]
+    if sample_rate is None:
+        sample_rate = orig_sample_rate
+    elif orig_sample_rate != sample_rate:
+        with timing(timings, "resample"):
+            audio = resample_audio(audio, orig_sample_rate, sample_rate)
+    return np.ascontiguousarray(audio, dtype=np.float32), sample_rate
+
+
+def decode_pcm16(data, sample_rate=16000, target_sample_rate=16000):
+    """Convert raw little-endian 16-bit mono PCM to float32 at target_sample_rate"""
+    usable = len(data) - len(data) % 2
+    audio = np.frombuffer(data[:usable], dtype='<i2').astype(np.float32) / 32768.0
+    return resample_audio(audio, sample_rate, target_sample_rate)
+
+
+class OpusDecoder:
+    """Stateful decoder for one stream of raw Opus packets"""
+
+    def __init__(self, sample_rate=16000):
+        import av
+        self._av = av
+        self._codec = av.CodecContext.create('opus', 'r')
+        self._codec.layout = 'mono'
+        self._resampler = av.AudioResampler(format='flt', layout='mono', rate=sample_rate)
+
+    def decode(self, packet):
+        chunks = []
+        try:
+            for frame in self._codec.decode(self._av.Packet(packet)):
+                for resampled in self._resampler.resample(frame):
+                    chunks.append(resampled.to_ndarray().reshape(-1))
+        except self._av.error.FFmpegError as e:
+            raise ValueError(f"Could not decode Opus packet: {e}")
+        if not chunks:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(chunks).astype(np.float32, copy=False)
+
+
+class AudioClip:
+    """One request's audio, decoded once at its own rate, with derived forms made on first use
+
+    Forms are memoized, so every stage shares the 16 kHz mono, the 48 kHz int16 that
+    RNNoise takes, the ASR input and the speaker reference instead of redoing the work.
+    Accessors take the calling stage's timings dict, so whichever stage computes a form
+    is the one its resampling time is recorded for.
+    """
+
+    def __init__(self, samples, sample_rate):
+        self.samples = np.ascontiguousarray(samples, dtype=np.float32)
+        self.sample_rate = sample_rate
+        self._derived = {}
+        self._temp_files = []
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_bytes(cls, data, timings=None):
+        return cls(*decode_audio_bytes(data, None, timings))
+
+    @classmethod
+    def from_file(cls, path, timings=None):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read(), timings)
+
+    @property
+    def duration(self):
+        return len(self.samples) / self.sample_rate
+
+    def derived(self, name, compute):
+        """The form called name, computed by compute() on first use"""
+        with self._lock:
+            if name not in self._derived:
+                self._derived[name] = compute()
+            return self._derived[name]
+
+    def resampled(self, sample_rate, timings=None):
+        """Float32 mono at sample_rate"""
+        def compute():
+            with timing(timings, "resample"):
+                return resample_audio(self.samples, self.sample_rate, sample_rate)
+        return self.derived(f"mono_{sample_rate}", compute)
+
+    def mono_16k(self, timings=None):
+        return self.resampled(16000, timings)
+
+    def pcm_48k(self, timings=None):
+        """Int16 at 48 kHz, what RNNoise works on, resampled straight from the source"""
+        def compute():
+            with timing(timings, "resample"):
+                audio_48k = resample_audio(self.samples, self.sample_rate, RNNOISE_SAMPLE_RATE)
+                return (np.clip(audio_48k, -1.0, 1.0) * 32767).astype(np.int16)
+        return self.derived("pcm_48k", compute)
+
+    def voice_reference(self, max_seconds, timings=None):
+        """The first max_seconds of the raw audio at VOICE_SAMPLE_RATE, for speaker conditioning"""
+        def compute():
+            with timing(timings, "resample"):
+                head = self.samples[:int(max_seconds * self.sample_rate)]
+                return resample_audio(head, self.sample_rate, VOICE_SAMPLE_RATE)
+        return self.derived(f"voice_{max_seconds}", compute)
+
+    def voice_reference_path(self, max_seconds, timings=None):
+        """voice_reference written to a WAV file, since XTTS only takes paths; close() deletes it"""
+        def compute():
+            fd, path = tempfile.mkstemp(prefix="voice_", suffix=".wav")
+            os.close(fd)
+            self._temp_files.append(path)
+            sf.write(path, self.voice_reference(max_seconds, timings), VOICE_SAMPLE_RATE)
+            return path
+        return self.derived(f"voice_path_{max_seconds}", compute)
+
+    def release(self, *names):
+        """Drop derived forms no later stage needs"""
+        with self._lock:
+            for name in names:
+                self._derived.pop(name, None)
+
+    def trim(self, max_seconds):
+        """Keep only the head of the audio that speaker references come from, and the voice forms"""
+        with self._lock:
+            self.samples = self.samples[:int(max_seconds * self.sample_rate)].copy()
+            self._derived = {name: value for name, value in self._derived.items() if name.startswith("voice_")}
+
+    def close(self):
+        """Delete temporary files written for derived forms"""
+        with self._lock:
+            for path in self._temp_files:
+                if os.path.exists(path):
+                    os.remove(path)
+            self._temp_files = []
+            self._derived = {name: value for name, value in self._derived.items() if not name.startswith("voice_path_")}
+
+
+class SpoolReader:
+    """Read side of a spool file that is still being written; reads past the written end wait for more
+
+    It deliberately has no seek, so demuxers treat it as a pipe and decode as bytes arrive.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._cond = threading.Condition()
+        self.size = 0
+        self.complete = False
+        self.aborted = False
+
+    def grow(self, size):
+        with self._cond:
+            self.size = size
+            self._cond.notify_all()
+
+    def finish(self):
+        with self._cond:
+            self.complete = True
+            self._cond.notify_all()
+
+    def abort(self):
+        with self._cond:
+            self.aborted = self.complete = True
+            self._cond.notify_all()
+
+    def wait_complete(self):
+        with self._cond:
+            while not self.complete:
+                self._cond.wait()
+        return not self.aborted
+
+    def read(self, n=-1):
+        with self._cond:
+            position = self._file.tell()
+            while position >= self.size and not self.complete:
+                self._cond.wait()
+            if self.aborted:
+                return b""
+            available = self.size - position
+        return self._file.read(available if n < 0 else min(n, available))
+
+    def close(self):
+        self._file.close()
+
+
+def decode_growing_file(reader, path, on_audio, sample_rate=16000, block_seconds=0.5, run=None, packets_per_run=32):
+    """Decode an upload while it is still arriving, passing float32 blocks at sample_rate to on_audio
+
+    Streamable formats (WAV, MP3, ADTS AAC, Ogg, fast-start MP4) decode from the first
+    bytes on. A container that needs seeking, like MP4 with its index at the end, is
+    decoded from the finished file instead. Either way one block of audio is held at a time.
+
+    Demuxing reads the reader on the calling thread; the codec and resampler work goes
+    through run(fn, *args), packets_per_run packets at a time, so a caller can move it off
+    an event loop thread.
+    """
+    if run is None:
+        run = lambda fn, *args: fn(*args)
+    try:
+        import av
+    except ImportError:
+        # Without PyAV there is no incremental decoder; decode the whole file once it is in
+        if reader.wait_complete():
+            with open(path, 'rb') as f:
+                on_audio(run(decode_audio_bytes, f.read(), sample_rate)[0])
+        return
+
+    block_size = int(block_seconds * sample_rate)
+    pending = []
+    emitted = [0]
+
+    def push(samples):
+        pending.append(samples)
+        if sum(len(p) for p in pending) >= block_size:
+            flush()
+
+    def flush():
+        if pending:
+            block = np.concatenate(pending).astype(np.float32, copy=False)
+            pending.clear()
+            emitted[0] += len(block)
+            on_audio(block)
+
+    def decode(source):
+        with av.open(source, mode='r') as container:
+            stream = container.streams.audio[0]
+            resampler = av.AudioResampler(format='flt', layout='mono', rate=sample_rate)
+
+            def decode_packets(packets, final=False):
+                # The demuxer's last, empty packet flushes the codec; None then flushes the resampler
+                frames = [frame for packet in packets for frame in packet.decode()]
+                if final:
+                    frames.append(None)
+                return [resampled.to_ndarray().reshape(-1) for frame in frames for resampled in resampler.resample(frame)]
+
+            packets = []
+            for packet in container.demux(stream):
+                packets.append(packet)
+                if len(packets) >= packets_per_run:
+                    for samples in run(decode_packets, packets):
+                        push(samples)
+                    packets = []
+            for samples in run(decode_packets, packets, True):
+                push(samples)
+        flush()
+
+    try:
+        decode(reader)
+    except av.error.FFmpegError as e:
+        if emitted[0] or pending:
+            raise ValueError(f"Could not decode audio: {e}")
+        if not reader.wait_complete():
+            return
+        logger.info(f"Upload is not streamable ({e}); decoding it now that it is complete")
+        try:
+            decode(path)
+        except av.error.FFmpegError as e:
+            raise ValueError(f"Could not decode audio: {e}")
@@ -0,0 +1,21 @@
+import queue
+import time
+
+
+def drain_batch(source_queue, max_batch_size, max_wait_ms):
+    """Block for one item, then collect up to max_batch_size items or until max_wait_ms has passed"""
+    batch = [source_queue.get()]
+    deadline = time.monotonic() + max_wait_ms / 1000.0
+
+    while len(batch) < max_batch_size:
+        remaining = deadline - time.monotonic()
+        try:
+            if remaining <= 0:
+                # Take whatever is already waiting, but do not block any longer
+                batch.append(source_queue.get_nowait())
+            else:
+                batch.append(source_queue.get(timeout=remaining))
+        except queue.Empty:
+            break
+
+    return batch
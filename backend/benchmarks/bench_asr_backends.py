@@ -0,0 +1,94 @@
+"""Real-time factor and WER drift of the int8 and ONNX ASR backends against full-precision torch
+
+Transcribes every recording with each backend. WER is measured against --references
+(JSON of filename -> text) when given, otherwise against the torch backend's output,
+which shows how far quantization or export drifts from the original model.
+Usage: python benchmarks/bench_asr_backends.py [--audio uploads/*.m4a] [--backends torch int8 onnx] [--runs 3]
+"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import asr_engine
+from audio_io import decode_audio_bytes
+
+
+def word_errors(reference, hypothesis):
+    """Word-level edit distance and reference length"""
+    ref, hyp = reference.lower().split(), hypothesis.lower().split()
+    row = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        previous, row[0] = row[0], i
+        for j, hyp_word in enumerate(hyp, 1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + (ref_word != hyp_word))
+    return row[-1], len(ref)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--audio", nargs="+", default=sorted(glob.glob(os.path.join(BACKEND_DIR, "uploads", "*"))))
+    parser.add_argument("--backends", nargs="+", default=list(asr_engine.ASR_BACKENDS))
+    parser.add_argument("--references", default=None, help="JSON file mapping recording filename to reference text")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--cache-dir", default=os.path.join(BACKEND_DIR, "model_cache"))
+    args = parser.parse_args()
+
+    clips = {}
+    for path in args.audio:
+        with open(path, 'rb') as f:
+            clips[os.path.basename(path)] = decode_audio_bytes(f.read())[0]
+    if not clips:
+        parser.error("No recordings found; pass --audio")
+    total_seconds = sum(len(audio) for audio in clips.values()) / 16000
+
+    references = None
+    if args.references:
+        with open(args.references) as f:
+            references = json.load(f)
+
+    results = []
+    for backend in args.backends:
+        start = time.perf_counter()
+        processor, model = asr_engine.load(args.cache_dir, backend=backend)
+        load_seconds = time.perf_counter() - start
+        asr_engine.warmup((processor, model))
+
+        timings = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            texts = {name: asr_engine.transcribe(processor, model, [audio])[0] for name, audio in clips.items()}
+            timings.append(time.perf_counter() - start)
+
+        if references is None and backend == args.backends[0]:
+            references = texts
+        errors = words = 0
+        for name, text in texts.items():
+            if name in references:
+                e, n = word_errors(references[name], text)
+                errors, words = errors + e, words + n
+
+        row = {
+            "backend": backend,
+            "load_s": round(load_seconds, 2),
+            "rtf": round(float(np.median(timings)) / total_seconds, 4),
+            "wer": round(errors / max(1, words), 4),
+            "wer_reference": "references" if args.references else args.backends[0],
+            "recordings": len(clips),
+            "audio_seconds": round(total_seconds, 1)
+        }
+        results.append(row)
+        print(json.dumps(row))
+        del model
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""CPU throughput and latency of the Parakeet CTC model at different batch sizes
+
+Usage: python benchmarks/bench_asr_batching.py [--batch-sizes 1 2 4 8 16] [--seconds 5] [--threads 4]
+Needs the packages from requirements.txt and downloads the model into model_cache/ on first run.
+"""
+import os
+import json
+import time
+import argparse
+
+import numpy as np
+import torch
+
+MODEL_NAME = "nvidia/parakeet-ctc-0.6b-asr"
+MODEL_CACHE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "model_cache")
+SAMPLE_RATE = 16000
+
+
+def synthetic_clips(count, seconds, rng):
+    """Clips of slightly different lengths so padding and masking are exercised"""
+    clips = []
+    for _ in range(count):
+        length = int(SAMPLE_RATE * seconds * rng.uniform(0.7, 1.0))
+        clips.append((0.05 * rng.standard_normal(length)).astype(np.float32))
+    return clips
+
+
+def run_batch(model, processor, clips):
+    inputs = processor(clips, sampling_rate=SAMPLE_RATE, padding=True, return_attention_mask=True, return_tensors="pt")
+    with torch.no_grad():
+        predicted_ids = model.generate(inputs.input_features, attention_mask=inputs.attention_mask)
+    return processor.batch_decode(predicted_ids, skip_special_tokens=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--seconds", type=float, default=5.0, help="Length of each synthetic utterance")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=torch.get_num_threads())
+    args = parser.parse_args()
+
+    from transformers import AutoModelForCTC, AutoProcessor
+
+    torch.set_num_threads(args.threads)
+    processor = AutoProcessor.from_pretrained(MODEL_NAME, cache_dir=MODEL_CACHE)
+    model = AutoModelForCTC.from_pretrained(MODEL_NAME, cache_dir=MODEL_CACHE).eval()
+    rng = np.random.default_rng(0)
+
+    # Warm up kernels before timing anything
+    run_batch(model, processor, synthetic_clips(1, args.seconds, rng))
+
+    results = []
+    for batch_size in args.batch_sizes:
+        latencies = []
+        audio_seconds = 0.0
+        for _ in range(args.repeats):
+            clips = synthetic_clips(batch_size, args.seconds, rng)
+            audio_seconds += sum(len(clip) for clip in clips) / SAMPLE_RATE
+            start = time.perf_counter()
+            run_batch(model, processor, clips)
+            latencies.append(time.perf_counter() - start)
+
+        total_time = sum(latencies)
+        row = {
+            "batch_size": batch_size,
+            "threads": args.threads,
+            "utterances_per_sec": round(batch_size * args.repeats / total_time, 2),
+            "batch_latency_p50_s": round(float(np.percentile(latencies, 50)), 3),
+            "batch_latency_max_s": round(max(latencies), 3),
+            "real_time_factor": round(total_time / audio_seconds, 4),
+        }
+        results.append(row)
+        print(json.dumps(row))
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
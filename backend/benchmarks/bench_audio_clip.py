@@ -0,0 +1,134 @@
+"""CPU time per request of the audio path before and after decoding once into an AudioClip
+
+The old path decoded to 16 kHz, resampled to 48 kHz and back around RNNoise, and wrote a
+16 kHz speaker reference that XTTS read back and resampled to 22.05 kHz; transcribe_audio
+also loaded the file with librosa, and XTTS read the whole upload again. The new path
+decodes once at the source rate and derives 48 kHz int16, 16 kHz and a 22.05 kHz
+reference from it. Model time (RNN, ASR, speaker encoder) is the same in both and left out.
+
+Usage: python benchmarks/bench_audio_clip.py [--seconds 20] [--repeats 5] [--sample-rates 16000 44100 48000] [--files a.m4a ...]
+Uses rnnoiseasm when installed; otherwise a pass-through processor, like bench_denoise.py.
+"""
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from audio_io import AudioClip, decode_audio_bytes, resample_audio, VOICE_SAMPLE_RATE
+from denoise import denoise, denoise_pcm48k, RNNOISE_SAMPLE_RATE
+from bench_denoise import make_processor
+
+VOICE_SECONDS = 30
+
+
+def xtts_load(path):
+    """What XTTS does with a speaker reference path: read it and resample to 22.05 kHz"""
+    import librosa
+    audio, sample_rate = sf.read(path, dtype='float32')
+    if sample_rate != VOICE_SAMPLE_RATE:
+        audio = librosa.resample(audio, orig_sr=sample_rate, target_sr=VOICE_SAMPLE_RATE)
+    return audio
+
+
+def old_upload(payload, processor):
+    """decode_stage, denoise_stage and the TTS voice reference as they were"""
+    audio, sample_rate = decode_audio_bytes(payload)
+    voice_audio = audio[:int(VOICE_SECONDS * sample_rate)].copy()
+    asr_input = denoise(audio, sample_rate, processor)
+    fd, voice_path = tempfile.mkstemp(suffix=".wav")
+    os.close(fd)
+    sf.write(voice_path, voice_audio, sample_rate)
+    xtts_load(voice_path)
+    os.remove(voice_path)
+    return asr_input
+
+
+def old_file(payload, processor):
+    """transcribe_audio on a file as it was: librosa.load, denoise, then XTTS reading the upload itself"""
+    import librosa
+    fd, path = tempfile.mkstemp(suffix=".wav")
+    os.close(fd)
+    with open(path, 'wb') as f:
+        f.write(payload)
+    audio, sample_rate = librosa.load(path, sr=16000)
+    asr_input = denoise(audio, sample_rate, processor)
+    librosa.load(path, sr=VOICE_SAMPLE_RATE)
+    os.remove(path)
+    return asr_input
+
+
+def new_clip(payload, processor):
+    """The same work through one AudioClip"""
+    clip = AudioClip.from_bytes(payload)
+    denoised = denoise_pcm48k(clip.pcm_48k(), processor)
+    asr_input = resample_audio(denoised, RNNOISE_SAMPLE_RATE, 16000)
+    clip.release("pcm_48k")
+    clip.trim(VOICE_SECONDS)
+    sf.read(clip.voice_reference_path(VOICE_SECONDS), dtype='float32')  # XTTS reads it without resampling
+    clip.close()
+    return asr_input
+
+
+def cpu_seconds(fn, payload, processor, repeats):
+    fn(payload, processor)  # Warm up filters and imports
+    start = time.process_time()
+    for _ in range(repeats):
+        fn(payload, processor)
+    return (time.process_time() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--sample-rates", type=int, nargs="+", default=[16000, 44100, 48000])
+    parser.add_argument("--files", nargs="*", default=[], help="Real recordings to measure as well")
+    args = parser.parse_args()
+
+    processor = make_processor()
+    rng = np.random.default_rng(0)
+    inputs = []
+    for sample_rate in args.sample_rates:
+        audio = (0.1 * rng.standard_normal(int(sample_rate * args.seconds))).astype(np.float32)
+        buffer = io.BytesIO()
+        sf.write(buffer, audio, sample_rate, format='WAV')
+        inputs.append((f"wav_{sample_rate}", buffer.getvalue()))
+    for path in args.files:
+        with open(path, 'rb') as f:
+            inputs.append((os.path.basename(path), f.read()))
+
+    results = []
+    for name, payload in inputs:
+        new = cpu_seconds(new_clip, payload, processor, args.repeats)
+        for old_name, old_fn in (("old_upload", old_upload), ("old_file", old_file)):
+            try:
+                old = cpu_seconds(old_fn, payload, processor, args.repeats)
+            except Exception as e:
+                # librosa.load needs an ffmpeg backend for formats libsndfile cannot read
+                print(json.dumps({"input": name, "baseline": old_name, "skipped": f"{type(e).__name__}: {e}"}))
+                continue
+            row = {
+                "input": name,
+                "baseline": old_name,
+                "processor": type(processor).__name__,
+                "old_cpu_ms": round(old * 1000, 1),
+                "new_cpu_ms": round(new * 1000, 1),
+                "saved_cpu_ms": round((old - new) * 1000, 1),
+                "saved_percent": round(100 * (old - new) / old, 1) if old else None
+            }
+            results.append(row)
+            print(json.dumps(row))
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Cold start of the server: time until /health answers, until each model is ready, and to the first transcription
+
+Starts app.py in a subprocess, uploads a clip straight away and polls for its transcription.
+Usage: python benchmarks/bench_cold_start.py [--audio clip.wav] [--port 5055] [--timeout 900]
+"""
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+import numpy as np
+import requests
+import soundfile as sf
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_for(check, timeout, interval=0.2):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = check()
+        if result:
+            return result
+        time.sleep(interval)
+    raise TimeoutError("Timed out")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--audio", default=None, help="Clip to transcribe (defaults to 3 s of noise)")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--timeout", type=float, default=900)
+    args = parser.parse_args()
+
+    if args.audio:
+        with open(args.audio, 'rb') as f:
+            payload = f.read()
+    else:
+        buffer = io.BytesIO()
+        sf.write(buffer, 0.05 * np.random.default_rng(0).standard_normal(48000), 16000, format='WAV')
+        payload = buffer.getvalue()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    start = time.monotonic()
+    server = subprocess.Popen(
+        [sys.executable, "-c", f"from app import app, socketio; socketio.run(app, port={args.port}, allow_unsafe_werkzeug=True)"],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        def health():
+            try:
+                return requests.get(f"{base_url}/health", timeout=1).json()
+            except requests.RequestException:
+                return None
+
+        wait_for(health, args.timeout)
+        health_seconds = time.monotonic() - start
+
+        response = requests.post(f"{base_url}/api/upload", files={"file": ("clip.wav", payload)}).json()
+        session_id = response["session_id"]
+
+        def transcription():
+            result = requests.get(f"{base_url}/api/transcription/{session_id}").json()
+            return result if "transcription" in result or "error" in result else None
+
+        result = wait_for(transcription, args.timeout)
+        first_transcription_seconds = time.monotonic() - start
+        status = health()
+
+        report = {
+            "health_seconds": round(health_seconds, 2),
+            "first_transcription_seconds": round(first_transcription_seconds, 2),
+            "transcription_ok": "error" not in result,
+            "server_milestones": status.get("startup_seconds"),
+            "models": status.get("model_details"),
+        }
+        print(json.dumps(report, indent=2))
+        return report
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
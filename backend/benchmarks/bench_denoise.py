@@ -0,0 +1,86 @@
+"""Denoise cost per second of audio: old whole-clip path against framed RNNoise with cached resamplers
+
+Usage: python benchmarks/bench_denoise.py [--seconds 10] [--repeats 5]
+Uses rnnoiseasm when installed; otherwise a pass-through processor, which isolates
+the resampling and framing overhead around the RNN.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from denoise import denoise, StreamDenoiser
+
+
+class PassThroughProcessor:
+    def process_frame(self, frame):
+        return frame
+
+
+def make_processor():
+    try:
+        import rnnoiseasm
+        return rnnoiseasm.RNNoiseProcessor()
+    except ImportError:
+        return PassThroughProcessor()
+
+
+def old_process_audio(audio, sample_rate, processor):
+    """The previous process_audio: librosa resample to 48 kHz, one process_frame call, no resample back"""
+    import librosa
+    audio_48k = librosa.resample(audio, orig_sr=sample_rate, target_sr=48000)
+    audio_pcm = (audio_48k * 32767).astype(np.int16)
+    return processor.process_frame(audio_pcm).astype(np.float32) / 32767.0
+
+
+def new_streaming(audio, sample_rate, processor, chunk_seconds=1.0):
+    denoiser = StreamDenoiser(processor, sample_rate)
+    chunk = int(chunk_seconds * sample_rate)
+    parts = [denoiser.process(audio[i:i + chunk]) for i in range(0, len(audio), chunk)]
+    parts.append(denoiser.process(np.zeros(0, dtype=np.float32), final=True))
+    return np.concatenate(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--sample-rates", type=int, nargs="+", default=[16000, 44100])
+    args = parser.parse_args()
+
+    processor = make_processor()
+    rng = np.random.default_rng(0)
+    variants = (
+        ("old_whole_clip", old_process_audio),
+        ("new_framed", lambda audio, sr, p: denoise(audio, sr, p)),
+        ("new_streaming_1s_chunks", new_streaming),
+    )
+
+    results = []
+    for sample_rate in args.sample_rates:
+        audio = (0.1 * rng.standard_normal(int(sample_rate * args.seconds))).astype(np.float32)
+        for name, fn in variants:
+            fn(audio[:sample_rate], sample_rate, processor)  # Warm up caches and filters
+            start = time.perf_counter()
+            for _ in range(args.repeats):
+                fn(audio, sample_rate, processor)
+            elapsed = (time.perf_counter() - start) / args.repeats
+            row = {
+                "variant": name,
+                "sample_rate": sample_rate,
+                "processor": type(processor).__name__,
+                "ms_per_audio_second": round(elapsed * 1000 / args.seconds, 3),
+            }
+            results.append(row)
+            print(json.dumps(row))
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
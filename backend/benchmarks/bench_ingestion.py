@@ -0,0 +1,80 @@
+"""Requests/sec and latency of in-memory audio ingestion against the old save-then-read path
+
+Usage: python benchmarks/bench_ingestion.py [--requests 2000] [--concurrency 1 4 16] [--seconds 5]
+"""
+import os
+import io
+import sys
+import json
+import time
+import uuid
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_io import decode_audio_bytes
+
+
+def file_ingest(payload, upload_folder):
+    """What /api/stream used to do: save the upload, read it back, clean up"""
+    path = os.path.join(upload_folder, f"{uuid.uuid4()}.wav")
+    with open(path, 'wb') as f:
+        f.write(payload)
+    audio, sample_rate = sf.read(path, dtype='float32')
+    os.remove(path)
+    return audio, sample_rate
+
+
+def memory_ingest(payload, upload_folder):
+    return decode_audio_bytes(payload)
+
+
+def run(ingest, payload, upload_folder, requests, concurrency):
+    def timed(_):
+        start = time.perf_counter()
+        ingest(payload, upload_folder)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, range(requests)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests_per_sec": round(requests / elapsed, 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--seconds", type=float, default=5.0, help="Length of the uploaded clip")
+    parser.add_argument("--upload-folder", default=None, help="Directory for the file-based path (defaults to a temp dir)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    buffer = io.BytesIO()
+    sf.write(buffer, 0.1 * rng.standard_normal(int(16000 * args.seconds)), 16000, format='WAV', subtype='PCM_16')
+    payload = buffer.getvalue()
+
+    results = []
+    with tempfile.TemporaryDirectory(dir=args.upload_folder) as upload_folder:
+        for concurrency in args.concurrency:
+            for name, ingest in (("file", file_ingest), ("memory", memory_ingest)):
+                row = {"path": name, "concurrency": concurrency}
+                row.update(run(ingest, payload, upload_folder, args.requests, concurrency))
+                results.append(row)
+                print(json.dumps(row))
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
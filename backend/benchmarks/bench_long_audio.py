@@ -0,0 +1,117 @@
+"""Peak memory and latency of long-audio transcription: one whole-clip pass vs VAD segments in batches
+
+Each mode runs in a fresh process so peak RSS is not shared between them. Without --audio,
+the input is synthetic speech-like bursts separated by pauses.
+Usage: python benchmarks/bench_long_audio.py [--minutes 10] [--audio long.wav] [--max-segment-seconds 30] [--vad-only]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from vad import speech_segments
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load_input(args):
+    if args.audio:
+        from audio_io import decode_audio_bytes
+        with open(args.audio, 'rb') as f:
+            return decode_audio_bytes(f.read())[0]
+    rng = np.random.default_rng(0)
+    parts, total = [], 0
+    while total < args.minutes * 60 * 16000:
+        pause = 0.003 * rng.standard_normal(int(rng.uniform(0.3, 2.5) * 16000))
+        count = int(rng.uniform(1.0, 12.0) * 16000)
+        burst = 0.1 * rng.standard_normal(count) * np.abs(np.sin(np.arange(count) / 1600))
+        parts += [pause, burst]
+        total += len(pause) + count
+    return np.concatenate(parts).astype(np.float32)
+
+
+def run_child(args):
+    import asr_engine
+
+    audio = load_input(args)
+    processor, model = asr_engine.load(os.path.join(BACKEND_DIR, "model_cache"), backend=args.backend)
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    if args.child == "single":
+        text = asr_engine.transcribe(processor, model, [audio])[0]
+        segments = 1
+    else:
+        bounds = speech_segments(audio, max_segment_seconds=args.max_segment_seconds)
+        chunks = sorted((audio[s:e] for s, e in bounds), key=len)
+        texts = []
+        for i in range(0, len(chunks), args.batch_size):
+            texts += asr_engine.transcribe(processor, model, chunks[i:i + args.batch_size])
+        text = " ".join(texts)
+        segments = len(bounds)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "mode": args.child,
+        "audio_minutes": round(len(audio) / 16000 / 60, 2),
+        "segments": segments,
+        "latency_s": round(elapsed, 2),
+        "rtf": round(elapsed / (len(audio) / 16000), 4),
+        "peak_rss_over_model_mb": round(peak_rss_mb() - baseline, 1),
+        "words": len(text.split())
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=float, default=10.0)
+    parser.add_argument("--audio", default=None)
+    parser.add_argument("--max-segment-seconds", type=float, default=30.0)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--backend", default="torch")
+    parser.add_argument("--vad-only", action="store_true", help="Only time the segmentation itself")
+    parser.add_argument("--child", choices=["single", "segmented"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return run_child(args)
+
+    if args.vad_only:
+        audio = load_input(args)
+        start = time.perf_counter()
+        bounds = speech_segments(audio, max_segment_seconds=args.max_segment_seconds)
+        row = {
+            "audio_minutes": round(len(audio) / 16000 / 60, 2),
+            "vad_ms": round((time.perf_counter() - start) * 1000, 1),
+            "segments": len(bounds),
+            "longest_segment_s": round(max(e - s for s, e in bounds) / 16000, 2),
+            "speech_fraction": round(sum(e - s for s, e in bounds) / len(audio), 3)
+        }
+        print(json.dumps(row))
+        return [row]
+
+    results = []
+    for mode in ("single", "segmented"):
+        output = subprocess.run([sys.executable, __file__, "--child", mode] + sys.argv[1:],
+                                capture_output=True, text=True)
+        if output.returncode != 0:
+            row = {"mode": mode, "error": output.stderr.strip().splitlines()[-1:]}
+        else:
+            row = json.loads(output.stdout.strip().splitlines()[-1])
+        results.append(row)
+        print(json.dumps(row))
+    return results
+
+
+if __name__ == "__main__":
+    main()
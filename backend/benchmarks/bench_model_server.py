@@ -0,0 +1,64 @@
+"""ASR throughput of the model server as worker processes go from 1 to N
+
+Usage: python benchmarks/bench_model_server.py [--processes 1 2 4] [--torch-threads 1] [--requests 32] [--seconds 5]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_server import ModelServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--torch-threads", type=int, default=1, help="Intra-op threads per worker process")
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5.0, help="Length of each clip")
+    parser.add_argument("--engine", default="asr_engine")
+    parser.add_argument("--cache-dir", default="model_cache")
+    args = parser.parse_args()
+
+    clip = (0.1 * np.random.default_rng(0).standard_normal(int(16000 * args.seconds))).astype(np.float32)
+    payload = {"audio_arrays": [clip], "sample_rate": 16000}
+
+    results = []
+    baseline = None
+    for processes in args.processes:
+        server = ModelServer("asr", args.engine, processes=processes, torch_threads=args.torch_threads,
+                             load_kwargs={"cache_dir": os.path.abspath(args.cache_dir)})
+        startup = time.perf_counter()
+        server.start()
+        startup = time.perf_counter() - startup
+        try:
+            start = time.perf_counter()
+            futures = [server.submit("transcribe", payload) for _ in range(args.requests)]
+            for future in futures:
+                future.result()
+            elapsed = time.perf_counter() - start
+        finally:
+            server.stop()
+
+        throughput = args.requests / elapsed
+        baseline = baseline or throughput
+        row = {
+            "processes": processes,
+            "torch_threads": args.torch_threads,
+            "startup_s": round(startup, 2),
+            "clips_per_sec": round(throughput, 2),
+            "audio_seconds_per_sec": round(throughput * args.seconds, 2),
+            "speedup": round(throughput / baseline, 2)
+        }
+        results.append(row)
+        print(json.dumps(row))
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Lookup latency of SessionStore as the number of stored sessions grows
+
+Usage: python benchmarks/bench_session_store.py [--sizes 1000 10000 100000] [--lookups 2000]
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_store import SessionStore
+
+
+def sample_result(session_id):
+    return {
+        "transcription": "Hi, hello, can you hear me? I am talking.",
+        "transcription_id": session_id,
+        "duration": 3.0,
+        "processing_time": 1.18,
+        "tts_audio": f"tts_{session_id}.wav",
+        "tts_audio_url": f"/api/tts/tts_{session_id}.wav",
+    }
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def time_lookups(store, keys):
+    timings = []
+    for key in keys:
+        start = time.perf_counter()
+        store.get(key)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--cache-size", type=int, default=1024)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SessionStore(os.path.join(tmp, "sessions.db"), cache_size=args.cache_size)
+        session_ids = []
+        for size in sorted(args.sizes):
+            batch = [str(uuid.uuid4()) for _ in range(size - len(session_ids))]
+            with store._lock:
+                store._conn.executemany(
+                    "INSERT INTO sessions (session_id, data, source_file, updated_at) VALUES (?, ?, ?, ?)",
+                    [(sid, json.dumps(sample_result(sid)), None, time.time()) for sid in batch]
+                )
+                store._conn.commit()
+            session_ids.extend(batch)
+
+            cold_keys = random.sample(session_ids, min(args.lookups, len(session_ids)))
+            store._cache.clear()
+            cold = time_lookups(store, cold_keys)
+            warm = time_lookups(store, cold_keys[-args.cache_size:])
+            missing = time_lookups(store, [str(uuid.uuid4()) for _ in range(args.lookups)])
+
+            row = {
+                "sessions": size,
+                "index_p50_us": round(percentile(cold, 50), 1),
+                "index_p99_us": round(percentile(cold, 99), 1),
+                "cached_p50_us": round(percentile(warm, 50), 1),
+                "missing_p50_us": round(percentile(missing, 50), 1),
+            }
+            results.append(row)
+            print(json.dumps(row))
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Connection capacity and socket latency of the threading and eventlet server modes
+
+For each mode, starts benchmarks/serve_stub.py, opens --sockets Socket.IO connections and
+measures connect time and the round trip of a subscribe/subscribed exchange. Round trips
+are measured with the server idle and again while --uploads concurrent uploads keep the
+pipeline busy, which shows whether inference stalls socket I/O. Also reports the server's
+RSS and OS thread count. Opening 1k connections needs a matching ulimit -n on both ends.
+
+Usage: python benchmarks/bench_sockets.py [--modes threading eventlet] [--sockets 1000] [--probes 200] [--uploads 8]
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import socketio
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load_test import speech_like, wav_bytes, percentiles
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class ProbeClient:
+    def __init__(self, url):
+        self.sio = socketio.Client(reconnection=False)
+        self.waiting = {}
+        self.sio.on('subscribed', self._subscribed)
+        start = time.perf_counter()
+        self.sio.connect(url, wait_timeout=30)
+        self.connect_time = time.perf_counter() - start
+
+    def _subscribed(self, data):
+        event = self.waiting.get(data.get("session_id"))
+        if event is not None:
+            event.set()
+
+    def round_trip(self, timeout=30):
+        session_id = str(uuid.uuid4())
+        done = self.waiting[session_id] = threading.Event()
+        start = time.perf_counter()
+        self.sio.emit('subscribe', {"session_id": session_id})
+        ok = done.wait(timeout)
+        del self.waiting[session_id]
+        return time.perf_counter() - start if ok else None
+
+
+def process_stats(pid):
+    """RSS in MB and OS thread count of a process, from /proc"""
+    stats = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    stats["rss_mb"] = round(int(line.split()[1]) / 1024, 1)
+                elif line.startswith("Threads:"):
+                    stats["threads"] = int(line.split()[1])
+    except OSError:
+        pass
+    return stats
+
+
+def _try_connect(url):
+    try:
+        return ProbeClient(url)
+    except Exception:
+        return None
+
+
+def probe(clients, count):
+    latencies = []
+    failures = 0
+    with ThreadPoolExecutor(32) as pool:
+        for rtt in pool.map(lambda client: client.round_trip(), random.choices(clients, k=count)):
+            if rtt is None:
+                failures += 1
+            else:
+                latencies.append(rtt)
+    return dict(percentiles(latencies), failures=failures)
+
+
+def run_mode(mode, args):
+    url = f"http://127.0.0.1:{args.port}"
+    env = dict(os.environ, SERVER_MODE=mode)
+    server = subprocess.Popen([sys.executable, os.path.join(BENCH_DIR, "serve_stub.py"), "--port", str(args.port)],
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    clients = []
+    try:
+        deadline = time.time() + 180
+        while True:
+            try:
+                models = requests.get(f"{url}/health", timeout=2).json()["models"]
+                if models["asr_model"] == "loaded" and models["tts_model"] == "loaded":
+                    break
+            except requests.RequestException:
+                pass
+            if time.time() > deadline or server.poll() is not None:
+                raise RuntimeError(f"{mode} server did not become ready")
+            time.sleep(0.5)
+
+        connect_failures = 0
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.connect_concurrency) as pool:
+            for client in pool.map(lambda _: _try_connect(url), range(args.sockets)):
+                if client is None:
+                    connect_failures += 1
+                else:
+                    clients.append(client)
+        connect_elapsed = time.perf_counter() - start
+        if not clients:
+            raise RuntimeError(f"No socket could connect in {mode} mode")
+
+        idle = probe(clients, args.probes)
+
+        # Keep the pipeline busy with uploads while probing again
+        payload = wav_bytes(speech_like(args.upload_seconds))
+        stop = threading.Event()
+
+        def upload_loop():
+            session = requests.Session()
+            while not stop.is_set():
+                try:
+                    session.post(f"{url}/api/upload", files={"file": ("audio.wav", payload, "audio/wav")}, timeout=60)
+                except requests.RequestException:
+                    pass
+
+        uploaders = [threading.Thread(target=upload_loop, daemon=True) for _ in range(args.uploads)]
+        for uploader in uploaders:
+            uploader.start()
+        time.sleep(2)
+        busy = probe(clients, args.probes)
+        stop.set()
+
+        row = {
+            "mode": mode,
+            "sockets": args.sockets,
+            "connected": len(clients),
+            "connect_failures": connect_failures,
+            "connect_rate_per_s": round(len(clients) / connect_elapsed, 1),
+            "connect_time_s": percentiles([client.connect_time for client in clients]),
+            "round_trip_idle_s": idle,
+            "round_trip_busy_s": busy,
+            "server": process_stats(server.pid)
+        }
+        print(json.dumps(row))
+        return row
+    finally:
+        for client in clients:
+            try:
+                client.sio.disconnect()
+            except Exception:
+                pass
+        server.terminate()
+        server.wait(30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", nargs="+", choices=["threading", "eventlet"], default=["threading", "eventlet"])
+    parser.add_argument("--sockets", type=int, default=1000)
+    parser.add_argument("--connect-concurrency", type=int, default=50)
+    parser.add_argument("--probes", type=int, default=200)
+    parser.add_argument("--uploads", type=int, default=8, help="Concurrent uploads while probing under load")
+    parser.add_argument("--upload-seconds", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=5098)
+    args = parser.parse_args()
+    return [run_mode(mode, args) for mode in args.modes]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Time-to-first-audio of sentence-chunked TTS against synthesizing the whole transcript first
+
+Usage: python benchmarks/bench_tts_streaming.py [--voice sample.wav] [--runs 3]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tts_stream import split_sentences
+
+DEFAULT_TEXT = (
+    "Thanks for getting in touch. I checked your order this morning and it left the warehouse yesterday. "
+    "It should arrive by Thursday. If it does not, reply to this message and we will send a replacement."
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--voice", default=None, help="Reference clip to clone (default voice if omitted)")
+    parser.add_argument("--text", default=DEFAULT_TEXT)
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    from TTS.api import TTS
+    tts = TTS("tts_models/multilingual/multi-dataset/xtts_v2")
+    sentences = split_sentences(args.text)
+
+    full, first, total = [], [], []
+    with tempfile.TemporaryDirectory() as out_dir:
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            tts.tts_to_file(args.text, speaker_wav=args.voice, language=args.language,
+                            file_path=os.path.join(out_dir, "full.wav"))
+            full.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for index, sentence in enumerate(sentences):
+                tts.tts(sentence, speaker_wav=args.voice, language=args.language)
+                if index == 0:
+                    first.append(time.perf_counter() - start)
+            total.append(time.perf_counter() - start)
+
+    results = [
+        {"mode": "whole_file", "time_to_first_audio_s": round(float(np.mean(full)), 3),
+         "total_s": round(float(np.mean(full)), 3)},
+        {"mode": "sentence_stream", "sentences": len(sentences),
+         "time_to_first_audio_s": round(float(np.mean(first)), 3), "total_s": round(float(np.mean(total)), 3)},
+    ]
+    for row in results:
+        print(json.dumps(row))
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""TTS time per request for a repeat speaker: raw speaker_wav vs cached XTTS conditioning latents
+
+Usage: python benchmarks/bench_voice_cache.py --voice sample.wav [--requests 5] [--text "Hello there"]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_io import decode_audio_bytes
+from voice_cache import VoiceConditioningCache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--voice", required=True, help="Reference clip of the speaker")
+    parser.add_argument("--requests", type=int, default=5)
+    parser.add_argument("--text", default="Thanks for calling, your order is on its way.")
+    parser.add_argument("--language", default="en")
+    args = parser.parse_args()
+
+    from TTS.api import TTS
+    tts = TTS("tts_models/multilingual/multi-dataset/xtts_v2")
+    xtts = tts.synthesizer.tts_model
+
+    with open(args.voice, 'rb') as f:
+        voice_audio, _ = decode_audio_bytes(f.read())
+    cache = VoiceConditioningCache()
+    results = []
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        out_path = os.path.join(out_dir, "out.wav")
+
+        timings = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            tts.tts_to_file(args.text, speaker_wav=args.voice, language=args.language, file_path=out_path)
+            timings.append(time.perf_counter() - start)
+        results.append({"path": "speaker_wav", "mean_s": round(float(np.mean(timings)), 3)})
+
+        timings = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            fingerprint = cache.fingerprint(voice_audio)
+            latents = cache.get(user_id="bench", fingerprint=fingerprint)
+            if latents is None:
+                latents = xtts.get_conditioning_latents(audio_path=[args.voice])
+                cache.put(latents, user_id="bench", fingerprint=fingerprint)
+            xtts.inference(args.text, args.language, *latents)
+            timings.append(time.perf_counter() - start)
+        results.append({"path": "cached_latents_first", "mean_s": round(timings[0], 3)})
+        if len(timings) > 1:
+            results.append({"path": "cached_latents_repeat", "mean_s": round(float(np.mean(timings[1:])), 3)})
+
+    saved = results[0]["mean_s"] - results[-1]["mean_s"]
+    results.append({"saved_per_repeat_request_s": round(saved, 3), "cache": cache.stats()})
+    for row in results:
+        print(json.dumps(row))
+    return results
+
+
+if __name__ == "__main__":
+    main()
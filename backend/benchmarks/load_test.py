@@ -0,0 +1,320 @@
+"""Load test of the upload -> transcribe -> TTS pipeline over HTTP and Socket.IO
+
+Drives /api/upload, /api/stream and the stream_audio socket event with concurrent virtual
+users, and reports throughput, p50/p95/p99 latency to transcription_complete and
+tts_complete, and a per-stage breakdown taken from /metrics. Without --url it starts the
+app in this process with stub ASR/TTS models (benchmarks/stub_models.py), so it runs
+offline; with --url it targets a running server with real models.
+
+Usage: python benchmarks/load_test.py [--scenarios upload stream socket] [--concurrency 4] [--requests 32]
+                                      [--seconds 5 30] [--profile profile.json] [--output results.json]
+"""
+import os
+import io
+import sys
+import json
+import time
+import uuid
+import base64
+import argparse
+import datetime
+import tempfile
+import threading
+import subprocess
+
+import numpy as np
+import requests
+import soundfile as sf
+import socketio
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE_RATE = 16000
+BREAKDOWN_METRICS = ("whisper_step_seconds", "pipeline_queue_wait_seconds", "pipeline_stage_batch_seconds")
+
+
+def speech_like(seconds, seed=0):
+    """Voiced bursts of 0.3-2 s separated by short pauses, so VAD and ASR see realistic structure"""
+    rng = np.random.default_rng(seed)
+    audio = np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+    pos = 0
+    while pos < len(audio):
+        burst = int(rng.uniform(0.3, 2.0) * SAMPLE_RATE)
+        t = np.arange(min(burst, len(audio) - pos)) / SAMPLE_RATE
+        pitch = rng.uniform(100, 250)
+        voiced = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 6))
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t)  # Syllable rate
+        audio[pos:pos + len(t)] = 0.2 * voiced * envelope + 0.01 * rng.standard_normal(len(t))
+        pos += burst + int(rng.uniform(0.2, 0.8) * SAMPLE_RATE)
+    return audio
+
+
+def wav_bytes(audio):
+    buf = io.BytesIO()
+    sf.write(buf, audio, SAMPLE_RATE, format='WAV', subtype='PCM_16')
+    return buf.getvalue()
+
+
+def percentiles(values):
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "mean": None}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": round(p50, 3), "p95": round(p95, 3), "p99": round(p99, 3), "mean": round(float(np.mean(values)), 3)}
+
+
+def scrape_metrics(url):
+    """Sum and count of every breakdown histogram series, keyed by (metric, label value)"""
+    totals = {}
+    try:
+        text = requests.get(f"{url}/metrics", timeout=10).text
+    except requests.RequestException:
+        return totals
+    for line in text.splitlines():
+        for metric in BREAKDOWN_METRICS:
+            for suffix in ("_sum", "_count"):
+                if line.startswith(metric + suffix + "{"):
+                    series, value = line.rsplit(" ", 1)
+                    label = series[series.index('"') + 1:series.rindex('"')]
+                    entry = totals.setdefault((metric, label), [0.0, 0])
+                    entry[0 if suffix == "_sum" else 1] = float(value)
+    return totals
+
+
+def breakdown(before, after):
+    """Mean seconds per observation for each step and stage between two scrapes"""
+    result = {}
+    for (metric, label), (total, count) in sorted(after.items()):
+        prev_total, prev_count = before.get((metric, label), (0.0, 0))
+        if count > prev_count:
+            result.setdefault(metric, {})[label] = {
+                "count": int(count - prev_count),
+                "mean_ms": round(1000 * (total - prev_total) / (count - prev_count), 2)
+            }
+    return result
+
+
+class VirtualUser:
+    """One client: a Socket.IO connection that records completion events by session"""
+
+    def __init__(self, url, timeout):
+        self.url = url
+        self.timeout = timeout
+        self.events = {}
+        self.cond = threading.Condition()
+        self.http = requests.Session()
+        self.sio = socketio.Client(reconnection=False)
+        for event in ('transcription_complete', 'tts_complete'):
+            self.sio.on(event, self._recorder(event))
+        self.sio.connect(url, wait_timeout=timeout)
+
+    def _recorder(self, event):
+        def record(data):
+            with self.cond:
+                self.events.setdefault(data.get("session_id"), {})[event] = (time.perf_counter(), data.get("result") or {})
+                self.cond.notify_all()
+        return record
+
+    def wait_for(self, session_id, event):
+        deadline = time.perf_counter() + self.timeout
+        with self.cond:
+            while event not in self.events.get(session_id, {}):
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return None
+                self.cond.wait(remaining)
+            return self.events[session_id][event]
+
+    def close(self):
+        self.sio.disconnect()
+
+    def upload(self, audio, chunk_seconds, realtime):
+        start = time.perf_counter()
+        response = self.http.post(f"{self.url}/api/upload", files={"file": ("audio.wav", wav_bytes(audio), "audio/wav")},
+                                  data={"socket_id": self.sio.get_sid()}, timeout=self.timeout)
+        if response.status_code in (429, 503):
+            return start, None, response.status_code
+        response.raise_for_status()
+        return start, response.json()["session_id"], response.status_code
+
+    def stream(self, audio, chunk_seconds, realtime):
+        session_id = str(uuid.uuid4())
+        step = int(chunk_seconds * SAMPLE_RATE)
+        offsets = list(range(0, len(audio), step))
+        for index, offset in enumerate(offsets):
+            if realtime and index:
+                time.sleep(chunk_seconds)
+            is_final = index == len(offsets) - 1
+            start = time.perf_counter()
+            response = self.http.post(f"{self.url}/api/stream", files={"audio": ("chunk.wav", wav_bytes(audio[offset:offset + step]), "audio/wav")},
+                                      data={"session_id": session_id, "chunk_index": str(index), "is_final": str(is_final).lower(),
+                                            "socket_id": self.sio.get_sid()},
+                                      timeout=self.timeout)
+            if response.status_code in (429, 503):
+                return start, None, response.status_code
+            response.raise_for_status()
+        return start, session_id, response.status_code
+
+    def socket(self, audio, chunk_seconds, realtime):
+        """What the mobile client does: resend the whole recording so far as base64 WAV"""
+        session_id = str(uuid.uuid4())
+        step = int(chunk_seconds * SAMPLE_RATE)
+        ends = list(range(step, len(audio), step)) + [len(audio)]
+        for index, end in enumerate(ends):
+            if realtime and index:
+                time.sleep(chunk_seconds)
+            start = time.perf_counter()
+            self.sio.emit('stream_audio', {
+                "audio": base64.b64encode(wav_bytes(audio[:end])).decode(),
+                "session_id": session_id,
+                "is_final": index == len(ends) - 1,
+                "cumulative": True
+            })
+        return start, session_id, 200
+
+
+def run_scenario(url, scenario, clips, args):
+    """Run args.requests sessions of one scenario over args.concurrency users; returns a result row"""
+    records = []
+    errors = []
+    lock = threading.Lock()
+    counter = iter(range(args.requests))
+
+    def worker(user_index):
+        try:
+            user = VirtualUser(url, args.timeout)
+        except Exception as e:
+            with lock:
+                errors.append(f"connect: {e}")
+            return
+        try:
+            for request_index in counter:
+                audio = clips[request_index % len(clips)]
+                try:
+                    start, session_id, status = getattr(user, scenario)(audio, args.chunk_seconds, args.realtime)
+                    record = {"audio_seconds": len(audio) / SAMPLE_RATE, "status": status}
+                    if session_id is not None:
+                        transcribed = user.wait_for(session_id, 'transcription_complete')
+                        spoken = user.wait_for(session_id, 'tts_complete') if args.wait_tts else None
+                        record["transcription_latency"] = transcribed[0] - start if transcribed else None
+                        record["tts_latency"] = spoken[0] - start if spoken else None
+                        if transcribed and "error" in transcribed[1]:
+                            record["error"] = transcribed[1]["error"]
+                except Exception as e:
+                    record = {"audio_seconds": len(audio) / SAMPLE_RATE, "status": None, "error": str(e)}
+                with lock:
+                    records.append(record)
+        finally:
+            user.close()
+
+    before = scrape_metrics(url)
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    completed = [r for r in records if r.get("transcription_latency") is not None and "error" not in r]
+    return {
+        "scenario": scenario,
+        "concurrency": args.concurrency,
+        "requests": len(records),
+        "completed": len(completed),
+        "rejected": sum(1 for r in records if r["status"] in (429, 503)),
+        "timed_out": sum(1 for r in records if r["status"] not in (429, 503, None)
+                         and r.get("transcription_latency") is None),
+        "errors": len(errors) + sum(1 for r in records if "error" in r),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(completed) / elapsed, 3),
+        "audio_seconds_per_sec": round(sum(r["audio_seconds"] for r in completed) / elapsed, 2),
+        "transcription_latency_s": percentiles([r["transcription_latency"] for r in completed]),
+        "tts_latency_s": percentiles([r["tts_latency"] for r in completed if r.get("tts_latency") is not None]),
+        "breakdown": breakdown(before, scrape_metrics(url))
+    }
+
+
+def start_local_server(port, profile, workdir):
+    """Import the app with stub models and its state in a scratch directory, and serve it on a background thread"""
+    import stub_models
+
+    os.environ["MODEL_SERVER_MODE"] = "false"  # Worker processes would load the real models
+    os.environ["DATA_DIR"] = workdir
+    profile = stub_models.install(profile)
+    import app as server
+
+    threading.Thread(target=server.socketio.run, args=(server.app,), daemon=True, kwargs={
+        "host": "127.0.0.1", "port": port, "use_reloader": False, "log_output": False, "allow_unsafe_werkzeug": True
+    }).start()
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            models = requests.get(f"{url}/health", timeout=2).json()["models"]
+            if models["asr_model"] == "loaded" and models["tts_model"] == "loaded":
+                return url, profile
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("Stub server did not become ready")
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Target a running server instead of an in-process one with stub models")
+    parser.add_argument("--scenarios", nargs="+", choices=["upload", "stream", "socket"], default=["upload", "stream", "socket"])
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=32, help="Sessions per scenario")
+    parser.add_argument("--seconds", type=float, nargs="+", default=[5.0, 30.0], help="Clip lengths, used round robin")
+    parser.add_argument("--chunk-seconds", type=float, default=1.0, help="Chunk size for stream and socket")
+    parser.add_argument("--realtime", action="store_true", help="Pace stream chunks at the speed of speech")
+    parser.add_argument("--wait-tts", action="store_true", help="Also wait for tts_complete")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--profile", help="JSON file overriding the stub models' latency profile")
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--output", help="Write the results JSON here as well as printing rows")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None  # Before the local server changes directory
+    profile = None
+    if args.url:
+        url = args.url.rstrip("/")
+    else:
+        overrides = None
+        if args.profile:
+            with open(args.profile) as f:
+                overrides = json.load(f)
+        url, profile = start_local_server(args.port, overrides, tempfile.mkdtemp(prefix="load_test_"))
+
+    clips = [speech_like(seconds, seed=i) for i, seconds in enumerate(args.seconds)]
+    rows = []
+    for scenario in args.scenarios:
+        row = run_scenario(url, scenario, clips, args)
+        rows.append(row)
+        print(json.dumps(row))
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.utcnow().isoformat(),
+        "target": args.url or "in-process stub models",
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "url")},
+        "stub_profile": profile,
+        "scenarios": rows
+    }
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Serve the app with stub ASR/TTS models, in whichever SERVER_MODE the environment selects
+
+Usage: SERVER_MODE=eventlet python benchmarks/serve_stub.py [--port 5098] [--profile profile.json]
+"""
+import os
+
+# Same as app.py, but this script imports numpy and torch first
+if os.environ.get("SERVER_MODE") == "eventlet":
+    import eventlet
+    eventlet.monkey_patch()
+
+import sys
+import json
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stub_models
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5098)
+    parser.add_argument("--profile", help="JSON file overriding the stub models' latency profile")
+    args = parser.parse_args()
+
+    overrides = None
+    if args.profile:
+        with open(args.profile) as f:
+            overrides = json.load(f)
+    os.environ["MODEL_SERVER_MODE"] = "false"  # Worker processes would load the real models
+    # Uploads, results and TTS output go to a scratch folder, not the repository's
+    os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="serve_stub_"))
+    stub_models.install(overrides)
+
+    import app
+    app.serve(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
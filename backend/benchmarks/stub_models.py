@@ -0,0 +1,127 @@
+"""Stand-ins for the Parakeet ASR and XTTS models with the same interfaces and a configurable latency profile
+
+install() swaps them in behind asr_engine and tts_engine, so the real app, pipeline and
+caches run unchanged while model time is simulated with sleeps. Sleeps release the GIL,
+like torch kernels do, so concurrency behaves as with the real models on CPU.
+"""
+import time
+import hashlib
+from types import SimpleNamespace
+
+import numpy as np
+import soundfile as sf
+import torch
+
+# Rough CPU figures for Parakeet CTC 0.6B and XTTS v2; override with load_test.py --profile
+DEFAULT_PROFILE = {
+    "asr_features_per_second": 0.002,  # Feature extraction, per second of audio
+    "asr_forward_base": 0.04,  # Fixed cost of one forward pass
+    "asr_forward_per_second": 0.015,  # Per second of padded audio in the batch
+    "asr_decode": 0.001,
+    "tts_conditioning": 0.4,  # Speaker encoder over a reference clip
+    "tts_sentence_base": 0.15,
+    "tts_per_char": 0.012,
+    "tts_sample_rate": 24000
+}
+
+FRAMES_PER_SECOND = 100  # Feature frames, as with a 10 ms hop
+WORDS_PER_SECOND = 2.5
+VOCABULARY = ["<pad>", "the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog", "again"]
+
+
+class StubProcessor:
+    """Feature extractor and tokenizer with the slice of the AutoProcessor interface the app uses"""
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.tokenizer = SimpleNamespace(pad_token_id=0)
+
+    def __call__(self, audio, sampling_rate=16000, padding=False, return_attention_mask=False, return_tensors="pt"):
+        clips = audio if isinstance(audio, list) else [audio]
+        lengths = [max(1, int(len(clip) * FRAMES_PER_SECOND / sampling_rate)) for clip in clips]
+        time.sleep(self.profile["asr_features_per_second"] * sum(len(clip) for clip in clips) / sampling_rate)
+        attention_mask = torch.zeros(len(clips), max(lengths), dtype=torch.long)
+        for i, length in enumerate(lengths):
+            attention_mask[i, :length] = 1
+        return SimpleNamespace(input_features=attention_mask.unsqueeze(-1).float(), attention_mask=attention_mask)
+
+    def batch_decode(self, ids, skip_special_tokens=True):
+        time.sleep(self.profile["asr_decode"])
+        return [" ".join(VOCABULARY[int(i)] for i in row if int(i) != 0) for row in ids]
+
+
+class StubCTCModel:
+    """CTC model whose forward pass costs base + per padded second, emitting a word every 0.4 s"""
+
+    def __init__(self, profile):
+        self.profile = profile
+
+    def eval(self):
+        return self
+
+    def _ids(self, input_features, attention_mask):
+        batch, frames = input_features.shape[:2]
+        time.sleep(self.profile["asr_forward_base"] + self.profile["asr_forward_per_second"] * batch * frames / FRAMES_PER_SECOND)
+        frame_index = torch.arange(frames)
+        word_frame = frame_index % int(FRAMES_PER_SECOND / WORDS_PER_SECOND) == 0
+        ids = torch.where(word_frame, 1 + (frame_index // 40) % (len(VOCABULARY) - 1), torch.zeros_like(frame_index))
+        ids = ids.unsqueeze(0).repeat(batch, 1)
+        if attention_mask is not None:
+            ids[attention_mask == 0] = 0
+        return ids
+
+    def __call__(self, input_features, attention_mask=None):
+        ids = self._ids(input_features, attention_mask)
+        return SimpleNamespace(logits=torch.nn.functional.one_hot(ids, len(VOCABULARY)).float())
+
+    def generate(self, input_features, attention_mask=None):
+        return self._ids(input_features, attention_mask)
+
+
+class StubXTTS:
+    """XTTS conditioning and inference; latents are derived from the reference audio, so voices stay distinct"""
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.config = SimpleNamespace(audio=SimpleNamespace(output_sample_rate=profile["tts_sample_rate"]))
+
+    def get_conditioning_latents(self, audio_path):
+        time.sleep(self.profile["tts_conditioning"])
+        with open(audio_path[0], 'rb') as f:
+            digest = hashlib.sha1(f.read()).digest()
+        speaker_embedding = torch.tensor(np.frombuffer(digest, dtype=np.uint8).astype(np.float32)).reshape(1, -1, 1)
+        return torch.zeros(1, 32, 8), speaker_embedding
+
+    def inference(self, text, language, gpt_cond_latent, speaker_embedding):
+        time.sleep(self.profile["tts_sentence_base"] + self.profile["tts_per_char"] * len(text))
+        # About 15 characters of speech per second
+        samples = int(self.profile["tts_sample_rate"] * max(1, len(text)) / 15)
+        t = np.arange(samples) / self.profile["tts_sample_rate"]
+        return {"wav": (0.1 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)}
+
+
+class StubTTS:
+    """TTS.api.TTS stand-in wrapping StubXTTS"""
+
+    def __init__(self, profile):
+        xtts = StubXTTS(profile)
+        self.synthesizer = SimpleNamespace(tts_model=xtts, output_sample_rate=xtts.config.audio.output_sample_rate)
+
+    def tts(self, text, speaker_wav=None):
+        return self.synthesizer.tts_model.inference(text, "en", None, None)["wav"]
+
+    def tts_to_file(self, text, speaker_wav=None, file_path=None):
+        sf.write(file_path, self.tts(text, speaker_wav), self.synthesizer.output_sample_rate)
+        return file_path
+
+
+def install(profile=None):
+    """Make asr_engine and tts_engine load the stubs; call before importing app"""
+    import asr_engine
+    import tts_engine
+
+    profile = dict(DEFAULT_PROFILE, **(profile or {}))
+    asr_engine.load_processor = lambda cache_dir=None: StubProcessor(profile)
+    asr_engine.load = lambda cache_dir=None, backend="torch": (StubProcessor(profile), StubCTCModel(profile))
+    tts_engine.load_tts = lambda model_name, gpu=False: StubTTS(profile)
+    return profile
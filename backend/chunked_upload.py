@@ -0,0 +1,102 @@
+import os
+import time
+import logging
+import threading
+
+from audio_io import SpoolReader, decode_growing_file
+
+logger = logging.getLogger(__name__)
+
+
+class UploadOffsetError(ValueError):
+    """A chunk was sent for an offset past what the server has; offset is where to resume"""
+
+    def __init__(self, offset):
+        super().__init__(f"Upload is at offset {offset}")
+        self.offset = offset
+
+
+class ChunkedUpload:
+    """Offset-addressed upload spooled to disk and decoded on its own thread while it arrives
+
+    Chunks are appended with write(offset, stream). A retried chunk that overlaps bytes
+    already received is trimmed, so clients can resume from whatever offset they last saw
+    acknowledged. Decoded audio goes to on_audio in blocks, so memory stays flat.
+    The codec work is done through run(fn, *args); see decode_growing_file.
+    """
+
+    def __init__(self, upload_id, session_id, path, on_audio, sample_rate=16000, user_id=None, extension="",
+                 client_id=None, run=None):
+        self.upload_id = upload_id
+        self.session_id = session_id
+        self.path = path
+        self.user_id = user_id
+        self.client_id = client_id
+        self.extension = extension
+        self.offset = 0
+        self.complete = False
+        self.finalizing = False
+        self.error = None
+        self.created = self.last_activity = time.monotonic()
+        self.lock = threading.Lock()
+        self._file = open(path, 'wb')
+        self._reader = SpoolReader(path)
+        self._thread = threading.Thread(target=self._decode, args=(on_audio, sample_rate, run),
+                                        name=f"upload-{upload_id[:8]}", daemon=True)
+        self._thread.start()
+
+    def _decode(self, on_audio, sample_rate, run):
+        try:
+            decode_growing_file(self._reader, self.path, on_audio, sample_rate, run=run)
+        except Exception as e:
+            logger.error(f"Decoding upload {self.upload_id} failed: {e}")
+            self.error = str(e)
+        finally:
+            self._reader.close()
+
+    def write(self, offset, stream, block_size=64 * 1024):
+        """Append a request body sent for offset, block by block; returns the new offset"""
+        with self.lock:
+            if self.complete:
+                raise RuntimeError("Upload is already finalized")
+            if offset > self.offset:
+                raise UploadOffsetError(self.offset)
+            skip = self.offset - offset
+            while True:
+                block = stream.read(block_size)
+                if not block:
+                    break
+                if skip:
+                    dropped = min(skip, len(block))
+                    block = block[dropped:]
+                    skip -= dropped
+                    if not block:
+                        continue
+                self._file.write(block)
+                self._file.flush()
+                self.offset += len(block)
+                self._reader.grow(self.offset)
+            self.last_activity = time.monotonic()
+            return self.offset
+
+    def finish(self, timeout=None):
+        """Mark the upload complete and wait for decoding to catch up; returns False if it did not in time"""
+        with self.lock:
+            self.complete = True
+            self._file.close()
+        self._reader.finish()
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def abort(self):
+        """Stop decoding and delete the spool file"""
+        with self.lock:
+            self.complete = True
+            self._file.close()
+        self._reader.abort()
+        self._thread.join(5)
+        self.remove()
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
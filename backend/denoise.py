@@ -0,0 +1,190 @@
+import math
+from functools import lru_cache
+
+import numpy as np
+from scipy.signal import firwin, upfirdn
+
+from metrics import timing
+
+RNNOISE_SAMPLE_RATE = 48000
+RNNOISE_FRAME_SIZE = 480  # 10 ms at 48 kHz, the only frame size RNNoise works on
+
+
+@lru_cache(maxsize=None)
+def design_filter(up, down, half_taps_per_phase=10):
+    """Anti-aliasing FIR for an up/down ratio, front-padded so its delay is a whole number of output samples
+
+    Cached, so the common 16k<->48k and 44.1k->48k filters are designed once per process.
+    Returns (taps, samples of output delay to drop).
+    """
+    max_rate = max(up, down)
+    taps = firwin(2 * half_taps_per_phase * max_rate + 1, 1.0 / max_rate, window=('kaiser', 5.0)) * up
+    half_len = (len(taps) - 1) // 2
+    pre_pad = down - half_len % down
+    taps = np.concatenate((np.zeros(pre_pad), taps)).astype(np.float32)
+    return taps, (half_len + pre_pad) // down
+
+
+# Design the filters for the usual 16k<->48k and 44.1k->48k conversions up front
+for _up, _down in ((3, 1), (1, 3), (160, 147)):
+    design_filter(_up, _down)
+
+
+def _ratio(orig_sample_rate, target_sample_rate):
+    g = math.gcd(int(orig_sample_rate), int(target_sample_rate))
+    return int(target_sample_rate) // g, int(orig_sample_rate) // g
+
+
+def resample(audio, orig_sample_rate, target_sample_rate):
+    """Resample a whole clip with a cached polyphase filter"""
+    if orig_sample_rate == target_sample_rate:
+        return np.asarray(audio, dtype=np.float32)
+    up, down = _ratio(orig_sample_rate, target_sample_rate)
+    taps, delay = design_filter(up, down)
+    out_len = -(-len(audio) * up // down)
+    y = upfirdn(taps, np.asarray(audio, dtype=np.float32), up, down)
+    return y[delay:delay + out_len].astype(np.float32, copy=False)
+
+
+class StreamResampler:
+    """Polyphase resampler that keeps filter history between chunks of one stream
+
+    Concatenating the output of process() over all chunks plus flush() gives the same
+    samples as resample() on the whole stream.
+    """
+
+    def __init__(self, orig_sample_rate, target_sample_rate):
+        self.up, self.down = _ratio(orig_sample_rate, target_sample_rate)
+        self.taps, self._delay = design_filter(self.up, self.down)
+        self._history = np.zeros(0, dtype=np.float32)
+        self._history_start = 0  # Absolute input index of _history[0]; always a multiple of down
+        self._total_in = 0
+        self._real_in = 0  # Input samples excluding the padding pushed in by flush()
+        self._next_out = 0  # Next absolute output index, before the delay is dropped
+        self._emitted = 0
+
+    def _run(self, samples):
+        buf = np.concatenate((self._history, samples))
+        self._total_in += len(samples)
+        if self._total_in == 0:
+            return np.zeros(0, dtype=np.float32)
+
+        y = upfirdn(self.taps, buf, self.up, self.down)
+        base = self._history_start * self.up // self.down
+        # Output k only depends on input already received once k * down <= the last upsampled input time
+        last = (self._total_in - 1) * self.up // self.down
+        out = y[self._next_out - base:last - base + 1]
+        self._next_out = last + 1
+
+        # Keep just enough input for the filter to reach back from the next output
+        keep_from = max(0, (self._next_out * self.down - len(self.taps) + 1) // self.up)
+        keep_from -= keep_from % self.down
+        self._history = buf[keep_from - self._history_start:]
+        self._history_start = keep_from
+
+        # Drop the filter's delay from the start of the stream
+        if self._emitted < self._delay:
+            skip = min(len(out), self._delay - self._emitted)
+            self._emitted += skip
+            out = out[skip:]
+        return out.astype(np.float32, copy=False)
+
+    def process(self, samples):
+        samples = np.asarray(samples, dtype=np.float32)
+        self._real_in += len(samples)
+        out = self._run(samples)
+        self._emitted += len(out)
+        return out
+
+    def flush(self):
+        """Push the filter tail out; the stream's total output then matches resample()"""
+        expected = -(-self._real_in * self.up // self.down) + self._delay
+        padding = np.zeros(-(-(len(self.taps) + self.down) // self.up), dtype=np.float32)
+        out = self._run(padding)
+        out = out[:max(0, expected - self._emitted)]
+        self._emitted += len(out)
+        return out
+
+
+def _rnnoise_frames(processor, audio_48k):
+    """Run RNNoise over whole 480-sample frames of 48 kHz float audio"""
+    return _rnnoise_pcm(processor, (np.clip(audio_48k, -1.0, 1.0) * 32767).astype(np.int16))
+
+
+def _rnnoise_pcm(processor, pcm_48k):
+    """Run RNNoise over whole 480-sample frames of 48 kHz int16 audio, returning float audio"""
+    frames = pcm_48k.reshape(-1, RNNOISE_FRAME_SIZE)
+    denoised = np.empty_like(frames)
+    for i, frame in enumerate(frames):
+        denoised[i] = processor.process_frame(frame)
+    return denoised.reshape(-1).astype(np.float32) / 32767.0
+
+
+def denoise(audio, sample_rate, processor, timings=None):
+    """Denoise a whole clip with RNNoise and return it at the input sample rate and length
+
+    With a timings dict, seconds spent resampling and in RNNoise are added to it.
+    """
+    with timing(timings, "resample"):
+        audio_48k = resample(audio, sample_rate, RNNOISE_SAMPLE_RATE)
+    count = len(audio_48k)
+    padded = np.pad(audio_48k, (0, -count % RNNOISE_FRAME_SIZE))
+    with timing(timings, "denoise"):
+        denoised = _rnnoise_frames(processor, padded)[:count]
+    with timing(timings, "resample"):
+        return resample(denoised, RNNOISE_SAMPLE_RATE, sample_rate)[:len(audio)]
+
+
+def denoise_pcm48k(pcm_48k, processor, timings=None):
+    """Denoise 48 kHz int16 audio with RNNoise; returns float32 at 48 kHz and the same length
+
+    For callers that already hold RNNoise's native format, so no resampling happens here.
+    """
+    count = len(pcm_48k)
+    padded = np.pad(pcm_48k, (0, -count % RNNOISE_FRAME_SIZE))
+    with timing(timings, "denoise"):
+        return _rnnoise_pcm(processor, padded)[:count]
+
+
+class StreamDenoiser:
+    """RNNoise for one stream: exact 10 ms frames, with RNN and resampler state kept across chunks
+
+    Each chunk's work goes through run(fn, *args) when given, e.g. to move it off an event loop.
+    """
+
+    def __init__(self, processor, sample_rate=16000, run=None):
+        self.processor = processor
+        self.sample_rate = sample_rate
+        self.run = run
+        self._to_48k = StreamResampler(sample_rate, RNNOISE_SAMPLE_RATE) if sample_rate != RNNOISE_SAMPLE_RATE else None
+        self._from_48k = StreamResampler(RNNOISE_SAMPLE_RATE, sample_rate) if sample_rate != RNNOISE_SAMPLE_RATE else None
+        self._pending = np.zeros(0, dtype=np.float32)  # 48 kHz samples short of a full frame
+
+    def process(self, audio, final=False):
+        """Denoise the next chunk; returns audio at sample_rate (lagging the input by under one frame)"""
+        if self.run is not None:
+            return self.run(self._process, audio, final)
+        return self._process(audio, final)
+
+    def _process(self, audio, final):
+        audio_48k = audio if self._to_48k is None else self._to_48k.process(audio)
+        if final and self._to_48k is not None:
+            audio_48k = np.concatenate((audio_48k, self._to_48k.flush()))
+
+        buf = np.concatenate((self._pending, audio_48k))
+        count = len(buf)
+        if final:
+            buf = np.pad(buf, (0, -count % RNNOISE_FRAME_SIZE))
+        usable = len(buf) - len(buf) % RNNOISE_FRAME_SIZE
+        self._pending = buf[usable:]
+
+        denoised = _rnnoise_frames(self.processor, buf[:usable])
+        if final:
+            denoised = denoised[:count]
+
+        if self._from_48k is None:
+            return denoised
+        out = self._from_48k.process(denoised)
+        if final:
+            out = np.concatenate((out, self._from_48k.flush()))
+        return out
@@ -0,0 +1,197 @@
+import sys
+import time
+import bisect
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+# Seconds, from a fast resample up to a long upload's ASR pass
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _label_text(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, in the Prometheus text format"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def collect(self):
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        for labels, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket{_label_text(self.labelnames, labels, [('le', _number(bound))])} {cumulative}"
+            yield f"{self.name}_sum{_label_text(self.labelnames, labels)} {_number(total)}"
+            yield f"{self.name}_count{_label_text(self.labelnames, labels)} {count}"
+
+
+class Gauge:
+    """Current value per label set; with a callback, values are read at scrape time instead
+
+    The callback returns {label values tuple: value}, so hot paths never touch the gauge.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def collect(self):
+        if self.callback is not None:
+            values = self.callback()
+        else:
+            with self._lock:
+                values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{_label_text(self.labelnames, labels)} {_number(value)}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, labelnames=(), callback=None):
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def exposition(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+@contextmanager
+def timing(timings, key):
+    """Add the block's duration to timings[key]; a no-op when timings is None"""
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[key] = timings.get(key, 0.0) + time.perf_counter() - start
+
+
+class SamplingProfiler:
+    """Samples the stacks of selected threads at a fixed rate and counts them in collapsed form
+
+    Output is one "frame;frame;frame count" line per stack, ready for flamegraph tools.
+    Sampled threads are never interrupted; each sample costs one stack walk per thread.
+    """
+
+    def __init__(self, interval=0.01, thread_prefixes=(), max_depth=64):
+        self.interval = interval
+        self.thread_prefixes = tuple(thread_prefixes)
+        self.max_depth = max_depth
+        self.samples = 0
+        self._stacks = Counter()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+            self._thread.start()
+
+    def _sampled_threads(self):
+        return {thread.ident: thread.name for thread in threading.enumerate()
+                if thread.name.startswith(self.thread_prefixes)}
+
+    def _run(self):
+        threads = {}
+        next_refresh = 0.0
+        while True:
+            time.sleep(self.interval)
+            now = time.monotonic()
+            if now >= next_refresh:
+                threads = self._sampled_threads()
+                next_refresh = now + 1.0
+            frames = sys._current_frames()
+            stacks = []
+            for ident, name in threads.items():
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                    frame = frame.f_back
+                # Workers of one stage share a root frame, e.g. asr-0 and asr-1 under "asr"
+                stack.append(name.rsplit("-", 1)[0])
+                stacks.append(";".join(reversed(stack)))
+            with self._lock:
+                self.samples += 1
+                self._stacks.update(stacks)
+
+    def collapsed(self, reset=False):
+        """Sampled stacks in collapsed form, most frequent first"""
+        with self._lock:
+            stacks = self._stacks
+            if reset:
+                self._stacks = Counter()
+        return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()) + "\n"
@@ -0,0 +1,38 @@
+"""Move JSON results from responses/ and transcriptions/ into the session store and compact it
+
+Results already in the store are not duplicated, so the migration can be re-run, e.g. after
+an interruption. The JSON files are deleted once imported unless --keep-files is given, and
+the emptied folders are removed. Run it with the server stopped or running; both work.
+
+Usage: python migrate_results.py [--db sessions.db] [--responses responses] [--transcriptions transcriptions] [--keep-files]
+"""
+import os
+import json
+import logging
+import argparse
+
+from session_store import SessionStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default="sessions.db")
+    parser.add_argument("--responses", default="responses")
+    parser.add_argument("--transcriptions", default="transcriptions")
+    parser.add_argument("--keep-files", action="store_true", help="Import without deleting the JSON files")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    store = SessionStore(args.db, cache_size=0)
+    before = store.stats()
+    imported = store.rebuild(args.responses, args.transcriptions, remove_files=not args.keep_files)
+    if not args.keep_files:
+        for folder in (args.responses, args.transcriptions):
+            if os.path.isdir(folder) and not os.listdir(folder):
+                os.rmdir(folder)
+    store.compact()
+    print(json.dumps({"imported": imported, "before": before, "after": store.stats()}))
+
+
+if __name__ == "__main__":
+    main()
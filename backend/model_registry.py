@@ -0,0 +1,104 @@
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class ModelSlot:
+    """Load state of one model: loading, then ready or failed, with timings"""
+
+    def __init__(self, name, load, warmup=None):
+        self.name = name
+        self.load = load
+        self.warmup = warmup
+        self.state = LOADING
+        self.error = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self._settled = threading.Event()
+
+    def run(self):
+        try:
+            start = time.perf_counter()
+            self.load()
+            self.load_seconds = time.perf_counter() - start
+            if self.warmup is not None:
+                # One throwaway inference, so the first real request does not pay for lazy init
+                start = time.perf_counter()
+                self.warmup()
+                self.warmup_seconds = time.perf_counter() - start
+            self.state = READY
+            logger.info(f"{self.name} model ready (load {self.load_seconds:.1f}s, warmup {self.warmup_seconds or 0:.1f}s)")
+        except Exception as e:
+            logger.error(f"Failed to load {self.name} model: {e}")
+            self.fail(str(e))
+        finally:
+            self._settled.set()
+
+    def fail(self, error):
+        """Mark the model unusable, at load or later when it stops working"""
+        self.state = FAILED
+        self.error = error
+        self._settled.set()
+
+    def wait(self, timeout=None):
+        """Block until the model has settled; True if it is ready"""
+        self._settled.wait(timeout)
+        return self.state == READY
+
+    def status(self):
+        return {
+            "state": self.state,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "error": self.error
+        }
+
+
+class ModelRegistry:
+    """Loads every registered model on its own thread and tracks startup milestones"""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.milestones = {}
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, load, warmup=None):
+        self._slots[name] = ModelSlot(name, load, warmup)
+
+    def start(self):
+        for slot in self._slots.values():
+            threading.Thread(target=self._run, args=(slot,), name=f"load-{slot.name}", daemon=True).start()
+
+    def _run(self, slot):
+        slot.run()
+        self.milestone(f"{slot.name}_{slot.state}")
+
+    def __getitem__(self, name):
+        return self._slots[name]
+
+    def fail(self, name, error):
+        self._slots[name].fail(error)
+        self.milestone(f"{name}_{FAILED}")
+
+    def is_ready(self, name):
+        return self._slots[name].state == READY
+
+    def wait(self, name, timeout=None):
+        return self._slots[name].wait(timeout)
+
+    def milestone(self, name):
+        """Record the first time something happened, in seconds since startup"""
+        with self._lock:
+            if name not in self.milestones:
+                self.milestones[name] = time.monotonic() - self.started_at
+                logger.info(f"Startup milestone {name}: {self.milestones[name]:.1f}s")
+
+    def status(self):
+        return {name: slot.status() for name, slot in self._slots.items()}
@@ -0,0 +1,315 @@
+import os
+import sys
+import json
+import time
+import uuid
+import queue
+import logging
+import argparse
+import importlib
+import threading
+import subprocess
+from concurrent.futures import Future, TimeoutError
+from multiprocessing.connection import Listener, Client
+
+logger = logging.getLogger(__name__)
+
+AUTHKEY_ENV = "MODEL_SERVER_AUTHKEY"
+
+
+class ModelServer:
+    """Worker processes that each hold their own copy of a model and pull tasks from one shared queue
+
+    engine names a module with load(**load_kwargs) -> state, warmup(state) and
+    handle(state, op, payload, emit) -> result. Workers are started as separate
+    interpreters (python model_server.py), so they never re-run the web app's module
+    code, and connect back over an authenticated local socket. One thread per worker
+    hands it the next task as soon as it is idle and routes results and intermediate
+    messages back to the submitting caller's Future.
+
+    A worker that dies is replaced by a fresh process, up to max_restarts times in a
+    row without a task completing in between. If none are left, on_failed(error) is
+    called and queued and later tasks fail at once.
+    """
+
+    def __init__(self, name, engine, processes=1, torch_threads=1, load_kwargs=None, max_restarts=3, on_failed=None):
+        self.name = name
+        self.engine = engine
+        self.processes = processes
+        self.torch_threads = torch_threads
+        self.load_kwargs = load_kwargs or {}
+        self.max_restarts = max_restarts
+        self.on_failed = on_failed
+        self.task_queue = queue.Queue()
+        self.ready_workers = 0
+        self.completed = 0
+        self.restarts = 0
+        self.error = None
+        self._workers = []
+        self._running = {}
+        self._in_flight = 0
+        self._starting = set()
+        self._consecutive_restarts = 0
+        self._stopping = False
+        self._lock = threading.Lock()
+        self._errors = []
+        self._load_errors = {}
+        self._listener = None
+        self._env = None
+
+    def start(self, timeout=None):
+        """Spawn the workers and block until every one has loaded its model"""
+        authkey = os.urandom(16)
+        self._listener = Listener(("127.0.0.1", 0), authkey=authkey)
+        self._env = dict(os.environ, **{AUTHKEY_ENV: authkey.hex()})
+        for index in range(self.processes):
+            self._workers.append(None)
+            self._spawn(index)
+
+        settled = threading.Semaphore(0)
+
+        def accept():
+            # Kept open for replacement workers until stop()
+            while True:
+                try:
+                    conn = self._listener.accept()
+                    status, detail = conn.recv()
+                except (EOFError, OSError):
+                    if self._stopping:
+                        return
+                    continue
+                if status == "ready":
+                    with self._lock:
+                        self._starting.discard(detail)
+                        self.ready_workers += 1
+                    threading.Thread(target=self._serve, args=(conn, detail), name=f"{self.name}-conn-{detail}", daemon=True).start()
+                else:
+                    # The worker exits after reporting; _watch takes it from there
+                    index, detail = detail
+                    logger.error(detail)
+                    self._errors.append(detail)
+                    self._load_errors[index] = detail
+                    conn.close()
+                settled.release()
+
+        threading.Thread(target=accept, name=f"{self.name}-accept", daemon=True).start()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        pending = self.processes
+        while pending:
+            if settled.acquire(timeout=1):
+                pending -= 1
+                continue
+            # Stop waiting for workers that died before they could report back
+            exited = sum(process.poll() is not None for process in self._workers) - len(self._errors)
+            if exited >= pending:
+                break
+            if deadline is not None and time.monotonic() > deadline:
+                raise RuntimeError(f"{self.name} workers did not start in time")
+        if self.ready_workers == 0:
+            raise RuntimeError("; ".join(self._errors) or f"No {self.name} worker started")
+        logger.info(f"{self.name} model server ready with {self.ready_workers} process(es)")
+
+    def _spawn(self, index):
+        host, port = self._listener.address
+        with self._lock:
+            self._starting.add(index)
+        process = self._workers[index] = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__),
+             "--name", self.name, "--engine", self.engine, "--index", str(index),
+             "--torch-threads", str(self.torch_threads), "--load-kwargs", json.dumps(self.load_kwargs),
+             "--address", f"{host}:{port}"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=self._env
+        )
+        threading.Thread(target=self._watch, args=(index, process), name=f"{self.name}-watch-{index}", daemon=True).start()
+
+    def _watch(self, index, process):
+        """Notice a worker that exits before it reports ready, whether it failed to load or crashed"""
+        code = process.wait()
+        with self._lock:
+            if self._workers[index] is not process or index not in self._starting:
+                return
+            self._starting.discard(index)
+        self._check_failed(self._load_errors.pop(index, f"worker {index} exited with code {code} while starting"))
+
+    def _replace(self, index, error):
+        """Start a new process in place of a dead worker, unless restarts keep failing"""
+        self._workers[index].kill()
+        self._workers[index].wait()
+        with self._lock:
+            self.ready_workers -= 1
+            restart = not self._stopping and self._consecutive_restarts < self.max_restarts
+            if restart:
+                self._consecutive_restarts += 1
+                self.restarts += 1
+        if restart:
+            logger.warning(f"{self.name} worker {index} exited ({error}); starting a replacement")
+            self._spawn(index)
+        else:
+            self._check_failed(error)
+
+    def _check_failed(self, error):
+        """With no worker ready or starting, fail everything queued and report the server failed"""
+        with self._lock:
+            if self._stopping or self.ready_workers > 0 or self._starting or self.error is not None:
+                return
+            self.error = f"No {self.name} worker left: {error}"
+        logger.error(self.error)
+        while True:
+            try:
+                task = self.task_queue.get_nowait()
+            except queue.Empty:
+                break
+            if task is not None and task[3].set_running_or_notify_cancel():
+                task[3].set_exception(RuntimeError(self.error))
+        if self.on_failed is not None:
+            self.on_failed(self.error)
+
+    def _serve(self, conn, index):
+        """Feed one worker from the shared queue, one task at a time"""
+        while True:
+            task = self.task_queue.get()
+            if task is None:
+                conn.send(None)
+                conn.close()
+                return
+            task_id, op, payload, future, on_message = task
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            with self._lock:
+                self._in_flight += 1
+                self._running[task_id] = index
+            try:
+                conn.send((task_id, op, payload))
+                while True:
+                    kind, data = conn.recv()
+                    if kind != "message":
+                        break
+                    if on_message is not None:
+                        try:
+                            on_message(data)
+                        except Exception:
+                            logger.exception(f"Message handler failed for {self.name} task {task_id}")
+            except (EOFError, OSError) as e:
+                # The worker died; fail the task and put a new process in its place
+                error = str(e) or "connection closed"
+                if not future.done():
+                    future.set_exception(RuntimeError(f"{self.name} worker exited: {error}"))
+                self._replace(index, error)
+                return
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                    self._running.pop(task_id, None)
+
+            with self._lock:
+                self.completed += 1
+                self._consecutive_restarts = 0
+            if future.done():
+                continue
+            if kind == "result":
+                future.set_result(data)
+            else:
+                future.set_exception(RuntimeError(data))
+
+    def submit(self, op, payload, on_message=None):
+        """Queue a task for the next free worker; returns a Future with the handler's result"""
+        future = Future()
+        if self.error is not None:
+            future.set_exception(RuntimeError(self.error))
+            return future
+        future.task_id = uuid.uuid4().hex
+        self.task_queue.put((future.task_id, op, payload, future, on_message))
+        return future
+
+    def result(self, future, timeout=None):
+        """Wait for a submitted task; past timeout, kill the worker running it so a fresh one takes its place"""
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            if not future.cancel():
+                with self._lock:
+                    index = self._running.get(future.task_id)
+                if index is not None:
+                    logger.error(f"{self.name} task {future.task_id} took longer than {timeout}s; killing worker {index}")
+                    self._workers[index].kill()
+            raise TimeoutError(f"{self.name} task did not finish within {timeout}s")
+
+    def call(self, op, payload, on_message=None, timeout=None):
+        return self.result(self.submit(op, payload, on_message), timeout)
+
+    def stop(self):
+        self._stopping = True
+        for _ in range(self.ready_workers):
+            self.task_queue.put(None)
+        if self._listener is not None:
+            self._listener.close()
+        for process in self._workers:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    def status(self):
+        return {
+            "processes": self.processes,
+            "alive": sum(process.poll() is None for process in self._workers),
+            "ready": self.ready_workers,
+            "restarts": self.restarts,
+            "error": self.error,
+            "torch_threads": self.torch_threads,
+            "queued": self.task_queue.qsize(),
+            "in_flight": self._in_flight,
+            "completed": self.completed
+        }
+
+
+def worker_main():
+    """Worker process: load the model once, then serve tasks until the web process says stop"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--name", required=True)
+    parser.add_argument("--engine", required=True)
+    parser.add_argument("--index", type=int, default=0)
+    parser.add_argument("--torch-threads", type=int, default=1)
+    parser.add_argument("--load-kwargs", default="{}")
+    parser.add_argument("--address", required=True)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    # Intra-op threads per worker; processes x torch threads should not exceed the cores
+    os.environ["OMP_NUM_THREADS"] = os.environ["MKL_NUM_THREADS"] = str(args.torch_threads)
+    try:
+        import torch
+        torch.set_num_threads(args.torch_threads)
+    except ImportError:
+        pass
+
+    host, port = args.address.rsplit(":", 1)
+    conn = Client((host, int(port)), authkey=bytes.fromhex(os.environ.pop(AUTHKEY_ENV)))
+    try:
+        engine = importlib.import_module(args.engine)
+        state = engine.load(**json.loads(args.load_kwargs))
+        engine.warmup(state)
+    except Exception as e:
+        conn.send(("failed", (args.index, f"{args.name} worker {args.index}: {e}")))
+        return
+    conn.send(("ready", args.index))
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        task_id, op, payload = task
+        try:
+            result = engine.handle(state, op, payload, lambda message: conn.send(("message", message)))
+            conn.send(("result", result))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+if __name__ == "__main__":
+    worker_main()
@@ -0,0 +1,112 @@
+import time
+import queue
+import logging
+import threading
+
+from batcher import drain_batch
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "pipeline_queue_wait_seconds", "Time items spent queued in front of a stage", ("stage",))
+STAGE_SECONDS = REGISTRY.histogram(
+    "pipeline_stage_batch_seconds", "Time a stage spent handling one batch", ("stage",))
+
+
+class Stage:
+    """A named pool of worker threads that pulls batches from its input queue and feeds the next stage"""
+
+    def __init__(self, name, handler, workers=1, max_queue_size=32, batch_size=1, batch_wait_ms=0, input_queue=None):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_wait_ms = batch_wait_ms
+        self.input_queue = input_queue if input_queue is not None else queue.Queue(maxsize=max_queue_size)
+        self.next_stage = None
+        self.on_error = None
+        self.in_flight = 0  # Items taken off the queue and not yet handed on
+        self._in_flight_lock = threading.Lock()
+        self._threads = []
+
+    def put(self, item):
+        """Hand an item to this stage, blocking while its queue is full"""
+        self.input_queue.put(item)
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _run(self):
+        while True:
+            batch = drain_batch(self.input_queue, self.batch_size, self.batch_wait_ms)
+            started = time.monotonic()
+            for item in batch:
+                if "enqueued_at" in item:
+                    QUEUE_WAIT_SECONDS.observe(started - item["enqueued_at"], self.name)
+            with self._in_flight_lock:
+                self.in_flight += len(batch)
+            handed_on = set()
+            try:
+                outputs = self.handler(batch) or []
+                if self.next_stage is not None:
+                    for item in outputs:
+                        self.next_stage.put(item)
+                        handed_on.add(id(item))
+            except Exception as e:
+                logger.exception(f"Error in {self.name} stage: {e}")
+                if self.on_error is not None:
+                    # Items already in the next stage are that stage's to finish or fail
+                    for item in batch:
+                        if id(item) in handed_on:
+                            continue
+                        try:
+                            self.on_error(item, e)
+                        except Exception:
+                            logger.exception(f"Error handler failed in {self.name} stage")
+            finally:
+                STAGE_SECONDS.observe(time.monotonic() - started, self.name)
+                with self._in_flight_lock:
+                    self.in_flight -= len(batch)
+                # Mark tasks as done even if there was an exception
+                for _ in batch:
+                    self.input_queue.task_done()
+
+
+class Pipeline:
+    """Stages chained by bounded queues, each with its own worker pool"""
+
+    def __init__(self, stages, on_error=None):
+        self.stages = stages
+        for stage, next_stage in zip(stages, stages[1:]):
+            stage.next_stage = next_stage
+        for stage in stages:
+            stage.on_error = on_error
+
+    def put(self, item):
+        self.stages[0].put(item)
+
+    def stage(self, name):
+        """Look up a stage by name, e.g. to enter the pipeline part-way through"""
+        for stage in self.stages:
+            if stage.name == name:
+                return stage
+        raise KeyError(name)
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+
+    def queue_sizes(self):
+        return {stage.name: stage.input_queue.qsize() for stage in self.stages}
+
+    def in_flight(self):
+        return {stage.name: stage.in_flight for stage in self.stages}
+
+    def cancel(self, session_id):
+        """Drop a session's queued items from every stage whose queue supports it; returns how many"""
+        return sum(stage.input_queue.cancel(session_id) for stage in self.stages
+                   if hasattr(stage.input_queue, "cancel"))
@@ -0,0 +1,37 @@
+import os
+import time
+import fnmatch
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def sweep_folder(folder, max_age_seconds, keep=(), suffixes=None, patterns=None):
+    """Delete files in folder last modified more than max_age_seconds ago; returns (files, bytes) removed
+
+    Names in keep are left alone, with suffixes only files ending in one of them are considered,
+    and with patterns only files matching one of those glob patterns.
+    """
+    if not os.path.isdir(folder):
+        return 0, 0
+    cutoff = time.time() - max_age_seconds
+    removed = removed_bytes = 0
+    for entry in os.scandir(folder):
+        if not entry.is_file() or entry.name in keep:
+            continue
+        if suffixes is not None and not entry.name.endswith(tuple(suffixes)):
+            continue
+        if patterns is not None and not any(fnmatch.fnmatchcase(entry.name, pattern) for pattern in patterns):
+            continue
+        try:
+            stat = entry.stat()
+            if stat.st_mtime >= cutoff:
+                continue
+            os.remove(entry.path)
+        except FileNotFoundError:
+            continue
+        removed += 1
+        removed_bytes += stat.st_size
+    if removed:
+        logger.info(f"Swept {removed} files ({removed_bytes} bytes) from {folder}")
+    return removed, removed_bytes
@@ -0,0 +1,180 @@
+import time
+import heapq
+import queue
+import itertools
+import threading
+from collections import Counter, deque
+
+# Lower is served first
+PRIORITY_INTERACTIVE = 0  # Live stream sessions
+PRIORITY_SHORT = 1  # Short uploads
+PRIORITY_BULK = 2  # Long uploads
+
+
+class AdmissionQueue:
+    """Bounded priority queue with admission control, wait estimates and cancellation by session
+
+    Items are dicts; a lower item["priority"] is served first, FIFO within a priority.
+    It offers the queue.Queue calls drain_batch and pipeline stages use (put, get,
+    get_nowait, task_done, join, qsize) on its own heap, lock and conditions, so it
+    works the same with real threads and with eventlet's patched ones.
+    offer() is the non-blocking way in: it refuses work when the queue is full, when one
+    client already has max_per_client items waiting, or when the estimated wait exceeds
+    max_wait_seconds. The wait estimate comes from the recent drain rate.
+    """
+
+    def __init__(self, maxsize=0, max_wait_seconds=None, max_per_client=None, default_service_seconds=1.0, on_drop=None):
+        self.maxsize = maxsize
+        self.max_wait_seconds = max_wait_seconds
+        self.max_per_client = max_per_client
+        self.default_service_seconds = default_service_seconds
+        self.on_drop = on_drop
+        self.admitted = 0
+        self.rejected = Counter()
+        self.dropped = 0
+        self.mean_wait = 0.0  # Moving average of seconds spent queued
+        self._heap = []
+        self._seq = itertools.count()
+        self._unfinished = 0  # Items put and not yet marked done with task_done()
+        self._per_client = Counter()
+        self._dequeued_at = deque(maxlen=64)
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._all_done = threading.Condition(self._lock)
+
+    def _full(self):
+        return 0 < self.maxsize <= len(self._heap)
+
+    def _push(self, item):
+        item["enqueued_at"] = time.monotonic()
+        if item.get("client_id"):
+            self._per_client[item["client_id"]] += 1
+        heapq.heappush(self._heap, (item.get("priority", PRIORITY_BULK), next(self._seq), item))
+        self._unfinished += 1
+        self._not_empty.notify()
+
+    def _pop(self):
+        _, _, item = heapq.heappop(self._heap)
+        self._forget_client(item)
+        now = time.monotonic()
+        self._dequeued_at.append(now)
+        self.mean_wait += 0.1 * ((now - item.get("enqueued_at", now)) - self.mean_wait)
+        self._not_full.notify()
+        return item
+
+    def _forget_client(self, item):
+        client_id = item.get("client_id")
+        if client_id:
+            self._per_client[client_id] -= 1
+            if self._per_client[client_id] <= 0:
+                del self._per_client[client_id]
+
+    def put(self, item, block=True, timeout=None):
+        """Enqueue regardless of admission limits, waiting while the queue is full"""
+        with self._not_full:
+            if not self._not_full.wait_for(lambda: not self._full(), timeout if block else 0):
+                raise queue.Full
+            self._push(item)
+
+    def put_nowait(self, item):
+        self.put(item, block=False)
+
+    def get(self, block=True, timeout=None):
+        with self._not_empty:
+            if not self._not_empty.wait_for(lambda: self._heap, timeout if block else 0):
+                raise queue.Empty
+            return self._pop()
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def task_done(self):
+        with self._lock:
+            if self._unfinished <= 0:
+                raise ValueError("task_done() called too many times")
+            self._unfinished -= 1
+            if self._unfinished == 0:
+                self._all_done.notify_all()
+
+    def join(self):
+        """Block until every item put has been marked done"""
+        with self._all_done:
+            self._all_done.wait_for(lambda: self._unfinished == 0)
+
+    def qsize(self):
+        with self._lock:
+            return len(self._heap)
+
+    def empty(self):
+        return self.qsize() == 0
+
+    def _estimated_wait(self, priority):
+        ahead = sum(1 for queued_priority, _, _ in self._heap if queued_priority <= priority)
+        now = time.monotonic()
+        recent = [t for t in self._dequeued_at if now - t < 60]
+        if len(recent) >= 2 and recent[-1] > recent[0]:
+            return ahead * (recent[-1] - recent[0]) / (len(recent) - 1)
+        return ahead * self.default_service_seconds
+
+    def estimated_wait(self, priority=PRIORITY_BULK):
+        """Seconds a new item of this priority would likely wait before being picked up"""
+        with self._lock:
+            return self._estimated_wait(priority)
+
+    def offer(self, item):
+        """Enqueue without blocking if admission allows; returns (admitted, reason, estimated_wait)"""
+        with self._lock:
+            priority = item.get("priority", PRIORITY_BULK)
+            estimated_wait = self._estimated_wait(priority)
+            reason = None
+            if self._full():
+                reason = "queue_full"
+            elif self.max_per_client and item.get("client_id") and \
+                    self._per_client[item["client_id"]] >= self.max_per_client:
+                reason = "client_limit"
+            elif self.max_wait_seconds is not None and estimated_wait > self.max_wait_seconds:
+                reason = "overloaded"
+
+            if reason is not None:
+                self.rejected[reason] += 1
+                return False, reason, estimated_wait
+
+            self._push(item)
+            self.admitted += 1
+            return True, None, estimated_wait
+
+    def cancel(self, session_id):
+        """Drop every queued item of a session, e.g. after its client went away; returns how many"""
+        with self._lock:
+            removed = [entry[2] for entry in self._heap if entry[2].get("session_id") == session_id]
+            if not removed:
+                return 0
+            self._heap = [entry for entry in self._heap if entry[2].get("session_id") != session_id]
+            heapq.heapify(self._heap)
+            for item in removed:
+                self._forget_client(item)
+            self.dropped += len(removed)
+            self._unfinished -= len(removed)
+            if self._unfinished == 0:
+                self._all_done.notify_all()
+            self._not_full.notify_all()
+
+        if self.on_drop is not None:
+            for item in removed:
+                self.on_drop(item)
+        return len(removed)
+
+    def stats(self):
+        with self._lock:
+            by_priority = Counter(priority for priority, _, _ in self._heap)
+            return {
+                "size": len(self._heap),
+                "max_size": self.maxsize,
+                "by_priority": {str(priority): count for priority, count in sorted(by_priority.items())},
+                "admitted": self.admitted,
+                "rejected": dict(self.rejected),
+                "dropped": self.dropped,
+                "mean_wait_seconds": round(self.mean_wait, 3),
+                "estimated_wait_seconds": round(self._estimated_wait(PRIORITY_BULK), 3)
+            }
@@ -0,0 +1,193 @@
+import os
+import json
+import sqlite3
+import logging
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def _encode(data):
+    return zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+
+def _decode(value):
+    # Rows written before compression hold plain JSON text
+    if isinstance(value, bytes):
+        value = zlib.decompress(value).decode("utf-8")
+    return json.loads(value)
+
+
+class SessionStore:
+    """Session results keyed by session_id: an in-memory LRU in front of a SQLite database
+
+    Results are stored as zlib-compressed compact JSON. prune() applies retention by age
+    and total size, and compact() hands the freed pages back to the filesystem.
+    """
+
+    def __init__(self, db_path, cache_size=1024):
+        self.db_path = db_path
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        # Only takes effect on a new database; compact() converts an existing one once
+        self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, "
+            "data TEXT NOT NULL, "
+            "source_file TEXT, "
+            "updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_source ON sessions (source_file)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions (updated_at)")
+        # Legacy result files whose rows were pruned, so rebuild() does not import them again
+        self._conn.execute("CREATE TABLE IF NOT EXISTS pruned_sources (source_file TEXT PRIMARY KEY)")
+        self._conn.commit()
+
+    def _remember(self, session_id, data):
+        self._cache[session_id] = data
+        self._cache.move_to_end(session_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def put(self, session_id, data, source_file=None):
+        """Store the result for a session, replacing any previous entry"""
+        if not session_id:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, data, source_file, updated_at) VALUES (?, ?, ?, ?)",
+                (session_id, _encode(data), source_file, time.time())
+            )
+            self._conn.commit()
+            self._remember(session_id, data)
+
+    def get(self, session_id):
+        """Return the stored result for a session, or None if it is unknown"""
+        with self._lock:
+            data = self._cache.get(session_id)
+            if data is not None:
+                self._cache.move_to_end(session_id)
+                return data
+            row = self._conn.execute(
+                "SELECT data FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            data = _decode(row[0])
+            self._remember(session_id, data)
+            return data
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def prune(self, max_age_seconds=None, max_bytes=None):
+        """Delete results older than max_age_seconds, then the oldest until the rest fit in max_bytes"""
+        deleted = []
+        with self._lock:
+            # Oldest first, so one pass applies both limits
+            rows = self._conn.execute(
+                "SELECT session_id, source_file, updated_at, LENGTH(data) FROM sessions ORDER BY updated_at").fetchall()
+            cutoff = time.time() - max_age_seconds if max_age_seconds else None
+            total = sum(size for _, _, _, size in rows)
+            for session_id, source_file, updated_at, size in rows:
+                expired = cutoff is not None and updated_at < cutoff
+                if not expired and not (max_bytes and total > max_bytes):
+                    break
+                deleted.append((session_id, source_file))
+                total -= size
+            self._conn.executemany("DELETE FROM sessions WHERE session_id = ?", ((s,) for s, _ in deleted))
+            self._conn.executemany("INSERT OR IGNORE INTO pruned_sources (source_file) VALUES (?)",
+                                   ((f,) for _, f in deleted if f))
+            self._conn.commit()
+            for session_id, _ in deleted:
+                self._cache.pop(session_id, None)
+        if deleted:
+            logger.info(f"Pruned {len(deleted)} stored results")
+        return len(deleted)
+
+    def compact(self):
+        """Release pages freed by deletes and truncate the write-ahead log"""
+        with self._lock:
+            if self._conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                # A database created before incremental vacuum needs one full rewrite to switch
+                self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                self._conn.execute("VACUUM")
+            freed = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+            # executescript steps the pragma to completion; execute() frees a single page
+            self._conn.executescript("PRAGMA incremental_vacuum;")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        return freed
+
+    def stats(self):
+        with self._lock:
+            count, data_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM sessions").fetchone()
+        return {"entries": count, "data_bytes": data_bytes, "file_bytes": os.path.getsize(self.db_path)}
+
+    def rebuild(self, responses_folder, transcriptions_folder, remove_files=False):
+        """Import any JSON result files that are not in the store yet, optionally deleting them afterwards
+
+        Imported rows are stamped with the import time, so retention counts from when
+        they entered the store. Files whose rows were pruned since are not imported again,
+        and remove_files deletes those too.
+        """
+        start_time = time.time()
+        with self._lock:
+            known = {row[0] for row in self._conn.execute("SELECT source_file FROM sessions WHERE source_file IS NOT NULL")}
+            known.update(row[0] for row in self._conn.execute("SELECT source_file FROM pruned_sources"))
+
+        rows = []
+        imported = []
+        # Responses first so that transcriptions win on a collision, matching the old lookup order.
+        # Files written before results carried a session_id are keyed by their file name instead.
+        for folder, unwrap, prefix in ((responses_folder, True, ""), (transcriptions_folder, False, "transcription_")):
+            if not os.path.isdir(folder):
+                continue
+            for entry in os.scandir(folder):
+                if not entry.name.endswith('.json'):
+                    continue
+                if entry.path in known:
+                    imported.append(entry.path)
+                    continue
+                try:
+                    with open(entry.path, 'r') as f:
+                        data = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Skipping unreadable result file {entry.path}: {e}")
+                    continue
+                session_id = data.get('session_id') or entry.name[len(prefix):-len('.json')]
+                if unwrap:
+                    data = data.get('colab_response', {})
+                rows.append((session_id, _encode(data), entry.path, start_time))
+                imported.append(entry.path)
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sessions (session_id, data, source_file, updated_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+            self._cache.clear()
+
+        if remove_files:
+            for path in imported:
+                os.remove(path)
+            # Files of pruned rows are not needed either
+            with self._lock:
+                pruned = [row[0] for row in self._conn.execute("SELECT source_file FROM pruned_sources")]
+                for path in pruned:
+                    if os.path.exists(path):
+                        os.remove(path)
+                self._conn.execute("DELETE FROM pruned_sources")
+                self._conn.commit()
+        logger.info(f"Session index rebuilt: {len(rows)} new entries in {time.time() - start_time:.2f}s")
+        return len(rows)
@@ -0,0 +1,210 @@
+import time
+import threading
+import numpy as np
+
+
+class AudioRingBuffer:
+    """Fixed-capacity float32 ring buffer addressed by absolute sample position"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.total = 0  # Samples written since the stream started
+        self._data = np.zeros(capacity, dtype=np.float32)
+
+    @property
+    def start(self):
+        """Oldest absolute sample position still held in the buffer"""
+        return max(0, self.total - self.capacity)
+
+    def append(self, samples):
+        samples = np.asarray(samples, dtype=np.float32)
+        count = len(samples)
+        if count >= self.capacity:
+            self.total += count - self.capacity
+            samples = samples[-self.capacity:]
+            count = self.capacity
+
+        pos = self.total % self.capacity
+        first = min(count, self.capacity - pos)
+        self._data[pos:pos + first] = samples[:first]
+        self._data[:count - first] = samples[first:]
+        self.total += count
+
+    def read(self, start, end):
+        """Copy out samples [start, end) by absolute position"""
+        if start < self.start or end > self.total or start > end:
+            raise ValueError(f"Range {start}:{end} is outside the buffer ({self.start}:{self.total})")
+        count = end - start
+        pos = start % self.capacity
+        first = min(count, self.capacity - pos)
+        return np.concatenate((self._data[pos:pos + first], self._data[:count - first]))
+
+
+class FrameTracker:
+    """Sequence bookkeeping for numbered audio frames: gaps, duplicates and bytes received"""
+
+    MAX_TRACKED_GAPS = 1024
+
+    def __init__(self):
+        self.next_seq = 0
+        self.missing = set()
+        self.frames = 0
+        self.duplicates = 0
+        self.late = 0
+        self.bytes_received = 0
+
+    def accept(self, seq, size):
+        """Record an incoming frame
+
+        Returns "ok" or "gap" when the frame should be appended, and "duplicate" or
+        "late" when it arrived after the stream had already moved past it.
+        """
+        self.bytes_received += size
+        if seq is None:
+            seq = self.next_seq
+
+        if seq >= self.next_seq:
+            status = "gap" if seq > self.next_seq else "ok"
+            self.missing.update(range(max(self.next_seq, seq - self.MAX_TRACKED_GAPS), seq))
+            self.next_seq = seq + 1
+            self.frames += 1
+            return status
+
+        if seq in self.missing:
+            # Too late to splice in without reordering audio that was already transcribed
+            self.missing.discard(seq)
+            self.late += 1
+            return "late"
+
+        self.duplicates += 1
+        return "duplicate"
+
+
+class StreamingTranscriber:
+    """Incremental CTC transcription of one audio stream over a sliding window
+
+    Audio is transcribed in chunks of chunk_seconds. Each chunk goes through the model
+    with left_context_seconds of already-committed audio kept in the ring buffer and
+    right_context_seconds of lookahead. Only the frames belonging to the chunk itself are
+    committed (stable text); the lookahead frames give the unstable tail. Every sample is
+    therefore run through the model a bounded number of times, however long the stream.
+    """
+
+    def __init__(self, frame_ids_fn, decode_fn, sample_rate=16000, chunk_seconds=1.0,
+                 left_context_seconds=2.0, right_context_seconds=0.5, reference_seconds=0.0, denoiser=None):
+        self.frame_ids_fn = frame_ids_fn
+        self.decode_fn = decode_fn
+        self.sample_rate = sample_rate
+        self.chunk = int(chunk_seconds * sample_rate)
+        self.left_context = int(left_context_seconds * sample_rate)
+        self.right_context = int(right_context_seconds * sample_rate)
+        # Left context, one chunk awaiting lookahead, the lookahead itself and one incoming piece
+        self.buffer = AudioRingBuffer(self.left_context + 2 * self.chunk + self.right_context)
+        self.processed = 0  # Absolute sample position up to which frames are committed
+        self.denoiser = denoiser  # Optional StreamDenoiser applied before buffering
+        self._received = 0
+        # The start of the stream is kept whole, e.g. as a speaker reference for TTS
+        self.reference = np.zeros(int(reference_seconds * sample_rate), dtype=np.float32)
+        self.committed_ids = []
+        self.tail_ids = []
+        self.compute_time = 0.0
+        self.frames = FrameTracker()
+        self.decoder = None  # Per-stream payload decoder state, e.g. for Opus
+        self.newest_cumulative = 0  # Longest cumulative payload seen, counted on arrival
+        self.superseded = 0
+        self.last_activity = time.monotonic()
+        self.lock = threading.RLock()
+
+    @property
+    def received(self):
+        """Number of samples fed so far"""
+        return self._received
+
+    @property
+    def reference_audio(self):
+        """Up to reference_seconds from the start of the stream"""
+        return self.reference[:min(self._received, len(self.reference))]
+
+    @property
+    def duration(self):
+        return self.buffer.total / self.sample_rate
+
+    def _step(self, commit_end, window_end):
+        window_start = max(self.buffer.start, self.processed - self.left_context)
+        audio = self.buffer.read(window_start, window_end)
+
+        start_time = time.time()
+        frame_ids = list(self.frame_ids_fn(audio))
+        self.compute_time += time.time() - start_time
+
+        # Map sample positions onto the model's output frames
+        frames_per_sample = len(frame_ids) / max(1, len(audio))
+        commit_from = int(round((self.processed - window_start) * frames_per_sample))
+        commit_to = int(round((commit_end - window_start) * frames_per_sample))
+
+        self.committed_ids.extend(frame_ids[commit_from:commit_to])
+        self.tail_ids = frame_ids[commit_to:]
+        self.processed = commit_end
+
+    def feed(self, samples):
+        """Append PCM and transcribe every chunk whose lookahead is available
+
+        Returns the new partial transcript, or None if no chunk was ready yet.
+        """
+        with self.lock:
+            self.last_activity = time.monotonic()
+            if self._received < len(self.reference):
+                count = min(len(samples), len(self.reference) - self._received)
+                self.reference[self._received:self._received + count] = samples[:count]
+            self._received += len(samples)
+
+            if self.denoiser is not None:
+                samples = self.denoiser.process(samples)
+            return self._partial() if self._append(samples) else None
+
+    def feed_cumulative(self, samples):
+        """Feed a payload holding the whole stream so far, appending only what is new
+
+        A payload shorter than one that has already arrived was overtaken by it, so it is
+        dropped without touching the model. Returns (partial or None, superseded).
+        """
+        self.newest_cumulative = max(self.newest_cumulative, len(samples))
+        with self.lock:
+            if len(samples) < self.newest_cumulative:
+                self.superseded += 1
+                return None, True
+            return self.feed(samples[self._received:]), False
+
+    def _append(self, samples):
+        stepped = False
+        for offset in range(0, len(samples), self.chunk):
+            self.buffer.append(samples[offset:offset + self.chunk])
+            while self.buffer.total - self.processed >= self.chunk + self.right_context:
+                commit_end = self.processed + self.chunk
+                self._step(commit_end, commit_end + self.right_context)
+                stepped = True
+        return stepped
+
+    def finalize(self):
+        """Commit whatever audio is left and return the final transcript"""
+        with self.lock:
+            if self.denoiser is not None:
+                self._append(self.denoiser.process(np.zeros(0, dtype=np.float32), final=True))
+            while self.processed < self.buffer.total:
+                commit_end = min(self.processed + self.chunk, self.buffer.total)
+                self._step(commit_end, min(commit_end + self.right_context, self.buffer.total))
+            self.tail_ids = []
+            return self.decode_fn(self.committed_ids) if self.committed_ids else ""
+
+    def _partial(self):
+        stable_text = self.decode_fn(self.committed_ids) if self.committed_ids else ""
+        full_text = self.decode_fn(self.committed_ids + self.tail_ids) if self.tail_ids else stable_text
+        if full_text.startswith(stable_text):
+            unstable_text = full_text[len(stable_text):].strip()
+        else:
+            unstable_text = self.decode_fn(self.tail_ids) if self.tail_ids else ""
+        return {
+            "stable_text": stable_text,
+            "unstable_text": unstable_text,
+            "audio_seconds": self.duration
+        }
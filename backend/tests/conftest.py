@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Backend modules import each other by name, as when app.py runs from this folder
+sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture(scope="session")
+def app_module(tmp_path_factory):
+    """app imported once, with the benchmark stub models and its runtime folders in a scratch directory"""
+    pytest.importorskip("torch")
+    sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+    import stub_models
+
+    os.environ.update(SERVER_MODE="threading", MODEL_SERVER_MODE="false", STORAGE_SWEEP_SECONDS="0",
+                      DATA_DIR=str(tmp_path_factory.mktemp("data")))
+    stub_models.install()
+    import app
+    return app
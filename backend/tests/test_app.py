@@ -0,0 +1,63 @@
+import io
+import os
+import time
+
+
+def write_file(folder, name, age_seconds):
+    path = os.path.join(folder, name)
+    with open(path, "wb") as f:
+        f.write(b"audio")
+    mtime = time.time() - age_seconds
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_storage_sweep_only_removes_files_the_server_wrote(app_module):
+    folder = app_module.UPLOAD_FOLDER
+    age = app_module.ORPHAN_FILE_SECONDS + 60
+    server_files = ["s1_upload.m4a", "s2_chunk_3.wav", "s3_websocket_chunk.wav", "u1.part"]
+    other_files = ["1bdb1d9d-54ca-43b1-bc14-ea49867b29c9.m4a", "notes.txt"]
+    for name in server_files + other_files:
+        write_file(folder, name, age)
+    fresh = write_file(folder, "s4_upload.wav", 0)
+
+    app_module.maintain_storage()
+
+    remaining = set(os.listdir(folder))
+    assert remaining.isdisjoint(server_files)
+    assert set(other_files) <= remaining
+    assert os.path.basename(fresh) in remaining
+
+
+def test_remote_tts_stream_reports_the_filename_the_worker_result_was_stored_under(app_module, monkeypatch):
+    def generate_tts_remote(text, voice_audio, sample_rate, user_id, on_chunk=None):
+        on_chunk(0, text, b"\x00\x00" * 160, 16000)
+        return {"tts_audio": "tts_stored.wav", "tts_cache": "miss"}
+
+    events = []
+    monkeypatch.setattr(app_module, "generate_tts_remote", generate_tts_remote)
+    monkeypatch.setattr(app_module, "emit_to_session", lambda event, data: events.append((event, data)))
+
+    with app_module.app.test_request_context():
+        response = app_module.stream_remote_tts("Hello.", b"voice", 16000, "user-1", session_id="s1")
+        body = b"".join(response.response)
+
+    assert "X-TTS-Audio-Url" not in response.headers
+    assert body.endswith(b"\x00\x00" * 160)
+    deadline = time.time() + 5
+    while not events and time.time() < deadline:
+        time.sleep(0.01)
+    assert events == [("tts_stream_complete", {"session_id": "s1", "tts_audio_url": "/api/tts/tts_stored.wav"})]
+
+
+def test_rejected_upload_leaves_the_socket_unbound(app_module, monkeypatch):
+    monkeypatch.setattr(app_module.PREDICTION_QUEUE, "offer", lambda item: (False, "client_limit", 0.0))
+
+    response = app_module.app.test_client().post("/api/upload", data={
+        "file": (io.BytesIO(b"RIFF audio"), "clip.wav"),
+        "socket_id": "socket-1"
+    }, content_type="multipart/form-data")
+
+    assert response.status_code == 429
+    assert "socket-1" not in app_module.SOCKET_SESSIONS
+    assert "socket-1" not in app_module.SESSION_SOCKETS.values()
@@ -0,0 +1,20 @@
+import numpy as np
+
+from audio_io import AudioClip
+from denoise import RNNOISE_SAMPLE_RATE, StreamResampler
+
+
+def test_clip_resamples_like_the_streaming_path():
+    rng = np.random.default_rng(0)
+    samples = (0.3 * rng.standard_normal(44100 * 2)).clip(-1, 1).astype(np.float32)
+    clip = AudioClip(samples, 44100)
+
+    resampler = StreamResampler(44100, RNNOISE_SAMPLE_RATE)
+    streamed = np.concatenate([resampler.process(samples[i:i + 4410]) for i in range(0, len(samples), 4410)]
+                              + [resampler.flush()])
+    expected = (np.clip(streamed, -1.0, 1.0) * 32767).astype(np.int16)
+
+    pcm = clip.pcm_48k()
+    assert len(pcm) == len(expected) == len(samples) * RNNOISE_SAMPLE_RATE // 44100
+    assert np.abs(pcm.astype(np.int32) - expected).max() <= 1
+    assert len(clip.mono_16k()) == len(samples) * 16000 // 44100
@@ -0,0 +1,85 @@
+import io
+import wave
+
+import numpy as np
+import pytest
+
+from chunked_upload import ChunkedUpload, UploadOffsetError
+
+
+@pytest.fixture
+def upload(tmp_path):
+    decoded = []
+    upload = ChunkedUpload("upload-1", "session-1", str(tmp_path / "upload-1.part"), decoded.append)
+    upload.decoded = decoded
+    yield upload
+    upload.abort()
+
+
+def wav_bytes(seconds=1.0, rate=16000):
+    samples = (0.1 * np.sin(2 * np.pi * 220 * np.arange(int(seconds * rate)) / rate) * 32767).astype(np.int16)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+def spooled(upload):
+    with open(upload.path, "rb") as f:
+        return f.read()
+
+
+def test_overlapping_retry_only_appends_the_new_bytes(upload):
+    data = bytes(range(256)) * 4
+    assert upload.write(0, io.BytesIO(data[:600])) == 600
+    # The client missed the acknowledgement and resends from an earlier offset, in small blocks
+    assert upload.write(400, io.BytesIO(data[400:800]), block_size=64) == 800
+    assert upload.write(800, io.BytesIO(data[800:])) == len(data)
+    assert spooled(upload) == data
+
+
+def test_chunk_wholly_inside_received_bytes_changes_nothing(upload):
+    upload.write(0, io.BytesIO(b"a" * 100))
+    assert upload.write(10, io.BytesIO(b"b" * 50)) == 100
+    assert spooled(upload) == b"a" * 100
+
+
+def test_chunk_past_the_received_bytes_reports_where_to_resume(upload):
+    upload.write(0, io.BytesIO(b"a" * 100))
+    with pytest.raises(UploadOffsetError) as error:
+        upload.write(150, io.BytesIO(b"b" * 50))
+    assert error.value.offset == 100
+    assert upload.offset == 100
+
+
+def test_writes_after_finish_are_refused(upload):
+    upload.write(0, io.BytesIO(wav_bytes()))
+    assert upload.finish(timeout=10)
+    with pytest.raises(RuntimeError):
+        upload.write(upload.offset, io.BytesIO(b"late"))
+
+
+def test_audio_is_decoded_as_it_arrives(upload):
+    data = wav_bytes(2.0)
+    for offset in range(0, len(data), 8192):
+        upload.write(offset, io.BytesIO(data[offset:offset + 8192]))
+    assert upload.finish(timeout=10)
+    assert upload.error is None
+    assert abs(sum(len(block) for block in upload.decoded) - 32000) <= 160
+
+
+def test_upload_endpoint_answers_a_gap_with_409_and_the_offset(app_module):
+    client = app_module.app.test_client()
+    created = client.post("/api/uploads", json={"filename": "clip.wav"}).get_json()
+    url = f"/api/uploads/{created['upload_id']}"
+
+    assert client.put(f"{url}?offset=0", data=b"a" * 100).get_json()["offset"] == 100
+    assert client.put(f"{url}?offset=60", data=b"a" * 80).get_json()["offset"] == 140
+
+    response = client.put(f"{url}?offset=200", data=b"a" * 10)
+    assert response.status_code == 409
+    assert response.get_json()["offset"] == 140
+    app_module.CHUNKED_UPLOADS.pop(created["upload_id"]).abort()
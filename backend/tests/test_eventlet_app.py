@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+pytest.importorskip("eventlet")
+pytest.importorskip("torch")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a child process: monkey patching is global and has to happen before anything else imports threading
+SMOKE_SCRIPT = textwrap.dedent("""
+    import eventlet
+    eventlet.monkey_patch()
+
+    import io
+    import os
+    import sys
+
+    sys.path.insert(0, {backend!r})
+    sys.path.insert(0, os.path.join({backend!r}, "benchmarks"))
+
+    import numpy as np
+    import soundfile as sf
+    import stub_models
+
+    stub_models.install()
+    import app
+
+    client = app.app.test_client()
+    wav = io.BytesIO()
+    sf.write(wav, np.zeros(16000, dtype=np.float32), 16000, format="WAV")
+    wav.seek(0)
+    response = client.post("/api/upload", data={{"file": (wav, "smoke.wav")}},
+                           content_type="multipart/form-data")
+    print("upload", response.status_code, flush=True)
+    print("health", client.get("/health").status_code, flush=True)
+    print("uploads", client.post("/api/uploads", json={{"filename": "smoke.wav"}}).status_code, flush=True)
+    os._exit(0)  # Skip interpreter shutdown, which waits on the model and pipeline green threads
+""")
+
+
+def test_upload_and_health_respond_under_eventlet(tmp_path):
+    env = dict(os.environ, SERVER_MODE="eventlet", MODEL_SERVER_MODE="false", DATA_DIR=str(tmp_path))
+    result = subprocess.run([sys.executable, "-c", SMOKE_SCRIPT.format(backend=BACKEND_DIR)],
+                            env=env, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    lines = result.stdout.splitlines()
+    assert "upload 200" in lines, result.stdout + result.stderr
+    assert "health 200" in lines, result.stdout + result.stderr
+    assert "uploads 201" in lines, result.stdout + result.stderr
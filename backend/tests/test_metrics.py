@@ -0,0 +1,43 @@
+from metrics import Registry
+
+
+def test_histogram_exposition_escapes_labels_and_ends_with_an_inf_bucket():
+    registry = Registry()
+    histogram = registry.histogram("step_seconds", "Time per step", ("step",), buckets=(1.0, 0.1))
+    label = 'say "hi"\\now\nthen'
+    histogram.observe(0.05, label)
+    histogram.observe(0.5, label)
+    histogram.observe(5.0, label)
+
+    lines = registry.exposition().splitlines()
+    escaped = 'step="say \\"hi\\"\\\\now\\nthen"'
+    assert lines == [
+        "# HELP step_seconds Time per step",
+        "# TYPE step_seconds histogram",
+        f'step_seconds_bucket{{{escaped},le="0.1"}} 1',
+        f'step_seconds_bucket{{{escaped},le="1.0"}} 2',
+        f'step_seconds_bucket{{{escaped},le="+Inf"}} 3',
+        f"step_seconds_sum{{{escaped}}} 5.55",
+        f"step_seconds_count{{{escaped}}} 3",
+    ]
+
+
+def test_histogram_counts_a_value_on_a_bucket_bound_in_that_bucket():
+    registry = Registry()
+    histogram = registry.histogram("wait_seconds", "Queue wait", buckets=(0.1, 1.0))
+    histogram.observe(0.1)
+
+    assert 'wait_seconds_bucket{le="0.1"} 1' in registry.exposition().splitlines()
+
+
+def test_gauge_callback_is_read_at_scrape_time():
+    depth = {"asr": 3}
+    registry = Registry()
+    registry.gauge("queue_depth", "Items waiting", ("stage",),
+                   callback=lambda: {(stage,): size for stage, size in depth.items()})
+    assert 'queue_depth{stage="asr"} 3' in registry.exposition()
+
+    depth["asr"] = 0
+    depth["tts"] = 1.5
+    lines = registry.exposition().splitlines()
+    assert lines[2:] == ['queue_depth{stage="asr"} 0', 'queue_depth{stage="tts"} 1.5']
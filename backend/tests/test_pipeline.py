@@ -0,0 +1,49 @@
+import queue
+
+from pipeline import Pipeline, Stage
+
+
+class RefusingQueue(queue.Queue):
+    """Input queue of a next stage that refuses the item numbered refuse"""
+
+    def __init__(self, refuse):
+        super().__init__()
+        self.refuse = refuse
+
+    def put(self, item, block=True, timeout=None):
+        if item["n"] == self.refuse:
+            raise RuntimeError("refused")
+        super().put(item, block, timeout)
+
+
+def run_batch(first_handler, next_queue, count=4):
+    """Send count items through a two-stage pipeline whose first stage takes them as one batch"""
+    failed = []
+    handled = []
+
+    def second_handler(batch):
+        handled.extend(entry["n"] for entry in batch)
+
+    def on_error(entry, error):
+        failed.append(entry["n"])
+
+    first = Stage("first", first_handler, batch_size=count, batch_wait_ms=200)
+    second = Stage("second", second_handler, input_queue=next_queue)
+    pipeline = Pipeline([first, second], on_error=on_error)
+    for n in range(count):
+        pipeline.put({"n": n})
+    pipeline.start()
+    first.input_queue.join()
+    second.input_queue.join()
+    return sorted(failed), sorted(handled)
+
+
+def test_failed_batch_reports_every_item():
+    def handler(batch):
+        raise RuntimeError("model crashed")
+
+    assert run_batch(handler, queue.Queue()) == ([0, 1, 2, 3], [])
+
+
+def test_items_already_handed_on_are_not_failed():
+    assert run_batch(lambda batch: batch, RefusingQueue(refuse=2)) == ([2, 3], [0, 1])
@@ -0,0 +1,127 @@
+import queue as stdlib_queue
+import threading
+
+import pytest
+
+from batcher import drain_batch
+from scheduler import AdmissionQueue, PRIORITY_INTERACTIVE, PRIORITY_SHORT, PRIORITY_BULK
+
+
+def item(session_id, priority=PRIORITY_BULK, client_id=None):
+    return {"session_id": session_id, "priority": priority, "client_id": client_id}
+
+
+def test_rejects_when_full():
+    queue = AdmissionQueue(2)
+    assert queue.offer(item("a"))[0]
+    assert queue.offer(item("b"))[0]
+
+    admitted, reason, _ = queue.offer(item("c"))
+
+    assert (admitted, reason) == (False, "queue_full")
+    assert queue.qsize() == 2
+    assert queue.stats()["rejected"] == {"queue_full": 1}
+
+
+def test_rejects_client_over_its_limit_only():
+    queue = AdmissionQueue(10, max_per_client=2)
+    queue.offer(item("a", client_id="client-1"))
+    queue.offer(item("b", client_id="client-1"))
+
+    assert queue.offer(item("c", client_id="client-1"))[:2] == (False, "client_limit")
+    assert queue.offer(item("d", client_id="client-2"))[0]
+    # A client's slot frees up once one of its items is picked up
+    queue.get()
+    assert queue.offer(item("e", client_id="client-1"))[0]
+
+
+def test_rejects_when_estimated_wait_is_too_long():
+    queue = AdmissionQueue(10, max_wait_seconds=2.5, default_service_seconds=1.0)
+    for session_id in "abc":
+        assert queue.offer(item(session_id))[0]
+
+    admitted, reason, estimated_wait = queue.offer(item("d"))
+
+    assert (admitted, reason, estimated_wait) == (False, "overloaded", 3.0)
+    # Work ahead of it in the queue is what counts, so an interactive item still gets in
+    assert queue.offer(item("e", PRIORITY_INTERACTIVE))[0]
+
+
+def test_serves_by_priority_then_arrival():
+    queue = AdmissionQueue(10)
+    for session_id, priority in (("bulk-1", PRIORITY_BULK), ("short-1", PRIORITY_SHORT), ("live-1", PRIORITY_INTERACTIVE),
+                                 ("bulk-2", PRIORITY_BULK), ("short-2", PRIORITY_SHORT)):
+        queue.offer(item(session_id, priority))
+
+    order = [queue.get()["session_id"] for _ in range(5)]
+
+    assert order == ["live-1", "short-1", "short-2", "bulk-1", "bulk-2"]
+
+
+def test_drain_batch_keeps_priority_order():
+    queue = AdmissionQueue(10)
+    queue.offer(item("bulk", PRIORITY_BULK))
+    queue.offer(item("live", PRIORITY_INTERACTIVE))
+
+    batch = drain_batch(queue, 4, 0)
+
+    assert [entry["session_id"] for entry in batch] == ["live", "bulk"]
+
+
+def test_cancel_drops_a_sessions_items_and_reports_them():
+    dropped = []
+    queue = AdmissionQueue(10, max_per_client=1, on_drop=dropped.append)
+    queue.offer(item("a", client_id="client-1"))
+    queue.offer(item("b", client_id="client-2"))
+
+    assert queue.cancel("a") == 1
+    assert queue.cancel("missing") == 0
+
+    assert [entry["session_id"] for entry in dropped] == ["a"]
+    assert queue.qsize() == 1
+    assert queue.stats()["dropped"] == 1
+    # The cancelled item no longer counts against its client
+    assert queue.offer(item("c", client_id="client-1"))[0]
+    assert [queue.get()["session_id"] for _ in range(2)] == ["b", "c"]
+
+
+def test_blocking_put_and_get_time_out():
+    queue = AdmissionQueue(1)
+    queue.put(item("a"))
+
+    with pytest.raises(stdlib_queue.Full):
+        queue.put(item("b"), timeout=0.01)
+    assert queue.get()["session_id"] == "a"
+    with pytest.raises(stdlib_queue.Empty):
+        queue.get(timeout=0.01)
+    with pytest.raises(stdlib_queue.Empty):
+        queue.get_nowait()
+
+
+def test_join_waits_for_task_done_and_cancelled_items_count_as_done():
+    queue = AdmissionQueue(10)
+    queue.offer(item("a"))
+    queue.offer(item("b"))
+    joined = threading.Event()
+    threading.Thread(target=lambda: (queue.join(), joined.set()), daemon=True).start()
+
+    queue.get()
+    queue.task_done()
+    assert not joined.wait(0.05)
+    queue.cancel("b")
+    assert joined.wait(1)
+    with pytest.raises(ValueError):
+        queue.task_done()
+
+
+def test_stats_count_admissions_rejections_and_priorities():
+    queue = AdmissionQueue(2)
+    queue.offer(item("a", PRIORITY_INTERACTIVE))
+    queue.offer(item("b"))
+    queue.offer(item("c"))
+
+    stats = queue.stats()
+
+    assert stats["size"] == 2 and stats["max_size"] == 2
+    assert stats["by_priority"] == {str(PRIORITY_INTERACTIVE): 1, str(PRIORITY_BULK): 1}
+    assert stats["admitted"] == 2 and stats["rejected"] == {"queue_full": 1}
@@ -0,0 +1,147 @@
+import os
+import json
+import time
+import sqlite3
+
+import pytest
+
+from session_store import SessionStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """time.time() under the test's control, starting at a fixed instant"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+
+def result(n, size=10):
+    return {"transcription": f"result {n} " + "x" * size, "duration": n}
+
+
+def write_json(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f)
+    # Written long ago, as legacy files are by the time they are imported
+    os.utime(path, (0, 0))
+
+
+def test_put_and_get_round_trip_through_the_database(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    store = SessionStore(path)
+    store.put("a", result(1))
+    store.put("a", result(2))
+
+    reopened = SessionStore(path, cache_size=0)
+
+    assert reopened.get("a") == result(2)
+    assert reopened.get("missing") is None
+    assert len(reopened) == 1
+
+
+def test_prune_by_age(tmp_path, clock):
+    store = SessionStore(str(tmp_path / "sessions.db"))
+    store.put("old", result(1))
+    clock[0] += 100
+    store.put("new", result(2))
+    clock[0] += 50
+
+    assert store.prune(max_age_seconds=120) == 1
+
+    assert store.get("old") is None  # Gone from the cache as well
+    assert store.get("new") == result(2)
+
+
+def test_prune_by_size_drops_oldest_first(tmp_path, clock):
+    store = SessionStore(str(tmp_path / "sessions.db"))
+    for n in range(5):
+        store.put(str(n), result(n, size=2000))
+        clock[0] += 1
+    entry_bytes = store.stats()["data_bytes"] // 5
+
+    assert store.prune(max_bytes=3 * entry_bytes) == 2
+
+    assert [store.get(str(n)) is not None for n in range(5)] == [False, False, True, True, True]
+    assert store.prune(max_bytes=3 * entry_bytes) == 0
+
+
+def test_compact_returns_pages_freed_by_prune(tmp_path, clock):
+    store = SessionStore(str(tmp_path / "sessions.db"))
+    for n in range(200):
+        store.put(str(n), {"text": os.urandom(2000).hex()})
+    store.compact()
+    size_before = os.path.getsize(store.db_path)
+
+    clock[0] += 10
+    store.prune(max_age_seconds=5)
+
+    assert store.compact() > 0
+    assert os.path.getsize(store.db_path) < size_before / 4
+    assert len(store) == 0
+
+
+def test_compact_converts_a_database_without_incremental_vacuum(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE sessions (session_id TEXT PRIMARY KEY, data TEXT NOT NULL, "
+                 "source_file TEXT, updated_at REAL NOT NULL)")
+    # Rows from before compression hold plain JSON text
+    conn.execute("INSERT INTO sessions VALUES ('legacy', ?, NULL, 0)", (json.dumps(result(1)),))
+    conn.commit()
+    conn.close()
+
+    store = SessionStore(path)
+    store.compact()
+
+    assert store._conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    assert store.get("legacy") == result(1)
+
+
+@pytest.fixture
+def legacy_folders(tmp_path):
+    responses = tmp_path / "responses"
+    transcriptions = tmp_path / "transcriptions"
+    responses.mkdir()
+    transcriptions.mkdir()
+    write_json(responses / "a.json", {"session_id": "a", "colab_response": result(1)})
+    # Files from before results carried a session_id are keyed by their name
+    write_json(transcriptions / "transcription_b.json", result(2))
+    return str(responses), str(transcriptions)
+
+
+def test_rebuild_imports_each_file_once(tmp_path, legacy_folders):
+    store = SessionStore(str(tmp_path / "sessions.db"))
+
+    assert store.rebuild(*legacy_folders) == 2
+    assert store.rebuild(*legacy_folders) == 0
+
+    assert store.get("a") == result(1)
+    assert store.get("b") == result(2)
+
+
+def test_rebuild_stamps_import_time_and_does_not_bring_back_pruned_rows(tmp_path, legacy_folders, clock):
+    store = SessionStore(str(tmp_path / "sessions.db"))
+    store.rebuild(*legacy_folders)
+
+    # The files are decades old, but retention counts from the import
+    assert store.prune(max_age_seconds=60) == 0
+
+    clock[0] += 120
+    assert store.prune(max_age_seconds=60) == 2
+    assert store.rebuild(*legacy_folders) == 0
+    assert store.get("a") is None
+
+
+def test_rebuild_can_remove_imported_and_pruned_files(tmp_path, legacy_folders, clock):
+    responses, transcriptions = legacy_folders
+    store = SessionStore(str(tmp_path / "sessions.db"))
+    store.rebuild(responses, transcriptions)
+    clock[0] += 120
+    store.prune(max_age_seconds=60)
+    write_json(os.path.join(responses, "c.json"), {"session_id": "c", "colab_response": result(3)})
+
+    assert store.rebuild(responses, transcriptions, remove_files=True) == 1
+
+    assert os.listdir(responses) == [] and os.listdir(transcriptions) == []
+    assert store.get("c") == result(3)
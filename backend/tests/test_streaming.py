@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from streaming import FrameTracker, StreamingTranscriber
+
+HOP = 320  # Samples per output frame, 20 ms at 16 kHz like the CTC model
+
+
+def frame_ids(audio):
+    """A stand-in CTC model: one id per frame, read off the frame's level"""
+    frames = len(audio) // HOP
+    return [int(round(audio[i * HOP:(i + 1) * HOP].mean() * 10)) for i in range(frames)]
+
+
+def decode(ids):
+    """Collapse repeats and drop blanks (0), like CTC greedy decoding"""
+    text = []
+    previous = None
+    for token in ids:
+        if token != previous and token != 0:
+            text.append(chr(ord("a") + token - 1))
+        previous = token
+    return "".join(text)
+
+
+def make_audio(seed=0, frames=400):
+    rng = np.random.default_rng(seed)
+    # Runs of silence and "tokens" of a few frames each, at levels 0.1 to 0.5
+    levels = []
+    while len(levels) < frames:
+        levels += [rng.integers(0, 6) / 10] * int(rng.integers(2, 12))
+    return np.repeat(np.array(levels[:frames], dtype=np.float32), HOP)
+
+
+def transcriber(**kwargs):
+    return StreamingTranscriber(frame_ids, decode, chunk_seconds=0.2, left_context_seconds=0.4,
+                                right_context_seconds=0.1, **kwargs)
+
+
+@pytest.mark.parametrize("piece", [160, 1000, 3200, 7777])
+def test_incremental_output_matches_full_pass(piece):
+    audio = make_audio()
+    stream = transcriber()
+    partials = []
+    for offset in range(0, len(audio), piece):
+        partial = stream.feed(audio[offset:offset + piece])
+        if partial is not None:
+            partials.append(partial)
+
+    full = decode(frame_ids(audio))
+    assert stream.finalize() == full
+    assert partials
+    for partial in partials:
+        assert full.startswith(partial["stable_text"])
+
+
+def test_cumulative_payloads_match_full_pass_and_skip_overtaken_ones():
+    audio = make_audio(seed=1)
+    stream = transcriber()
+    ends = list(range(4000, len(audio), 4000)) + [len(audio)]
+    stream.feed_cumulative(audio[:ends[1]])
+    # The first payload arrives after the second, which already holds it
+    assert stream.feed_cumulative(audio[:ends[0]]) == (None, True)
+    for end in ends[2:]:
+        stream.feed_cumulative(audio[:end])
+
+    assert stream.received == len(audio)
+    assert stream.superseded == 1
+    assert stream.finalize() == decode(frame_ids(audio))
+
+
+def test_reference_keeps_start_of_stream():
+    audio = make_audio(seed=2)
+    stream = transcriber(reference_seconds=0.5)
+    for offset in range(0, len(audio), 1000):
+        stream.feed(audio[offset:offset + 1000])
+    np.testing.assert_array_equal(stream.reference_audio, audio[:8000])
+
+
+def test_frame_tracker_reports_missing_seqs_until_they_arrive():
+    frames = FrameTracker()
+    statuses = [frames.accept(seq, 100) for seq in (0, 1, 4, 2, 4, 7)]
+
+    assert statuses == ["ok", "ok", "gap", "late", "duplicate", "gap"]
+    assert sorted(frames.missing) == [3, 5, 6]
+    assert (frames.frames, frames.late, frames.duplicates, frames.bytes_received) == (4, 1, 1, 600)
+    assert frames.next_seq == 8
+
+
+def test_frame_tracker_numbers_unsequenced_frames_in_order_and_bounds_gaps():
+    frames = FrameTracker()
+    assert [frames.accept(None, 10) for _ in range(3)] == ["ok", "ok", "ok"]
+    assert frames.accept(3 + FrameTracker.MAX_TRACKED_GAPS + 500, 10) == "gap"
+    assert len(frames.missing) == FrameTracker.MAX_TRACKED_GAPS
+    assert min(frames.missing) == 503
@@ -0,0 +1,58 @@
+import os
+
+from tts_cache import TTSOutputCache
+
+
+def synthesize(cache, text, size):
+    """Commit a fake synthesis of size bytes for text, as the TTS stage does"""
+    key = TTSOutputCache.key(text, None, "model")
+    path = cache.temp_path(key)
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    return key, cache.add(key, path)
+
+
+def test_evicts_least_recently_used_to_budget(tmp_path):
+    cache = TTSOutputCache(str(tmp_path), max_bytes=3000)
+    a, _ = synthesize(cache, "one", 1000)
+    b, _ = synthesize(cache, "two", 1000)
+    c, _ = synthesize(cache, "three", 1000)
+    assert cache.get(a) is not None  # Now b is the least recently used
+
+    d, _ = synthesize(cache, "four", 1000)
+
+    assert cache.get(b) is None
+    assert all(cache.get(key) is not None for key in (a, c, d))
+    assert cache.total_bytes == 3000
+    assert cache.evictions == 1
+    assert sorted(os.listdir(tmp_path)) == sorted(TTSOutputCache.filename(key) for key in (a, c, d))
+
+
+def test_keeps_newest_entry_even_over_budget(tmp_path):
+    cache = TTSOutputCache(str(tmp_path), max_bytes=1500)
+    synthesize(cache, "one", 1000)
+    key, name = synthesize(cache, "a long answer", 2000)
+
+    assert cache.get(key) == name
+    assert cache.stats()["entries"] == 1
+    assert cache.total_bytes == 2000
+
+
+def test_restart_restores_lru_order_and_drops_partial_files(tmp_path):
+    cache = TTSOutputCache(str(tmp_path), max_bytes=10000)
+    a, _ = synthesize(cache, "one", 1000)
+    b, _ = synthesize(cache, "two", 1000)
+    os.utime(tmp_path / TTSOutputCache.filename(a), (1000, 1000))
+    os.utime(tmp_path / TTSOutputCache.filename(b), (2000, 2000))
+    (tmp_path / "tts_abc.wav.123.part").write_bytes(b"\0")
+
+    reloaded = TTSOutputCache(str(tmp_path), max_bytes=1500)
+
+    assert not (tmp_path / "tts_abc.wav.123.part").exists()
+    assert reloaded.get(a) is None
+    assert reloaded.get(b) is not None
+
+
+def test_key_ignores_spacing_but_not_voice():
+    assert TTSOutputCache.key("Hello  world", None, "m") == TTSOutputCache.key(" Hello world\n", None, "m")
+    assert TTSOutputCache.key("hello", "voice-1", "m") != TTSOutputCache.key("hello", None, "m")
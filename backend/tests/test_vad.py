@@ -0,0 +1,48 @@
+import numpy as np
+
+from vad import speech_segments
+
+RATE = 16000
+
+
+def clip(*parts):
+    """Concatenate (seconds, amplitude) parts of a 200 Hz tone over faint noise"""
+    rng = np.random.default_rng(0)
+    audio = []
+    for seconds, amplitude in parts:
+        t = np.arange(int(seconds * RATE)) / RATE
+        audio.append(amplitude * np.sin(2 * np.pi * 200 * t) + 0.001 * rng.standard_normal(len(t)))
+    return np.concatenate(audio).astype(np.float32)
+
+
+def test_speech_is_found_between_silences_and_padded():
+    audio = clip((1.0, 0), (1.0, 0.5), (1.0, 0), (0.5, 0.5), (1.0, 0))
+    segments = speech_segments(audio, RATE, pad_ms=200)
+
+    assert len(segments) == 2
+    (first_start, first_end), (second_start, second_end) = segments
+    assert abs(first_start - int(0.8 * RATE)) <= 480 and abs(first_end - int(2.2 * RATE)) <= 480
+    assert abs(second_start - int(2.8 * RATE)) <= 480 and abs(second_end - int(3.7 * RATE)) <= 480
+
+
+def test_short_pauses_stay_inside_a_segment_and_blips_are_dropped():
+    audio = clip((1.0, 0), (0.6, 0.5), (0.1, 0), (0.6, 0.5), (1.0, 0), (0.03, 0.5), (1.0, 0))
+    segments = speech_segments(audio, RATE, min_silence_ms=300, min_speech_ms=150)
+
+    assert len(segments) == 1
+    start, end = segments[0]
+    assert start < RATE and end > int(2.3 * RATE) and end < int(3.0 * RATE)
+
+
+def test_long_speech_is_split_under_the_cap_without_overlap():
+    audio = clip((0.5, 0), (10.0, 0.5), (0.5, 0))
+    segments = speech_segments(audio, RATE, max_segment_seconds=3.0, pad_ms=0)
+
+    assert len(segments) >= 4
+    assert all(end - start <= 3.0 * RATE for start, end in segments)
+    assert all(previous[1] <= following[0] for previous, following in zip(segments, segments[1:]))
+
+
+def test_clips_shorter_than_a_frame():
+    assert speech_segments(np.zeros(100, dtype=np.float32), RATE) == [(0, 100)]
+    assert speech_segments(np.zeros(0, dtype=np.float32), RATE) == []
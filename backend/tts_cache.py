@@ -0,0 +1,131 @@
+import os
+import uuid
+import hashlib
+import logging
+import threading
+import unicodedata
+from retention import sweep_folder
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text):
+    """Canonical form of TTS input, so trivially different spellings share a cache entry"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class TTSOutputCache:
+    """Content-addressed TTS output files with LRU eviction under a byte budget
+
+    Files are named tts_<key>.wav after a hash of (normalized text, voice id, model id), so
+    a hit is just a filename that /api/tts/<filename> already serves. Recency is kept in
+    memory and mirrored to file mtimes, which restores the LRU order after a restart.
+    """
+
+    def __init__(self, folder, max_bytes):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # filename -> size, least recently used first
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def key(text, voice_id, model_id):
+        payload = "\x00".join((normalize_text(text), voice_id or "default", model_id))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+    @staticmethod
+    def filename(key):
+        return f"tts_{key}.wav"
+
+    def _load(self):
+        """Index whatever is already in the folder, oldest first; older tts_{uuid}.wav files count too"""
+        files = []
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            if name.endswith(".part"):
+                # Left behind by a synthesis that never finished
+                os.remove(path)
+            elif name.endswith(".wav") and os.path.isfile(path):
+                stat = os.stat(path)
+                files.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self.total_bytes += size
+        self._evict()
+
+    def _evict(self, keep=None):
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            name, size = next(iter(self._entries.items()))
+            if name == keep:
+                self._entries.move_to_end(name)
+                continue
+            del self._entries[name]
+            self.total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(os.path.join(self.folder, name))
+            except FileNotFoundError:
+                pass
+
+    def _touch(self, name):
+        self._entries.move_to_end(name)
+        try:
+            os.utime(os.path.join(self.folder, name))
+        except FileNotFoundError:
+            pass
+
+    def get(self, key):
+        """Return the cached filename for key, or None on a miss"""
+        name = self.filename(key)
+        with self._lock:
+            if name in self._entries and os.path.exists(os.path.join(self.folder, name)):
+                self._touch(name)
+                self.hits += 1
+                return name
+            self._entries.pop(name, None)
+            self.misses += 1
+            return None
+
+    def touch(self, name):
+        """Mark a file as used, e.g. when it is served for replay"""
+        with self._lock:
+            if name in self._entries:
+                self._touch(name)
+
+    def temp_path(self, key):
+        """Where to synthesize a miss before it is committed with add()"""
+        return os.path.join(self.folder, f"{self.filename(key)}.{uuid.uuid4().hex}.part")
+
+    def add(self, key, temp_path):
+        """Move a finished synthesis into the cache, evicting old entries over the budget"""
+        name = self.filename(key)
+        os.replace(temp_path, os.path.join(self.folder, name))
+        size = os.path.getsize(os.path.join(self.folder, name))
+        with self._lock:
+            self.total_bytes += size - self._entries.pop(name, 0)
+            self._entries[name] = size
+            self._evict(keep=name)
+        return name
+
+    def sweep(self, max_age_seconds):
+        """Delete files the cache does not track, like abandoned .part syntheses, once they are old enough"""
+        with self._lock:
+            keep = set(self._entries)
+        return sweep_folder(self.folder, max_age_seconds, keep=keep)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
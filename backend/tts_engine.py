@@ -0,0 +1,124 @@
+import os
+import time
+import tempfile
+
+import numpy as np
+import soundfile as sf
+
+from tts_stream import split_sentences, pcm16_bytes, wav_header
+from voice_cache import VoiceConditioningCache
+
+
+def load_tts(model_name, gpu=False):
+    from TTS.api import TTS
+    return TTS(model_name, gpu=gpu)
+
+
+def xtts_of(tts):
+    """The underlying XTTS model if the TTS model accepts precomputed speaker latents"""
+    model = getattr(getattr(tts, "synthesizer", None), "tts_model", None)
+    return model if hasattr(model, "get_conditioning_latents") else None
+
+
+def output_sample_rate(tts):
+    xtts = xtts_of(tts)
+    if xtts is not None:
+        return xtts.config.audio.output_sample_rate
+    return tts.synthesizer.output_sample_rate
+
+
+def write_temp_wav(audio, sample_rate):
+    fd, path = tempfile.mkstemp(prefix="voice_", suffix=".wav")
+    os.close(fd)
+    sf.write(path, audio, sample_rate)
+    return path
+
+
+def conditioning_latents(xtts, voice_audio, sample_rate, voice_path=None):
+    """Run the XTTS speaker encoder over a reference clip, or over voice_path if it already holds the clip"""
+    if voice_path is not None:
+        return tuple(xtts.get_conditioning_latents(audio_path=[voice_path]))
+    voice_path = write_temp_wav(voice_audio, sample_rate)
+    try:
+        return tuple(xtts.get_conditioning_latents(audio_path=[voice_path]))
+    finally:
+        os.remove(voice_path)
+
+
+def synthesize_sentence(tts, sentence, language, speaker_latents=None, voice_sample=None):
+    """Float audio for one sentence, from cached latents, a voice sample file or the default voice"""
+    if speaker_latents is not None:
+        gpt_cond_latent, speaker_embedding = speaker_latents
+        return xtts_of(tts).inference(sentence, language, gpt_cond_latent, speaker_embedding)["wav"]
+    if voice_sample and os.path.exists(voice_sample):
+        return tts.tts(sentence, speaker_wav=voice_sample)
+    return tts.tts(sentence)
+
+
+def warmup_tts(tts, language):
+    """Condition on a second of faint noise and synthesize one word"""
+    xtts = xtts_of(tts)
+    if xtts is None:
+        return
+    latents = conditioning_latents(xtts, 0.01 * np.random.default_rng(0).standard_normal(16000), 16000)
+    synthesize_sentence(tts, "Hello.", language, speaker_latents=latents)
+
+
+def load(model_name, language="en", gpu=False, voice_cache_size=256, voice_cache_dir=None):
+    """Worker state: the model plus this process's own voice conditioning cache"""
+    return {
+        "tts": load_tts(model_name, gpu),
+        "language": language,
+        "voice_cache": VoiceConditioningCache(voice_cache_size, persist_dir=voice_cache_dir)
+    }
+
+
+def warmup(state):
+    warmup_tts(state["tts"], state["language"])
+
+
+def synthesize(state, payload, emit):
+    """Clone the voice (cached), synthesize sentence by sentence and write the assembled WAV
+
+    With payload["stream"], each sentence is sent back through emit as
+    (index, sentence, pcm, sample_rate) as soon as it is ready.
+    """
+    tts, voice_cache = state["tts"], state["voice_cache"]
+    xtts = xtts_of(tts)
+    voice_audio, user_id = payload.get("voice_audio"), payload.get("user_id")
+
+    result = {"voice_id": "default"}
+    speaker_latents = None
+    if xtts is not None and (voice_audio is not None or user_id):
+        start = time.time()
+        fingerprint = voice_cache.fingerprint(voice_audio) if voice_audio is not None else None
+        speaker_latents = voice_cache.get(user_id=user_id, fingerprint=fingerprint)
+        result["voice_cache"] = "hit" if speaker_latents is not None else "miss"
+        if speaker_latents is None and voice_audio is not None:
+            speaker_latents = conditioning_latents(xtts, voice_audio, payload["sample_rate"])
+            voice_cache.put(speaker_latents, user_id=user_id, fingerprint=fingerprint)
+        result["voice_conditioning_time"] = time.time() - start
+        if speaker_latents is not None:
+            result["voice_id"] = f"audio:{fingerprint}" if fingerprint else f"user:{user_id}"
+
+    sample_rate = output_sample_rate(tts)
+    chunks = []
+    for index, sentence in enumerate(split_sentences(payload["text"], payload.get("max_chars", 250))):
+        pcm = pcm16_bytes(synthesize_sentence(tts, sentence, state["language"], speaker_latents))
+        chunks.append(pcm)
+        if payload.get("stream"):
+            emit((index, sentence, pcm, sample_rate))
+
+    with open(payload["output_path"], 'wb') as f:
+        f.write(wav_header(sample_rate, sum(len(chunk) for chunk in chunks)))
+        for chunk in chunks:
+            f.write(chunk)
+
+    result.update(sample_rate=sample_rate, tts_chunks=len(chunks))
+    return result
+
+
+def handle(state, op, payload, emit):
+    if op == "synthesize":
+        return synthesize(state, payload, emit)
+    raise ValueError(f"Unknown TTS operation: {op}")
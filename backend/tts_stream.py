@@ -0,0 +1,36 @@
+import re
+import struct
+import numpy as np
+
+SENTENCE_END = re.compile(r'(?<=[.!?;])\s+')
+# Data size for a WAV whose length is not known yet; players read until the stream ends
+UNKNOWN_WAV_SIZE = 0xFFFFFFFF
+
+
+def split_sentences(text, max_chars=250):
+    """Split text into sentences for incremental synthesis, breaking any longer than max_chars at word boundaries"""
+    sentences = []
+    for sentence in SENTENCE_END.split(text.strip()):
+        sentence = sentence.strip()
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(',', 0, max_chars) + 1 or sentence.rfind(' ', 0, max_chars) + 1 or max_chars
+            sentences.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if sentence:
+            sentences.append(sentence)
+    return sentences
+
+
+def pcm16_bytes(audio):
+    """Float audio in [-1, 1] as little-endian 16-bit PCM"""
+    return (np.clip(np.asarray(audio, dtype=np.float32), -1.0, 1.0) * 32767).astype('<i2').tobytes()
+
+
+def wav_header(sample_rate, data_size=UNKNOWN_WAV_SIZE):
+    """44-byte header for mono 16-bit PCM; the default size marks a stream of unknown length"""
+    riff_size = UNKNOWN_WAV_SIZE if data_size == UNKNOWN_WAV_SIZE else 36 + data_size
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', riff_size, b'WAVE', b'fmt ', 16, 1, 1,
+        sample_rate, sample_rate * 2, 2, 16, b'data', data_size
+    )
@@ -0,0 +1,65 @@
+import numpy as np
+
+
+def frame_energy_db(audio, frame_size):
+    """RMS level in dB of consecutive non-overlapping frames"""
+    count = len(audio) // frame_size
+    frames = audio[:count * frame_size].reshape(count, frame_size)
+    rms = np.sqrt(np.mean(frames.astype(np.float64) ** 2, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def speech_segments(audio, sample_rate=16000, frame_ms=30, min_silence_ms=300, min_speech_ms=150,
+                    pad_ms=200, max_segment_seconds=30.0, threshold_db=None):
+    """Split a clip into speech segments by frame energy, skipping silence
+
+    The threshold adapts to the clip: a margin above its noise floor (10th percentile
+    level) but under its loud frames, and never below -50 dBFS. Gaps shorter than min_silence_ms stay inside a
+    segment, segments are padded by pad_ms, and anything longer than
+    max_segment_seconds is split at its quietest frame in the second half of the cap.
+    Returns a list of (start_sample, end_sample).
+    """
+    frame_size = int(sample_rate * frame_ms / 1000)
+    if len(audio) < frame_size:
+        return [(0, len(audio))] if len(audio) else []
+
+    levels = frame_energy_db(audio, frame_size)
+    if threshold_db is None:
+        noise_floor, loud = np.percentile(levels, [10, 90])
+        # Clips with little dynamic range (speech throughout) would otherwise sit under their own floor
+        threshold_db = max(min(noise_floor + 12.0, loud - 6.0), -50.0)
+    speech = levels > threshold_db
+
+    # Runs of speech frames, with short pauses bridged
+    segments = []
+    min_gap = max(1, int(min_silence_ms / frame_ms))
+    for index in np.flatnonzero(speech):
+        if segments and index - segments[-1][1] <= min_gap:
+            segments[-1][1] = index + 1
+        else:
+            segments.append([index, index + 1])
+    min_frames = max(1, int(min_speech_ms / frame_ms))
+    segments = [(start, end) for start, end in segments if end - start >= min_frames]
+
+    # Cap the length, cutting where it is quietest
+    max_frames = max(2, int(max_segment_seconds * 1000 / frame_ms))
+    capped = []
+    for start, end in segments:
+        while end - start > max_frames:
+            window = levels[start + max_frames // 2:start + max_frames]
+            cut = start + max_frames // 2 + int(np.argmin(window))
+            capped.append((start, cut))
+            start = cut
+        capped.append((start, end))
+
+    # Back to samples, padded but never overlapping or past the clip
+    pad = int(sample_rate * pad_ms / 1000)
+    result = []
+    for start, end in capped:
+        start_sample = max(0, start * frame_size - pad)
+        end_sample = min(len(audio), end * frame_size + pad)
+        if result and start_sample < result[-1][1]:
+            start_sample = result[-1][1]
+        if end_sample > start_sample:
+            result.append((int(start_sample), int(end_sample)))
+    return result
@@ -0,0 +1,92 @@
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+
+class VoiceConditioningCache:
+    """LRU cache of XTTS conditioning latents, keyed by user and by audio fingerprint
+
+    A user id hit lets a returning speaker skip the speaker encoder even with new audio;
+    the fingerprint catches the same reference audio arriving again without a user id.
+    With persist_dir set, entries are also written there with torch.save and survive restarts.
+    """
+
+    def __init__(self, max_entries=256, persist_dir=None):
+        self.max_entries = max_entries
+        self.persist_dir = persist_dir
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if persist_dir:
+            os.makedirs(persist_dir, exist_ok=True)
+
+    @staticmethod
+    def fingerprint(audio):
+        """Content hash of a float reference clip"""
+        pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype('<i2')
+        return hashlib.sha1(pcm.tobytes()).hexdigest()
+
+    @staticmethod
+    def latents_id(latents):
+        """Stable id of a voice from its speaker embedding"""
+        _, speaker_embedding = latents
+        return hashlib.sha1(speaker_embedding.detach().cpu().numpy().tobytes()).hexdigest()
+
+    @staticmethod
+    def _keys(user_id, fingerprint):
+        keys = []
+        if user_id:
+            keys.append(f"user:{user_id}")
+        if fingerprint:
+            keys.append(f"audio:{fingerprint}")
+        return keys
+
+    def _persist_path(self, key):
+        return os.path.join(self.persist_dir, hashlib.sha1(key.encode()).hexdigest() + ".pt")
+
+    def _remember(self, key, latents):
+        self._entries[key] = latents
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, user_id=None, fingerprint=None):
+        """Return cached latents for the user or the audio, or None"""
+        with self._lock:
+            for key in self._keys(user_id, fingerprint):
+                latents = self._entries.get(key)
+                if latents is None and self.persist_dir and os.path.exists(self._persist_path(key)):
+                    try:
+                        latents = torch.load(self._persist_path(key), map_location="cpu")
+                    except Exception as e:
+                        logger.warning(f"Could not read cached voice latents for {key}: {e}")
+                        continue
+                if latents is not None:
+                    self._remember(key, latents)
+                    self.hits += 1
+                    return latents
+            self.misses += 1
+            return None
+
+    def put(self, latents, user_id=None, fingerprint=None):
+        """Cache latents under the user id and the audio fingerprint"""
+        with self._lock:
+            for key in self._keys(user_id, fingerprint):
+                self._remember(key, latents)
+                if self.persist_dir:
+                    try:
+                        torch.save(latents, self._persist_path(key))
+                    except Exception as e:
+                        logger.warning(f"Could not persist voice latents for {key}: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
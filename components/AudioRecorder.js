@@ -37,6 +37,65 @@ const WHISPER_CONFIG = {
   MIN_DURATION: 500,          // Minimum duration for a valid whisper (ms)
 };
 
+// Binary streaming: raw 16-bit PCM is read out of the WAV recording and sent as frames
+const PCM_SAMPLE_RATE = 16000;
+
+const base64ToBytes = (base64) => {
+  const binary = atob(base64);
+  const bytes = new Uint8Array(binary.length);
+  for (let i = 0; i < binary.length; i++) {
+    bytes[i] = binary.charCodeAt(i);
+  }
+  return bytes;
+};
+
+const bytesToBase64 = (bytes) => {
+  let binary = '';
+  for (let i = 0; i < bytes.length; i++) {
+    binary += String.fromCharCode(bytes[i]);
+  }
+  return btoa(binary);
+};
+
+// Wrap one streamed TTS chunk of mono 16-bit PCM in a WAV header so it can be played on its own
+const pcmToWav = (pcm, sampleRate) => {
+  const wav = new Uint8Array(44 + pcm.length);
+  const view = new DataView(wav.buffer);
+  const writeString = (offset, text) => {
+    for (let i = 0; i < text.length; i++) {
+      wav[offset + i] = text.charCodeAt(i);
+    }
+  };
+  writeString(0, 'RIFF');
+  view.setUint32(4, 36 + pcm.length, true);
+  writeString(8, 'WAVEfmt ');
+  view.setUint32(16, 16, true);
+  view.setUint16(20, 1, true);
+  view.setUint16(22, 1, true);
+  view.setUint32(24, sampleRate, true);
+  view.setUint32(28, sampleRate * 2, true);
+  view.setUint16(32, 2, true);
+  view.setUint16(34, 16, true);
+  writeString(36, 'data');
+  view.setUint32(40, pcm.length, true);
+  wav.set(pcm, 44);
+  return wav;
+};
+
+// Byte offset of the samples in a WAV file, skipping any chunks before 'data'
+const findWavDataOffset = (bytes) => {
+  let offset = 12;
+  while (offset + 8 <= bytes.length) {
+    const id = String.fromCharCode(...bytes.slice(offset, offset + 4));
+    const size = bytes[offset + 4] | (bytes[offset + 5] << 8) | (bytes[offset + 6] << 16) | (bytes[offset + 7] << 24);
+    if (id === 'data') {
+      return offset + 8;
+    }
+    offset += 8 + size + (size % 2);
+  }
+  return null;
+};
+
 const AudioRecorder = () => {
   // Existing state
   const [recording, setRecording] = useState(null);
@@ -67,6 +126,12 @@ const AudioRecorder = () => {
   const [confidenceLevel, setConfidenceLevel] = useState(0);
   const socketRef = useRef(null);
   const recordingRef = useRef(null);
+  const streamOffsetRef = useRef(null);
+  const frameSeqRef = useRef(0);
+  const ttsQueueRef = useRef([]);
+  const ttsPlayingRef = useRef(false);
+  const ttsStreamedRef = useRef(new Set());
+  const subscribedSessionRef = useRef(null);
   const animationRef = useRef(new Animated.Value(0)).current;
 
   // Connect to WebSocket
@@ -85,6 +150,10 @@ const AudioRecorder = () => {
 
         socket.on('connect', () => {
           console.log('Socket connected');
+          // Results are only sent to a session's subscribers, so rejoin after a reconnect
+          if (subscribedSessionRef.current) {
+            socket.emit('subscribe', { session_id: subscribedSessionRef.current });
+          }
         });
 
         socket.on('transcription_complete', (data) => {
@@ -94,6 +163,43 @@ const AudioRecorder = () => {
           }
         });
 
+        // Live text while streaming: stable words followed by the still-changing tail
+        socket.on('partial_transcript', (data) => {
+          if (data.session_id === sessionId) {
+            setTranscript(`${data.stable_text} ${data.unstable_text}`.trim());
+            setMessage(`${data.stable_text} ${data.unstable_text}`.trim());
+          }
+        });
+
+        // TTS arrives separately, after the transcription has been shown
+        // Sentence-sized TTS audio, played in order while the rest is still being synthesized
+        socket.on('tts_chunk', async (data) => {
+          if (data.session_id !== sessionId) {
+            return;
+          }
+          ttsStreamedRef.current.add(data.session_id);
+          const uri = `${FileSystem.cacheDirectory}tts_${data.session_id}_${data.index}.wav`;
+          const wav = pcmToWav(new Uint8Array(data.audio), data.sample_rate);
+          await FileSystem.writeAsStringAsync(uri, bytesToBase64(wav), {
+            encoding: FileSystem.EncodingType.Base64,
+          });
+          ttsQueueRef.current.push(uri);
+          if (!ttsPlayingRef.current) {
+            playNextTTSChunk();
+          }
+        });
+
+        socket.on('tts_complete', (data) => {
+          console.log('Received TTS audio:', data);
+          // Already heard chunk by chunk; the assembled file stays available for replay
+          if (ttsStreamedRef.current.delete(data.session_id)) {
+            return;
+          }
+          if (data.session_id === sessionId && data.result.tts_audio_url) {
+            playTTSAudio(API_URL + data.result.tts_audio_url);
+          }
+        });
+
         socket.on('disconnect', () => {
           console.log('Socket disconnected');
         });
@@ -208,8 +314,12 @@ const AudioRecorder = () => {
         setSessionId(newSessionId);
       }
       
-      // In a production app, you would extract just the new audio chunk
-      // Here we're sending the whole file each time as a simplified example
+      if (uri.endsWith('.wav')) {
+        await streamPcmFrame(uri);
+        return;
+      }
+      
+      // Compressed recordings cannot be split, so the whole file is sent each time
       const chunk = await FileSystem.readAsStringAsync(uri, { encoding: FileSystem.EncodingType.Base64 });
       
       // Send via websocket for faster processing
@@ -226,6 +336,42 @@ const AudioRecorder = () => {
     }
   };
 
+  // Send only the PCM bytes recorded since the last frame, as a binary payload
+  const streamPcmFrame = async (uri) => {
+    if (!socketRef.current || !socketRef.current.connected) return;
+    
+    const { size } = await FileSystem.getInfoAsync(uri);
+    if (streamOffsetRef.current === null) {
+      const header = base64ToBytes(await FileSystem.readAsStringAsync(uri, {
+        encoding: FileSystem.EncodingType.Base64,
+        position: 0,
+        length: Math.min(size, 8192)
+      }));
+      streamOffsetRef.current = findWavDataOffset(header);
+      if (streamOffsetRef.current === null) return;
+    }
+    
+    // Whole 16-bit samples only
+    const length = (size - streamOffsetRef.current) & ~1;
+    if (length <= 0) return;
+    
+    const frame = base64ToBytes(await FileSystem.readAsStringAsync(uri, {
+      encoding: FileSystem.EncodingType.Base64,
+      position: streamOffsetRef.current,
+      length
+    }));
+    streamOffsetRef.current += length;
+    
+    socketRef.current.emit('audio_frame', {
+      session_id: sessionId,
+      seq: frameSeqRef.current++,
+      format: 'pcm16',
+      sample_rate: PCM_SAMPLE_RATE,
+      audio: frame.buffer,
+      is_final: false
+    });
+  };
+
   // Handle transcription results from server
   const handleTranscriptionResult = (result) => {
     if (result.transcription) {
@@ -348,9 +494,15 @@ const AudioRecorder = () => {
           },
           ios: {
             ...Audio.RecordingOptionsPresets.HIGH_QUALITY.ios,
-            extension: '.m4a',
-            outputFormat: Audio.IOSOutputFormat.MPEG4AAC,
+            // Linear PCM lets new samples be streamed as they are recorded
+            extension: '.wav',
+            outputFormat: Audio.IOSOutputFormat.LINEARPCM,
             audioQuality: Audio.IOSAudioQuality.MAX,
+            sampleRate: PCM_SAMPLE_RATE,
+            numberOfChannels: 1,
+            linearPCMBitDepth: 16,
+            linearPCMIsBigEndian: false,
+            linearPCMIsFloat: false,
           },
           web: {
             mimeType: 'audio/webm',
@@ -364,6 +516,8 @@ const AudioRecorder = () => {
       // Create a new session ID
       const newSessionId = Math.random().toString(36).substring(2, 15);
       setSessionId(newSessionId);
+      streamOffsetRef.current = null;
+      frameSeqRef.current = 0;
       
       recordingRef.current = newRecording;
       setRecording(newRecording);
@@ -396,7 +550,11 @@ const AudioRecorder = () => {
       setMessage("Processing your whisper...");
       
       try {
-        const response = await uploadAudio(uri);
+        const response = await uploadAudio(uri, undefined, socketRef.current?.id);
+        if (response.session_id && socketRef.current) {
+          subscribedSessionRef.current = response.session_id;
+          socketRef.current.emit('subscribe', { session_id: response.session_id });
+        }
         handleProcessingComplete(response);
       } catch (error) {
         console.error('Upload error:', error);
@@ -452,6 +610,31 @@ const AudioRecorder = () => {
     }
   };
 
+  const playNextTTSChunk = async () => {
+    const uri = ttsQueueRef.current.shift();
+    if (!uri) {
+      ttsPlayingRef.current = false;
+      setSpeakingAnimation(false);
+      return;
+    }
+
+    ttsPlayingRef.current = true;
+    setSpeakingAnimation(true);
+    try {
+      const { sound: chunkSound } = await Audio.Sound.createAsync({ uri }, { shouldPlay: true });
+      chunkSound.setOnPlaybackStatusUpdate(status => {
+        if (status.didJustFinish) {
+          chunkSound.unloadAsync();
+          FileSystem.deleteAsync(uri, { idempotent: true });
+          playNextTTSChunk();
+        }
+      });
+    } catch (error) {
+      console.error('TTS chunk playback error:', error);
+      playNextTTSChunk();
+    }
+  };
+
   return (
     <View style={styles.container}>
       {/* Facial Animation Component */}
@@ -13,7 +13,7 @@ export const API_URL = Platform.OS === 'android' ?
  * @param {Function} progressCallback - Optional callback for upload progress
  * @returns {Promise} - Promise with the server response
  */
-export const uploadAudio = async (uri, progressCallback = () => {}) => {
+export const uploadAudio = async (uri, progressCallback = () => {}, socketId = null) => {
   try {
     console.log(`Uploading audio from ${uri}`);
     const formData = new FormData();
@@ -22,6 +22,10 @@ export const uploadAudio = async (uri, progressCallback = () => {}) => {
       type: 'audio/*',
       name: `audio-${Date.now()}.${uri.split('.').pop()}`
     });
+    // Lets the server drop the queued work if this client disconnects
+    if (socketId) {
+      formData.append('socket_id', socketId);
+    }
 
     const response = await axios.post(`${API_URL}/api/upload`, formData, {
       headers: {